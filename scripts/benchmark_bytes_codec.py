@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Compare compression ratio and throughput of the bytes codecs on a sample of a collection."""
+
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+from srai_store.bytes_codec_registry import decode_bytes, get_bytes_codec
+from srai_store.store_provider_base import StoreProviderBase
+
+CODEC_NAMES = ["none", "zlib", "zstd", "lz4", "adaptive"]
+
+
+def get_store_provider(provider: str, database_name: str, path_dir_database: Path) -> StoreProviderBase:
+    """Create the store provider holding the collection to sample."""
+    if provider == "sqlite":
+        from srai_store.store_provider_sqlite import StoreProviderSqlite
+
+        return StoreProviderSqlite(database_name, path_dir_database)
+    if provider == "duckdb":
+        from srai_store.store_provider_duckdb import StoreProviderDuckdb
+
+        return StoreProviderDuckdb(database_name, path_dir_database)
+    if provider == "disk":
+        from srai_store.store_provider_disk import StoreProviderDisk
+
+        return StoreProviderDisk(database_name, str(path_dir_database))
+    raise ValueError(f"Unknown provider: {provider}")
+
+
+def benchmark_codec(codec_name: str, samples: list[bytes], repeat: int) -> dict:
+    """Return ratio and compress/decompress throughput (MB/s) of a codec on the samples."""
+    codec = get_bytes_codec(codec_name)
+    size_raw = sum(len(sample) for sample in samples)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        blobs = [codec.encode(sample) for sample in samples]
+    time_compress = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for blob in blobs:
+            decode_bytes(blob, codec)
+    time_decompress = time.perf_counter() - start
+
+    size_encoded = sum(len(blob) for blob in blobs)
+    megabytes = size_raw * repeat / 1e6
+    return {
+        "codec": codec_name,
+        "ratio": size_encoded / size_raw if size_raw else 1.0,
+        "compress_mb_s": megabytes / time_compress if time_compress else 0.0,
+        "decompress_mb_s": megabytes / time_decompress if time_decompress else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark bytes codecs on a sample of a collection")
+    parser.add_argument("provider", choices=["sqlite", "duckdb", "disk"], help="Store provider holding the collection")
+    parser.add_argument("path_dir_database", type=Path, help="Data directory of the store provider")
+    parser.add_argument("database_name", help="Database name")
+    parser.add_argument("collection_name", help="Bytes collection to sample")
+    parser.add_argument("--sample-count", type=int, default=1000, help="Number of values to sample (default: 1000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per codec (default: 3)")
+    parser.add_argument("--codecs", nargs="+", default=CODEC_NAMES, help="Codecs to compare")
+    args = parser.parse_args()
+
+    store_provider = get_store_provider(args.provider, args.database_name, args.path_dir_database)
+    bytes_store = store_provider.get_bytes_store(args.collection_name)
+    samples = asyncio.run(bytes_store.asample(args.sample_count))
+    if not samples:
+        raise SystemExit(f"Collection {args.collection_name} is empty")
+    print(f"Sampled {len(samples)} values, {sum(len(sample) for sample in samples) / len(samples):.0f} bytes on average")
+
+    print(f"{'codec':<10} {'ratio':>7} {'compress MB/s':>14} {'decompress MB/s':>16}")
+    for codec_name in args.codecs:
+        try:
+            result = benchmark_codec(codec_name, samples, args.repeat)
+        except ImportError as e:
+            print(f"{codec_name:<10} skipped: {e}")
+            continue
+        print(f"{result['codec']:<10} {result['ratio']:>7.3f} {result['compress_mb_s']:>14.1f} {result['decompress_mb_s']:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import io
+from typing import Callable, Optional
+
+# chunk size of values written with open_write when the store has no chunk_size
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class BytesChunkReader(io.RawIOBase):
+    """Seekable read stream over a value stored as fixed-size chunks, loading one chunk at a time.
+
+    Args:
+        size: Size of the value in bytes.
+        chunk_size: Size of every chunk but the last.
+        read_chunk: Returns the (decompressed) chunk with the given number.
+    """
+
+    def __init__(self, size: int, chunk_size: int, read_chunk: Callable[[int], bytes]) -> None:
+        super().__init__()
+        self.size = size
+        self.chunk_size = chunk_size
+        self._read_chunk = read_chunk
+        self._position = 0
+        self._chunk_no: Optional[int] = None
+        self._chunk = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if position < 0:
+            raise ValueError(f"Negative seek position {position}")
+        self._position = position
+        return position
+
+    def readinto(self, buffer) -> int:  # type: ignore
+        view = memoryview(buffer).cast("B")
+        count_read = 0
+        while count_read < len(view) and self._position < self.size:
+            chunk_no, offset = divmod(self._position, self.chunk_size)
+            if chunk_no != self._chunk_no:
+                self._chunk = self._read_chunk(chunk_no)
+                self._chunk_no = chunk_no
+            count = min(len(view) - count_read, len(self._chunk) - offset)
+            if count <= 0:
+                raise OSError(f"Chunk {chunk_no} is shorter than expected")
+            view[count_read : count_read + count] = self._chunk[offset : offset + count]
+            count_read += count
+            self._position += count
+        return count_read
+
+
+class BytesChunkWriter(io.RawIOBase):
+    """Write stream that cuts the written bytes into fixed-size chunks, holding at most one chunk in memory.
+
+    Closing the stream writes the last chunk and calls finish, leaving a with block on an exception
+    calls abort instead so a partial value is never stored.
+
+    Args:
+        chunk_size: Size of every chunk but the last.
+        write_chunk: Stores a chunk under its number.
+        finish: Called with the total size and number of chunks once everything is written.
+        abort: Called instead of finish when the write is abandoned.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int,
+        write_chunk: Callable[[int, bytes], None],
+        finish: Callable[[int, int], None],
+        abort: Callable[[], None],
+    ) -> None:
+        super().__init__()
+        self.chunk_size = chunk_size
+        self._write_chunk = write_chunk
+        self._finish = finish
+        self._abort = abort
+        self._buffer = bytearray()
+        self._count_chunks = 0
+        self._size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:  # type: ignore
+        if self.closed:
+            raise ValueError("Write to closed stream")
+        self._buffer += data
+        count = len(data) if isinstance(data, (bytes, bytearray)) else memoryview(data).nbytes
+        self._size += count
+        while len(self._buffer) >= self.chunk_size:
+            self._write_chunk(self._count_chunks, bytes(self._buffer[: self.chunk_size]))
+            del self._buffer[: self.chunk_size]
+            self._count_chunks += 1
+        return count
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            if self._buffer:
+                self._write_chunk(self._count_chunks, bytes(self._buffer))
+                self._buffer = bytearray()
+                self._count_chunks += 1
+            self._finish(self._size, self._count_chunks)
+        except Exception:
+            self._abort()
+            raise
+        finally:
+            super().close()
+
+    def abort(self) -> None:
+        """Discard everything written so far."""
+        if self.closed:
+            return
+        self._buffer = bytearray()
+        try:
+            self._abort()
+        finally:
+            super().close()
+
+    def __del__(self) -> None:
+        # an abandoned writer must not store a partial value
+        if not self.closed:
+            try:
+                self.abort()
+            except Exception:
+                pass
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
@@ -0,0 +1,49 @@
+from srai_store.bytes_codec_base import BytesCodecBase
+from srai_store.bytes_codec_none import BytesCodecNone
+
+# magic numbers of formats that are already compressed
+COMPRESSED_MAGIC_NUMBERS = (
+    b"\x89PNG",  # png
+    b"\xff\xd8\xff",  # jpeg
+    b"GIF8",  # gif
+    b"RIFF",  # webp
+    b"PK\x03\x04",  # zip, docx, xlsx
+    b"\x1f\x8b",  # gzip
+    b"\x28\xb5\x2f\xfd",  # zstd
+    b"%PDF",  # pdf (mostly compressed streams)
+)
+
+
+class BytesCodecAdaptive(BytesCodecBase):
+    """Chooses per blob between a compressing codec and storing the blob as is.
+
+    Small blobs and blobs in an already compressed format are stored uncompressed, as are blobs
+    that do not shrink below max_ratio. Blobs carry the header of the codec actually used, so
+    this codec never appears in stored data itself.
+    """
+
+    name = "adaptive"
+
+    def __init__(self, codec: BytesCodecBase, min_size: int = 256, max_ratio: float = 0.9) -> None:
+        self.codec = codec
+        self.codec_id = codec.codec_id
+        self.min_size = min_size
+        self.max_ratio = max_ratio
+        self._codec_none = BytesCodecNone()
+
+    def compress(self, data: bytes) -> bytes:
+        return self.codec.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self.codec.decompress(data)
+
+    def encode(self, data: bytes) -> bytes:
+        if len(data) < self.min_size or data.startswith(COMPRESSED_MAGIC_NUMBERS):
+            return self._codec_none.encode(data)
+        blob = self.codec.encode(data)
+        if len(blob) > len(data) * self.max_ratio:
+            return self._codec_none.encode(data)
+        return blob
+
+    def decode(self, blob: bytes) -> bytes:
+        return self.codec.decode(blob)
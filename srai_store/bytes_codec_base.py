@@ -0,0 +1,26 @@
+from abc import ABC, abstractmethod
+
+
+class BytesCodecBase(ABC):
+    """Compression codec for stored blobs.
+
+    Encoded blobs start with a single header byte holding the codec_id, so blobs written with
+    different codecs can live side by side in one collection.
+    """
+
+    codec_id: int
+    name: str
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        pass
+
+    @abstractmethod
+    def decompress(self, data: bytes) -> bytes:
+        pass
+
+    def encode(self, data: bytes) -> bytes:
+        return bytes([self.codec_id]) + self.compress(data)
+
+    def decode(self, blob: bytes) -> bytes:
+        return self.decompress(memoryview(blob)[1:])  # type: ignore
@@ -0,0 +1,18 @@
+from srai_store.bytes_codec_base import BytesCodecBase
+
+
+class BytesCodecLz4(BytesCodecBase):
+    """LZ4 frame codec, requires the optional lz4 package."""
+
+    codec_id = 0x02
+    name = "lz4"
+
+    def compress(self, data: bytes) -> bytes:
+        import lz4.frame
+
+        return lz4.frame.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        import lz4.frame
+
+        return lz4.frame.decompress(data)
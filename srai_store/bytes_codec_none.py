@@ -0,0 +1,12 @@
+from srai_store.bytes_codec_base import BytesCodecBase
+
+
+class BytesCodecNone(BytesCodecBase):
+    codec_id = 0x00
+    name = "none"
+
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def decompress(self, data: bytes) -> bytes:
+        return bytes(data)
@@ -0,0 +1,51 @@
+from typing import Dict, Optional
+
+from srai_store.bytes_codec_adaptive import BytesCodecAdaptive
+from srai_store.bytes_codec_base import BytesCodecBase
+from srai_store.bytes_codec_lz4 import BytesCodecLz4
+from srai_store.bytes_codec_none import BytesCodecNone
+from srai_store.bytes_codec_zlib import BytesCodecZlib
+from srai_store.bytes_codec_zstd import BytesCodecZstd
+
+_codecs_by_name: Dict[str, BytesCodecBase] = {}
+_codecs_by_id: Dict[int, BytesCodecBase] = {}
+
+
+def register_bytes_codec(codec: BytesCodecBase) -> None:
+    existing = _codecs_by_id.get(codec.codec_id)
+    if existing is not None and existing.name != codec.name:
+        raise ValueError(f"Codec id {codec.codec_id} is already used by codec {existing.name}")
+    _codecs_by_name[codec.name] = codec
+    _codecs_by_id[codec.codec_id] = codec
+
+
+def _zstd_available() -> bool:
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_bytes_codec(name: str) -> BytesCodecBase:
+    if name == "adaptive":
+        fast_codec = _codecs_by_name["zstd"] if _zstd_available() else BytesCodecZlib(level=1)
+        return BytesCodecAdaptive(fast_codec)
+    if name not in _codecs_by_name:
+        raise ValueError(f"Unknown codec: {name}. Use one of {[*_codecs_by_name, 'adaptive']}")
+    return _codecs_by_name[name]
+
+
+def decode_bytes(blob: bytes, codec: Optional[BytesCodecBase] = None) -> bytes:
+    """Decode a blob written by any registered codec, preferring codec for its own header."""
+    if codec is not None and blob[0] == codec.codec_id:
+        return codec.decode(blob)
+    if blob[0] not in _codecs_by_id:
+        raise ValueError(f"Unknown codec header byte: {blob[0]}")
+    return _codecs_by_id[blob[0]].decode(blob)
+
+
+register_bytes_codec(BytesCodecNone())
+register_bytes_codec(BytesCodecZlib())
+register_bytes_codec(BytesCodecZstd())
+register_bytes_codec(BytesCodecLz4())
@@ -0,0 +1,29 @@
+import zlib
+
+from srai_store.bytes_codec_base import BytesCodecBase
+
+
+class BytesCodecZlib(BytesCodecBase):
+    """zlib codec, the format all blobs were written in before codecs existed.
+
+    A zlib stream (default window) always starts with 0x78, which doubles as the header byte,
+    so blobs are stored without an extra header and old blobs read unchanged.
+    """
+
+    codec_id = 0x78
+    name = "zlib"
+
+    def __init__(self, level: int = -1) -> None:
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+    def encode(self, data: bytes) -> bytes:
+        return self.compress(data)
+
+    def decode(self, blob: bytes) -> bytes:
+        return self.decompress(blob)
@@ -0,0 +1,21 @@
+from srai_store.bytes_codec_base import BytesCodecBase
+
+
+class BytesCodecZstd(BytesCodecBase):
+    """Zstandard codec, requires the optional zstandard package."""
+
+    codec_id = 0x01
+    name = "zstd"
+
+    def __init__(self, level: int = 3) -> None:
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        import zstandard
+
+        return zstandard.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        import zstandard
+
+        return zstandard.decompress(data)
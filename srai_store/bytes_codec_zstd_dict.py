@@ -0,0 +1,103 @@
+import logging
+import struct
+import threading
+from typing import Callable, Dict, List, Optional
+
+from srai_store.bytes_codec_base import BytesCodecBase
+from srai_store.bytes_codec_zstd import BytesCodecZstd
+
+logger = logging.getLogger(__name__)
+
+
+class BytesCodecZstdDict(BytesCodecBase):
+    """Zstandard codec with a dictionary trained on the collection, requires the optional zstandard package.
+
+    Small, structurally similar values (e.g. JSON documents) barely compress on their own; a shared
+    dictionary captures the common structure. Blobs are stored as header byte + 4 byte dictionary
+    version + zstd frame, so values written with older dictionaries stay readable after retraining.
+    Until a dictionary exists, blobs are written with the plain zstd codec.
+
+    Args:
+        load_dictionary: Returns the stored dictionary for a version, used for versions this
+            instance has not seen (e.g. trained by another process).
+        level: zstd compression level.
+    """
+
+    codec_id = 0x03
+    name = "zstd_dict"
+
+    def __init__(self, load_dictionary: Callable[[int], Optional[bytes]], level: int = 3) -> None:
+        self.load_dictionary = load_dictionary
+        self.level = level
+        self.version: Optional[int] = None
+        self._dictionaries: Dict[int, object] = {}
+        self._codec_zstd = BytesCodecZstd(level)
+        # zstd (de)compressors must not be shared between threads
+        self._local = threading.local()
+
+    def set_dictionary(self, version: int, dictionary: bytes) -> None:
+        """Use this dictionary version for all following writes."""
+        self._add_dictionary(version, dictionary)
+        self.version = version
+
+    def _add_dictionary(self, version: int, dictionary: bytes) -> object:
+        import zstandard
+
+        dict_data = zstandard.ZstdCompressionDict(dictionary)
+        dict_data.precompute_compress(level=self.level)
+        self._dictionaries[version] = dict_data
+        return dict_data
+
+    def _get_dictionary(self, version: int) -> object:
+        if version not in self._dictionaries:
+            dictionary = self.load_dictionary(version)
+            if dictionary is None:
+                raise ValueError(f"Compression dictionary version {version} not found")
+            return self._add_dictionary(version, dictionary)
+        return self._dictionaries[version]
+
+    def _get_compressor(self, version: int):
+        import zstandard
+
+        compressors = self._local.__dict__.setdefault("compressors", {})
+        if version not in compressors:
+            compressors[version] = zstandard.ZstdCompressor(level=self.level, dict_data=self._get_dictionary(version))
+        return compressors[version]
+
+    def _get_decompressor(self, version: int):
+        import zstandard
+
+        decompressors = self._local.__dict__.setdefault("decompressors", {})
+        if version not in decompressors:
+            decompressors[version] = zstandard.ZstdDecompressor(dict_data=self._get_dictionary(version))
+        return decompressors[version]
+
+    def compress(self, data: bytes) -> bytes:
+        return self._get_compressor(self.version).compress(data)  # type: ignore
+
+    def decompress(self, data: bytes) -> bytes:
+        version = struct.unpack(">I", data[:4])[0]
+        return self._get_decompressor(version).decompress(data[4:])
+
+    def encode(self, data: bytes) -> bytes:
+        # read the version once, a retrain may call set_dictionary while we compress
+        version = self.version
+        if version is None:
+            return self._codec_zstd.encode(data)
+        return bytes([self.codec_id]) + struct.pack(">I", version) + self._get_compressor(version).compress(data)
+
+    def decode(self, blob: bytes) -> bytes:
+        if blob[0] == self._codec_zstd.codec_id:
+            return self._codec_zstd.decode(blob)
+        return self.decompress(memoryview(blob)[1:])  # type: ignore
+
+    @staticmethod
+    def train(samples: List[bytes], dict_size: int = 64 * 1024) -> Optional[bytes]:
+        """Train a dictionary on sample values, returns None if there is too little data."""
+        import zstandard
+
+        try:
+            return zstandard.train_dictionary(dict_size, samples).as_bytes()
+        except zstandard.ZstdError as e:
+            logger.warning(f"Could not train compression dictionary on {len(samples)} samples: {e}")
+            return None
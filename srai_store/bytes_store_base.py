@@ -1,10 +1,15 @@
 from abc import abstractmethod
-from typing import Iterator, List, Optional, Sequence
+from typing import AsyncIterator, Iterator, List, Optional, Sequence
 
 from langchain_core.stores import BaseStore
 
+from srai_store.store_executor import aiterate_in_store_executor, run_in_store_executor
+
 
 class BytesStoreBase(BaseStore[str, bytes]):
+    # stores that take a ttl (seconds) in mset and expire values
+    supports_ttl: bool = False
+
     def __init__(self, collection_name: str) -> None:
         self.collection_name = collection_name
         pass
@@ -13,8 +18,13 @@ class BytesStoreBase(BaseStore[str, bytes]):
     def mset(self, key_value_pairs: Sequence[tuple[str, bytes]]) -> None:
         pass
 
-    def set(self, key: str, value: bytes) -> None:
-        self.mset([(key, value)])
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        if ttl is None:
+            self.mset([(key, value)])
+        elif self.supports_ttl:
+            self.mset([(key, value)], ttl=ttl)  # type: ignore
+        else:
+            raise NotImplementedError(f"{type(self).__name__} does not support ttl")
 
     @abstractmethod
     def mget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
@@ -26,10 +36,21 @@ class BytesStoreBase(BaseStore[str, bytes]):
             raise ValueError(f"Key {key} not found in store")
         return value
 
+    def count(self) -> int:
+        return sum(1 for _ in self.yield_keys())
+
     @abstractmethod
     def mdelete(self, keys: Sequence[str]) -> None:
         pass
 
+    def clear(self) -> None:
+        """Delete all values."""
+        self.mdelete(list(self.yield_keys()))
+
+    def purge_expired(self, batch_size: int = 1000) -> int:
+        """Delete expired values, returns the number deleted. Stores without ttl have nothing to purge."""
+        return 0
+
     @abstractmethod
     def yield_keys(self, *, prefix: Optional[str] = None) -> Iterator[str]:
         pass
@@ -37,3 +58,24 @@ class BytesStoreBase(BaseStore[str, bytes]):
     @abstractmethod
     async def asample(self, count: int) -> List[bytes]:
         pass
+
+    # async API, by default the blocking methods run on the store executor
+
+    async def amget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        return await run_in_store_executor(self.mget, keys)
+
+    async def amset(self, key_value_pairs: Sequence[tuple[str, bytes]], ttl: Optional[float] = None) -> None:
+        if ttl is None:
+            await run_in_store_executor(self.mset, key_value_pairs)
+        else:
+            await run_in_store_executor(self.mset, key_value_pairs, ttl=ttl)
+
+    async def amdelete(self, keys: Sequence[str]) -> None:
+        await run_in_store_executor(self.mdelete, keys)
+
+    async def ayield_keys(self, *, prefix: Optional[str] = None) -> AsyncIterator[str]:
+        async for key in aiterate_in_store_executor(lambda: self.yield_keys(prefix=prefix)):
+            yield key
+
+    async def acount(self) -> int:
+        return await run_in_store_executor(self.count)
@@ -0,0 +1,226 @@
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from srai_store.bytes_store_base import BytesStoreBase
+
+logger = logging.getLogger(__name__)
+
+
+class BytesStoreBounded(BytesStoreBase):
+    def __init__(
+        self,
+        store: BytesStoreBase,
+        path_file_index: Path,
+        max_bytes: int,
+        low_watermark: float = 0.9,
+        evict_batch_size: int = 100,
+        access_batch_size: int = 1000,
+        access_flush_interval: float = 5.0,
+    ) -> None:
+        """Bytes store with a byte budget, evicting the least recently used values of the wrapped store.
+
+        Size and last access time of every value are kept in a sidecar SQLite index. Access times are
+        collected in memory and written in one batch, so reads do not turn into writes. Because unflushed
+        accesses of other processes are not seen, eviction order is approximately LRU.
+
+        Args:
+            store: The wrapped store, e.g. a local BytesStoreSqlite or BytesStoreDisk used as a cache tier.
+            path_file_index: SQLite file of the size and access time index.
+            max_bytes: Byte budget, sizes are value lengths before compression.
+            low_watermark: Once over budget, evict until usage is below this fraction of max_bytes.
+            evict_batch_size: Number of values evicted per delete on the wrapped store.
+            access_batch_size: Flush access times after this many reads.
+            access_flush_interval: Flush access times when the oldest is this many seconds old.
+        """
+        super().__init__(store.collection_name)
+        self.store = store
+        self.path_file_index = path_file_index
+        self.max_bytes = max_bytes
+        self.low_watermark = low_watermark
+        self.evict_batch_size = evict_batch_size
+        self.access_batch_size = access_batch_size
+        self.access_flush_interval = access_flush_interval
+        self.count_evicted = 0
+        self._lock = threading.Lock()
+        self._accessed: Dict[str, float] = {}
+        self._time_first_access: Optional[float] = None
+        Path(self.path_file_index).absolute().parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+        self._bytes = self._sum_bytes()
+
+    def _init_db(self) -> None:
+        with self._get_connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entry (
+                    key TEXT PRIMARY KEY,
+                    size INTEGER,
+                    accessed_at REAL
+                )
+            """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entry_accessed_at ON entry (accessed_at)")
+            conn.commit()
+
+    @contextmanager
+    def _get_connection(self):
+        conn = sqlite3.connect(self.path_file_index)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _sum_bytes(self) -> int:
+        with self._get_connection() as conn:
+            return conn.execute("SELECT COALESCE(SUM(size), 0) FROM entry").fetchone()[0]
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        values = self.store.mget(keys)
+        now = time.time()
+        with self._lock:
+            for key, value in zip(keys, values):
+                if value is not None:
+                    self._accessed[key] = now
+            if self._accessed and self._time_first_access is None:
+                self._time_first_access = now
+            flush = len(self._accessed) >= self.access_batch_size or (
+                self._time_first_access is not None and now - self._time_first_access >= self.access_flush_interval
+            )
+        if flush:
+            self.flush_access()
+        return values
+
+    def flush_access(self) -> None:
+        """Write the collected access times to the index."""
+        with self._lock:
+            accessed = self._accessed
+            self._accessed = {}
+            self._time_first_access = None
+        if not accessed:
+            return
+        with self._get_connection() as conn:
+            conn.executemany("UPDATE entry SET accessed_at=? WHERE key=?", [(accessed_at, key) for key, accessed_at in accessed.items()])
+            conn.commit()
+
+    def mset(self, key_value_pairs: Sequence[Tuple[str, bytes]]) -> None:
+        if not key_value_pairs:
+            return
+        self.store.mset(key_value_pairs)
+        now = time.time()
+        sizes = {key: len(value) for key, value in key_value_pairs}
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            placeholders = ",".join("?" * len(sizes))
+            size_replaced = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM entry WHERE key IN ({placeholders})", list(sizes)).fetchone()[
+                0
+            ]
+            conn.executemany(
+                "REPLACE INTO entry (key, size, accessed_at) VALUES (?, ?, ?)", [(key, size, now) for key, size in sizes.items()]
+            )
+            conn.commit()
+        with self._lock:
+            self._bytes += sum(sizes.values()) - size_replaced
+            over_budget = self._bytes > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    def evict(self) -> int:
+        """Evict least recently used values until usage is below the low watermark, returns the number evicted."""
+        self.flush_access()
+        target = int(self.max_bytes * self.low_watermark)
+        count_evicted = 0
+        # other processes may share the index, start from the actual usage
+        usage = self._sum_bytes()
+        while usage > target:
+            with self._get_connection() as conn:
+                rows = conn.execute("SELECT key, size FROM entry ORDER BY accessed_at LIMIT ?", (self.evict_batch_size,)).fetchall()
+            if not rows:
+                break
+            keys = [key for key, _ in rows]
+            self.store.mdelete(keys)
+            self._delete_entries(keys)
+            usage -= sum(size for _, size in rows)
+            count_evicted += len(keys)
+        with self._lock:
+            self._bytes = usage
+            self.count_evicted += count_evicted
+        if count_evicted:
+            logger.info(f"Evicted {count_evicted} values from {self.collection_name}, {usage} of {self.max_bytes} bytes used")
+        return count_evicted
+
+    def _delete_entries(self, keys: Sequence[str]) -> int:
+        """Delete the index rows of the keys, returns the number of bytes they held."""
+        placeholders = ",".join("?" * len(keys))
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            size_deleted = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM entry WHERE key IN ({placeholders})", list(keys)).fetchone()[0]
+            conn.execute(f"DELETE FROM entry WHERE key IN ({placeholders})", list(keys))
+            conn.commit()
+        return size_deleted
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        if not keys:
+            return
+        self.store.mdelete(keys)
+        size_deleted = self._delete_entries(keys)
+        with self._lock:
+            for key in keys:
+                self._accessed.pop(key, None)
+            self._bytes -= size_deleted
+
+    def usage(self) -> Dict[str, int]:
+        """Current number of entries and bytes, the budget and the number of evictions."""
+        with self._get_connection() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entry").fetchone()
+        return {"entries": entries, "bytes": size, "max_bytes": self.max_bytes, "evictions": self.count_evicted}
+
+    def rebuild_index(self, batch_size: int = 1000) -> int:
+        """(Re)build the index from the values in the wrapped store, returns the number indexed."""
+        with self._get_connection() as conn:
+            conn.execute("DELETE FROM entry")
+            conn.commit()
+        count_indexed = 0
+        keys: List[str] = []
+        for key in self.store.yield_keys():
+            keys.append(key)
+            if len(keys) >= batch_size:
+                count_indexed += self._index_batch(keys)
+                keys = []
+        if keys:
+            count_indexed += self._index_batch(keys)
+        with self._lock:
+            self._bytes = self._sum_bytes()
+        logger.info(f"Indexed {count_indexed} values in {self.collection_name}")
+        return count_indexed
+
+    def _index_batch(self, keys: List[str]) -> int:
+        now = time.time()
+        rows = [(key, len(value), now) for key, value in zip(keys, self.store.mget(keys)) if value is not None]
+        with self._get_connection() as conn:
+            conn.executemany("REPLACE INTO entry (key, size, accessed_at) VALUES (?, ?, ?)", rows)
+            conn.commit()
+        return len(rows)
+
+    def yield_keys(self, *, prefix: Optional[str] = None) -> Iterator[str]:
+        return self.store.yield_keys(prefix=prefix)
+
+    def count(self) -> int:
+        return self.store.count()
+
+    def clear(self) -> None:
+        self.store.clear()
+        with self._get_connection() as conn:
+            conn.execute("DELETE FROM entry")
+            conn.commit()
+        with self._lock:
+            self._accessed = {}
+            self._time_first_access = None
+            self._bytes = 0
+
+    async def asample(self, count: int) -> List[bytes]:
+        return await self.store.asample(count)
@@ -0,0 +1,244 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from srai_store.bytes_store_base import BytesStoreBase
+from srai_store.store_executor import run_in_store_executor
+
+logger = logging.getLogger(__name__)
+
+
+class BytesStoreDedup(BytesStoreBase):
+    def __init__(
+        self,
+        store: BytesStoreBase,
+        path_file_index: Path,
+        blob_prefix: str = "blob_",
+        gc_grace_period: float = 3600,
+    ) -> None:
+        """Content-addressed bytes store, each unique value is stored once in the wrapped store.
+
+        A sidecar SQLite index maps keys to the sha256 of their value and counts references per hash.
+        Values are stored in the wrapped store under blob_prefix + hash, a value whose hash is already
+        stored is not uploaded again. Blobs that lose their last reference are deleted by gc.
+        All writers of the wrapped store must share the index.
+
+        Args:
+            store: The wrapped store holding the blobs, e.g. a BytesStoreS3 or BytesStoreDisk.
+            path_file_index: SQLite file of the key to hash index and the reference counts.
+            blob_prefix: Prefix of the blob keys in the wrapped store.
+            gc_grace_period: Seconds a blob stays unreferenced before gc deletes it, so writers that
+                just found the hash in the index do not lose it.
+        """
+        super().__init__(store.collection_name)
+        self.store = store
+        self.path_file_index = path_file_index
+        self.blob_prefix = blob_prefix
+        self.gc_grace_period = gc_grace_period
+        self.count_uploads_skipped = 0
+        self.bytes_uploads_skipped = 0
+        # serializes uploads and gc in this process
+        self._lock = threading.Lock()
+        Path(self.path_file_index).absolute().parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _init_db(self) -> None:
+        with self._get_connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS key_hash (
+                    key TEXT PRIMARY KEY,
+                    hash TEXT
+                )
+            """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS blob (
+                    hash TEXT PRIMARY KEY,
+                    size INTEGER,
+                    refcount INTEGER,
+                    unreferenced_at REAL
+                )
+            """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS key_hash_hash ON key_hash (hash)")
+            conn.execute("CREATE INDEX IF NOT EXISTS blob_unreferenced_at ON blob (unreferenced_at) WHERE refcount = 0")
+            conn.commit()
+
+    @contextmanager
+    def _get_connection(self):
+        # gc holds the write lock while it deletes blobs from the wrapped store
+        conn = sqlite3.connect(self.path_file_index, timeout=60)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _blob_key(self, hash: str) -> str:
+        return self.blob_prefix + hash
+
+    def _get_hashes(self, keys: Sequence[str]) -> Dict[str, str]:
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        with self._get_connection() as conn:
+            rows = conn.execute(f"SELECT key, hash FROM key_hash WHERE key IN ({placeholders})", list(keys)).fetchall()
+        return dict(rows)
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        key_to_hash = self._get_hashes(keys)
+        hashes = list(set(key_to_hash.values()))
+        hash_to_value = dict(zip(hashes, self.store.mget([self._blob_key(hash) for hash in hashes])))
+        return [hash_to_value.get(key_to_hash[key]) if key in key_to_hash else None for key in keys]
+
+    def mset(self, key_value_pairs: Sequence[Tuple[str, bytes]]) -> None:
+        if not key_value_pairs:
+            return
+        key_to_hash: Dict[str, str] = {}
+        hash_to_value: Dict[str, bytes] = {}
+        for key, value in key_value_pairs:
+            hash = hashlib.sha256(value).hexdigest()
+            key_to_hash[key] = hash
+            hash_to_value[hash] = value
+        with self._lock:
+            placeholders = ",".join("?" * len(hash_to_value))
+            with self._get_connection() as conn:
+                known = {row[0] for row in conn.execute(f"SELECT hash FROM blob WHERE hash IN ({placeholders})", list(hash_to_value))}
+            # upload before referencing, so the index never points at a missing blob
+            self._upload({hash: value for hash, value in hash_to_value.items() if hash not in known})
+            skipped = [hash for hash in hash_to_value if hash in known]
+            self.count_uploads_skipped += len(skipped)
+            self.bytes_uploads_skipped += sum(len(hash_to_value[hash]) for hash in skipped)
+            missing = self._reference(key_to_hash, hash_to_value)
+            # blobs collected by another process between the check and the reference
+            self._upload({hash: hash_to_value[hash] for hash in missing if hash in known})
+
+    def _upload(self, hash_to_value: Dict[str, bytes]) -> None:
+        if hash_to_value:
+            self.store.mset([(self._blob_key(hash), value) for hash, value in hash_to_value.items()])
+
+    def _reference(self, key_to_hash: Dict[str, str], hash_to_value: Dict[str, bytes]) -> List[str]:
+        """Point the keys at their hashes and update the reference counts, returns hashes that were not indexed."""
+        now = time.time()
+        missing: List[str] = []
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for key, hash in key_to_hash.items():
+                row = conn.execute("SELECT hash FROM key_hash WHERE key=?", (key,)).fetchone()
+                if row and row[0] == hash:
+                    continue
+                if row:
+                    self._release(conn, row[0], now)
+                conn.execute("REPLACE INTO key_hash (key, hash) VALUES (?, ?)", (key, hash))
+                cursor = conn.execute("UPDATE blob SET refcount=refcount+1, unreferenced_at=NULL WHERE hash=?", (hash,))
+                if cursor.rowcount == 0:
+                    conn.execute(
+                        "INSERT INTO blob (hash, size, refcount, unreferenced_at) VALUES (?, ?, 1, NULL)",
+                        (hash, len(hash_to_value[hash])),
+                    )
+                    missing.append(hash)
+            conn.commit()
+        return missing
+
+    @staticmethod
+    def _release(conn: sqlite3.Connection, hash: str, now: float) -> None:
+        conn.execute(
+            "UPDATE blob SET refcount=refcount-1, unreferenced_at=CASE WHEN refcount=1 THEN ? ELSE NULL END WHERE hash=?",
+            (now, hash),
+        )
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        """Delete the keys, their blobs are deleted by gc once unreferenced."""
+        if not keys:
+            return
+        now = time.time()
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for key in keys:
+                row = conn.execute("SELECT hash FROM key_hash WHERE key=?", (key,)).fetchone()
+                if row:
+                    self._release(conn, row[0], now)
+                    conn.execute("DELETE FROM key_hash WHERE key=?", (key,))
+            conn.commit()
+
+    def gc(self, batch_size: int = 1000) -> int:
+        """Delete blobs that have been unreferenced for longer than the grace period, returns the number deleted."""
+        count_deleted = 0
+        with self._lock:
+            while True:
+                with self._get_connection() as conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    rows = conn.execute(
+                        "SELECT hash FROM blob WHERE refcount = 0 AND unreferenced_at <= ? LIMIT ?",
+                        (time.time() - self.gc_grace_period, batch_size),
+                    ).fetchall()
+                    hashes = [row[0] for row in rows]
+                    if hashes:
+                        # delete the blobs before the index rows, under the write lock: a writer that still finds
+                        # the hash in the index can only reference it after this commit, then it sees the row is
+                        # gone and uploads the blob again
+                        self.store.mdelete([self._blob_key(hash) for hash in hashes])
+                        placeholders = ",".join("?" * len(hashes))
+                        conn.execute(f"DELETE FROM blob WHERE hash IN ({placeholders})", hashes)
+                    conn.commit()
+                count_deleted += len(hashes)
+                if len(hashes) < batch_size:
+                    break
+        if count_deleted:
+            logger.info(f"Deleted {count_deleted} unreferenced blobs from {self.collection_name}")
+        return count_deleted
+
+    def stats(self) -> Dict[str, int]:
+        """Number of keys and unique blobs, logical and stored bytes and the uploads skipped."""
+        with self._get_connection() as conn:
+            count_keys, bytes_logical = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(blob.size), 0) FROM key_hash JOIN blob ON key_hash.hash = blob.hash"
+            ).fetchone()
+            count_blobs, bytes_stored = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blob").fetchone()
+        return {
+            "keys": count_keys,
+            "blobs": count_blobs,
+            "bytes_logical": bytes_logical,
+            "bytes_stored": bytes_stored,
+            "uploads_skipped": self.count_uploads_skipped,
+            "bytes_uploads_skipped": self.bytes_uploads_skipped,
+        }
+
+    def yield_keys(self, *, prefix: Optional[str] = None) -> Iterator[str]:
+        with self._get_connection() as conn:
+            if prefix:
+                rows = conn.execute("SELECT key FROM key_hash WHERE key LIKE ?", (f"{prefix}%",)).fetchall()
+            else:
+                rows = conn.execute("SELECT key FROM key_hash").fetchall()
+        for row in rows:
+            yield row[0]
+
+    def count(self) -> int:
+        with self._get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM key_hash").fetchone()[0]
+
+    def clear(self) -> None:
+        """Delete all keys and all blobs, including those still in the grace period."""
+        with self._lock:
+            with self._get_connection() as conn:
+                hashes = [row[0] for row in conn.execute("SELECT hash FROM blob").fetchall()]
+                conn.execute("DELETE FROM key_hash")
+                conn.execute("DELETE FROM blob")
+                conn.commit()
+            self.store.mdelete([self._blob_key(hash) for hash in hashes])
+
+    async def asample(self, count: int) -> List[bytes]:
+        return await run_in_store_executor(self._sample, count)
+
+    def _sample(self, count: int) -> List[bytes]:
+        with self._get_connection() as conn:
+            hashes = [row[0] for row in conn.execute("SELECT hash FROM key_hash ORDER BY RANDOM() LIMIT ?", (count,)).fetchall()]
+        unique = list(set(hashes))
+        hash_to_value = dict(zip(unique, self.store.mget([self._blob_key(hash) for hash in unique])))
+        return [hash_to_value[hash] for hash in hashes if hash_to_value[hash] is not None]
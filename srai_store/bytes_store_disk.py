@@ -4,6 +4,7 @@ from pathlib import Path
 from typing import Iterator, List, Optional, Sequence, Union
 
 from srai_store.bytes_store_base import BytesStoreBase
+from srai_store.store_executor import run_in_store_executor
 
 
 class BytesStoreDisk(BytesStoreBase):
@@ -57,5 +58,8 @@ class BytesStoreDisk(BytesStoreBase):
                 yield id
 
     async def asample(self, count: int) -> List[bytes]:
+        return await run_in_store_executor(self._sample, count)
+
+    def _sample(self, count: int) -> List[bytes]:
         list_ids = os.listdir(self.path_dir_store)
         return [self.get_raise(id) for id in random.sample(list_ids, count)]
@@ -1,26 +1,27 @@
 import re
-import zlib
 from typing import Iterator, List, Optional, Sequence, Tuple
 
 from sqlalchemy.engine.base import Engine
 
+from srai_store.bytes_codec_registry import decode_bytes, get_bytes_codec
 from srai_store.bytes_store_base import BytesStoreBase
 from srai_store.exceptions import KeyValidationError
 
 
 class BytesStorePostgres(BytesStoreBase):
-    def __init__(self, collection_name: str, postgres_engine: Engine, object_store_name: str) -> None:
+    def __init__(self, collection_name: str, postgres_engine: Engine, object_store_name: str, codec: str = "zlib") -> None:
         super().__init__(collection_name)
+        self._codec = get_bytes_codec(codec)
         self._postgres_engine = postgres_engine
         self._object_store_name = object_store_name
 
     def _compress(self, data: bytes) -> bytes:
-        """Compress data using zlib."""
-        return zlib.compress(data)
+        """Compress data with the codec of this collection."""
+        return self._codec.encode(data)
 
     def _decompress(self, data: bytes) -> bytes:
-        """Decompress data using zlib."""
-        return zlib.decompress(data)
+        """Decompress data written with any registered codec."""
+        return decode_bytes(data, self._codec)
 
     def _validate_key(self, key: str) -> None:
         """Validate the key to ensure it has valid characters."""
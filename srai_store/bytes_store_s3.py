@@ -1,12 +1,24 @@
+import asyncio
 import logging
+import queue
+import random
+import string
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Iterator, List, Optional, Sequence, Tuple, Union
 
 from botocore.exceptions import ClientError
 
 from srai_store.bytes_store_base import BytesStoreBase
+from srai_store.store_executor import run_in_store_executor
 
 logger = logging.getLogger(__name__)
 
+# characters used to split the keyspace into ranges for parallel listing, in S3 (utf-8 byte) order
+LIST_SPLIT_CHARS = "".join(sorted(string.digits + string.ascii_letters + "-_."))
+# pages of up to 1000 keys a key range listing may buffer ahead of the consumer of yield_keys
+LIST_MAX_PENDING_PAGES = 2
+
 
 class BytesStoreS3(BytesStoreBase):
     """S3-based byte store for caching binary data."""
@@ -16,6 +28,8 @@ class BytesStoreS3(BytesStoreBase):
         collection_name: str,
         client,
         bucket_name: str,
+        list_max_workers: int = 8,
+        list_split_chars: str = LIST_SPLIT_CHARS,
     ) -> None:
         super().__init__(collection_name)
         """
@@ -25,9 +39,13 @@ class BytesStoreS3(BytesStoreBase):
             client: boto3 S3 client
             bucket_name: Name of the S3 bucket
             collection_name: Collection name (used as prefix/folder)
+            list_max_workers: Number of key ranges listed concurrently by yield_keys and count (1 = serial)
+            list_split_chars: Characters used to split the keyspace into ranges for parallel listing
         """
         self.s3_client = client
         self.bucket_name = bucket_name
+        self.list_max_workers = list_max_workers
+        self.list_split_chars = "".join(sorted(set(list_split_chars)))
         self.prefix = collection_name.rstrip("/") + "/" if collection_name else ""
 
     def _get_key(self, id: str) -> str:
@@ -36,21 +54,20 @@ class BytesStoreS3(BytesStoreBase):
 
     def mget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
         """Get multiple objects from S3."""
-        results = []
-        for key in keys:
-            try:
-                s3_key = self._get_key(key)
-                response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
-                results.append(response["Body"].read())
-                logger.debug(f"Retrieved object from S3: {s3_key}")
-            except ClientError as e:
-                if e.response["Error"]["Code"] == "NoSuchKey":
-                    logger.debug(f"Object not found in S3: {s3_key}")
-                    results.append(None)
-                else:
-                    logger.error(f"Error retrieving object from S3: {e}")
-                    raise
-        return results
+        return [self._get_object(key) for key in keys]
+
+    def _get_object(self, key: str) -> Optional[bytes]:
+        s3_key = self._get_key(key)
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
+            logger.debug(f"Retrieved object from S3: {s3_key}")
+            return response["Body"].read()
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "NoSuchKey":
+                logger.debug(f"Object not found in S3: {s3_key}")
+                return None
+            logger.error(f"Error retrieving object from S3: {e}")
+            raise
 
     def mset(self, key_value_pairs: Sequence[Tuple[str, bytes]]) -> None:
         """Set multiple objects in S3."""
@@ -74,24 +91,172 @@ class BytesStoreS3(BytesStoreBase):
                 logger.error(f"Error deleting object from S3: {e}")
                 raise
 
-    def yield_keys(self, *, prefix: Optional[str] = None) -> Union[Iterator[str], Iterator[str]]:
-        """Yield all keys in the S3 bucket with the given prefix."""
+    def yield_keys(
+        self,
+        *,
+        prefix: Optional[str] = None,
+        start_after: Optional[str] = None,
+    ) -> Union[Iterator[str], Iterator[str]]:
+        """Yield all keys in the S3 bucket with the given prefix.
+
+        Keys are yielded in lexicographic order, so the last key seen is a valid checkpoint:
+        pass it as start_after to resume an interrupted scan. When list_max_workers > 1 and the
+        listing does not fit in a single page, the remaining keyspace is split into ranges that
+        are listed concurrently.
+        """
         try:
             search_prefix = self._get_key(prefix) if prefix else self.prefix
-            paginator = self.s3_client.get_paginator("list_objects_v2")
-            pages = paginator.paginate(Bucket=self.bucket_name, Prefix=search_prefix)
-
-            for page in pages:
-                if "Contents" in page:
-                    for obj in page["Contents"]:
-                        key = obj["Key"]
-                        # Remove the prefix to get the ID
-                        if key.startswith(self.prefix):
-                            id = key[len(self.prefix) :]
-                            yield id
+            s3_start_after = self._get_key(start_after) if start_after else None
+            for s3_key in self._yield_s3_keys(search_prefix, s3_start_after):
+                # Remove the prefix to get the ID
+                if s3_key.startswith(self.prefix):
+                    yield s3_key[len(self.prefix) :]
         except ClientError as e:
             logger.error(f"Error yielding objects in S3: {e}")
             raise
 
+    def count(self, *, prefix: Optional[str] = None) -> int:
+        """Count the keys with the given prefix, listing key ranges concurrently."""
+        search_prefix = self._get_key(prefix) if prefix else self.prefix
+        first_page, is_truncated = self._list_first_page(search_prefix, None)
+        if not is_truncated:
+            return len(first_page)
+        key_ranges = self._split_key_ranges(search_prefix, first_page[-1])
+        with ThreadPoolExecutor(max_workers=max(self.list_max_workers, 1)) as executor:
+            counts = executor.map(lambda key_range: sum(1 for _ in self._list_key_range(search_prefix, *key_range)), key_ranges)
+            return len(first_page) + sum(counts)
+
+    def _yield_s3_keys(self, search_prefix: str, start_after: Optional[str]) -> Iterator[str]:
+        """Yield the S3 keys with search_prefix after start_after in order.
+
+        Key ranges are listed by list_max_workers threads at once, each buffering at most
+        LIST_MAX_PENDING_PAGES pages ahead of the consumer. The threads stop when the generator is closed.
+        """
+        if self.list_max_workers <= 1:
+            yield from self._list_key_range(search_prefix, start_after, None)
+            return
+        # a single request settles small collections, only fan out when there is more than one page
+        first_page, is_truncated = self._list_first_page(search_prefix, start_after)
+        yield from first_page
+        if not is_truncated:
+            return
+        key_ranges = self._split_key_ranges(search_prefix, first_page[-1])
+        stop = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=self.list_max_workers)
+        try:
+            # keep at most list_max_workers ranges in flight and yield them in order
+            page_queues: List[queue.Queue] = []
+            for key_range in key_ranges:
+                page_queue: queue.Queue = queue.Queue(maxsize=LIST_MAX_PENDING_PAGES)
+                executor.submit(self._produce_key_range, page_queue, stop, search_prefix, key_range)
+                page_queues.append(page_queue)
+                if len(page_queues) >= self.list_max_workers:
+                    yield from self._consume_key_range(page_queues.pop(0))
+            for page_queue in page_queues:
+                yield from self._consume_key_range(page_queue)
+        finally:
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _produce_key_range(
+        self, page_queue: queue.Queue, stop: threading.Event, search_prefix: str, key_range: Tuple[str, Optional[str]]
+    ) -> None:
+        """Put the pages of a key range on page_queue, followed by None or the exception that ended the listing."""
+        try:
+            for page in self._list_key_range_pages(search_prefix, *key_range):
+                if not self._put_page(page_queue, stop, page):
+                    return
+        except Exception as e:
+            self._put_page(page_queue, stop, e)
+            return
+        self._put_page(page_queue, stop, None)
+
+    @staticmethod
+    def _put_page(page_queue: queue.Queue, stop: threading.Event, item: Union[List[str], Exception, None]) -> bool:
+        """Put item on page_queue once there is room, returns False when the listing was stopped first."""
+        while not stop.is_set():
+            try:
+                page_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    @staticmethod
+    def _consume_key_range(page_queue: queue.Queue) -> Iterator[str]:
+        while True:
+            page = page_queue.get()
+            if page is None:
+                return
+            if isinstance(page, Exception):
+                raise page
+            yield from page
+
+    def _list_first_page(self, search_prefix: str, start_after: Optional[str]) -> Tuple[List[str], bool]:
+        kwargs = {"Bucket": self.bucket_name, "Prefix": search_prefix}
+        if start_after:
+            kwargs["StartAfter"] = start_after
+        response = self.s3_client.list_objects_v2(**kwargs)
+        keys = [obj["Key"] for obj in response.get("Contents", [])]
+        return keys, bool(response.get("IsTruncated")) and len(keys) > 0
+
+    def _split_key_ranges(self, search_prefix: str, start_after: str) -> List[Tuple[str, Optional[str]]]:
+        """Split the keyspace after start_after into consecutive (start_after, last_key] ranges."""
+        boundaries = [search_prefix + char for char in self.list_split_chars if search_prefix + char > start_after]
+        lower_bounds = [start_after, *boundaries]
+        upper_bounds: List[Optional[str]] = [*boundaries, None]
+        return list(zip(lower_bounds, upper_bounds))
+
+    def _list_key_range(self, search_prefix: str, start_after: Optional[str], last_key: Optional[str]) -> Iterator[str]:
+        """Yield the S3 keys with search_prefix in the range (start_after, last_key]."""
+        for page in self._list_key_range_pages(search_prefix, start_after, last_key):
+            yield from page
+
+    def _list_key_range_pages(self, search_prefix: str, start_after: Optional[str], last_key: Optional[str]) -> Iterator[List[str]]:
+        """Yield the S3 keys with search_prefix in the range (start_after, last_key] page by page."""
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        kwargs = {"Bucket": self.bucket_name, "Prefix": search_prefix}
+        if start_after:
+            kwargs["StartAfter"] = start_after
+        for page in paginator.paginate(**kwargs):
+            keys = [obj["Key"] for obj in page.get("Contents", [])]
+            if last_key is not None and keys and keys[-1] > last_key:
+                yield [key for key in keys if key <= last_key]
+                return
+            yield keys
+
     async def asample(self, count: int) -> List[bytes]:
-        raise NotImplementedError("Not implemented")
+        """Sample count objects uniformly at random.
+
+        Keys are drawn with reservoir sampling over the (parallel) key listing, so only the
+        sampled objects are downloaded. Listing and downloads run in worker threads and the
+        downloads are issued concurrently. Returns fewer objects if the collection is smaller.
+        """
+        keys = await run_in_store_executor(self._sample_keys, count)
+        values = await self.amget(keys)
+        # keys deleted between listing and download are skipped
+        return [value for value in values if value is not None]
+
+    async def amget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        """Get multiple objects, downloading up to list_max_workers of them concurrently on the store executor."""
+        semaphore = asyncio.Semaphore(max(self.list_max_workers, 1))
+
+        async def get_object(key: str) -> Optional[bytes]:
+            async with semaphore:
+                return await run_in_store_executor(self._get_object, key)
+
+        return list(await asyncio.gather(*(get_object(key) for key in keys)))
+
+    def _sample_keys(self, count: int) -> List[str]:
+        """Reservoir sample (algorithm R) of count keys from a single pass over the listing."""
+        reservoir: List[str] = []
+        if count <= 0:
+            return reservoir
+        for index, key in enumerate(self.yield_keys()):
+            if index < count:
+                reservoir.append(key)
+            else:
+                slot = random.randint(0, index)
+                if slot < count:
+                    reservoir[slot] = key
+        return reservoir
@@ -1,23 +1,72 @@
+import io
+import logging
+import random
 import re
 import sqlite3
-import zlib
+import threading
+import time
+import uuid
+from concurrent.futures import Future
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
 
+from srai_store.bytes_chunk_stream import DEFAULT_CHUNK_SIZE, BytesChunkReader, BytesChunkWriter
+from srai_store.bytes_codec_registry import decode_bytes, get_bytes_codec
+from srai_store.bytes_codec_zstd_dict import BytesCodecZstdDict
 from srai_store.bytes_store_base import BytesStoreBase
+from srai_store.store_executor import get_store_executor, run_in_store_executor
+from srai_store.store_sampling import sample_rowids
+
+logger = logging.getLogger(__name__)
 
 
 class BytesStoreSqlite(BytesStoreBase):
-    def __init__(self, collection_name: str, path_file_database: Path) -> None:
+    supports_ttl = True
+
+    # condition on rows that have not expired, takes the current time as parameter
+    _LIVE = "(expires_at IS NULL OR expires_at > ?)"
+    # chunks of unfinished open_write streams are stored under this prefix, which is not a valid key
+    _UPLOAD_PREFIX = "~upload/"
+    # seconds after which purge_expired deletes the chunks of an unfinished upload, e.g. of a crashed writer
+    _UPLOAD_MAX_AGE = 24 * 3600
+
+    def __init__(
+        self,
+        collection_name: str,
+        path_file_database: Path,
+        codec: str = "zlib",
+        dictionary_retrain_interval: int = 0,
+        chunk_size: int = 0,
+    ) -> None:
+        """
+        Args:
+            codec: Compression codec name, "zstd_dict" compresses with a dictionary trained on the collection.
+            dictionary_retrain_interval: With "zstd_dict", retrain the dictionary after this many writes (0 = never),
+                in the background on the store executor.
+            chunk_size: mset stores values larger than this as separately compressed chunks of this size,
+                so open_read and read_range only load the chunks they need (0 = only values written with open_write).
+        """
         super().__init__(collection_name)
         self.path_file_database = path_file_database
+        self.chunk_size = chunk_size
         # Ensure parent directory exists
         abs_path = self.path_file_database.absolute()
         parent_dir = abs_path.parent
         if parent_dir:
             parent_dir.mkdir(parents=True, exist_ok=True)
         self._init_db()
+        if dictionary_retrain_interval and codec != BytesCodecZstdDict.name:
+            raise ValueError("dictionary_retrain_interval requires the zstd_dict codec")
+        self.dictionary_retrain_interval = dictionary_retrain_interval
+        self._count_writes_since_training = 0
+        self._retrain_future: Optional[Future] = None
+        self._retrain_lock = threading.Lock()
+        if codec == BytesCodecZstdDict.name:
+            self._codec = BytesCodecZstdDict(self._load_dictionary)
+            self._load_current_dictionary()
+        else:
+            self._codec = get_bytes_codec(codec)
 
     def _init_db(self) -> None:
         """Initialize the SQLite database."""
@@ -30,6 +79,32 @@ class BytesStoreSqlite(BytesStoreBase):
                 )
             """
             )
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(store)").fetchall()]
+            if "expires_at" not in columns:
+                conn.execute("ALTER TABLE store ADD COLUMN expires_at REAL")
+            conn.execute("CREATE INDEX IF NOT EXISTS store_expires_at ON store (expires_at) WHERE expires_at IS NOT NULL")
+            # chunked values have a NULL value and their size and chunk size in the store row
+            if "chunk_size" not in columns:
+                conn.execute("ALTER TABLE store ADD COLUMN size INTEGER")
+                conn.execute("ALTER TABLE store ADD COLUMN chunk_size INTEGER")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chunks (
+                    key TEXT,
+                    chunk_no INTEGER,
+                    value BLOB,
+                    PRIMARY KEY (key, chunk_no)
+                )
+            """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS metadata (
+                    key TEXT PRIMARY KEY,
+                    value BLOB
+                )
+            """
+            )
             conn.commit()
 
     @contextmanager
@@ -42,12 +117,78 @@ class BytesStoreSqlite(BytesStoreBase):
             conn.close()
 
     def _compress(self, data: bytes) -> bytes:
-        """Compress data using zlib."""
-        return zlib.compress(data)
+        """Compress data with the codec of this collection."""
+        return self._codec.encode(data)
 
     def _decompress(self, data: bytes) -> bytes:
-        """Decompress data using zlib."""
-        return zlib.decompress(data)
+        """Decompress data written with any registered codec."""
+        return decode_bytes(data, self._codec)
+
+    def _get_metadata(self, key: str) -> Optional[bytes]:
+        with self._get_connection() as conn:
+            row = conn.execute("SELECT value FROM metadata WHERE key=?", (key,)).fetchone()
+            return row[0] if row else None
+
+    def _load_dictionary(self, version: int) -> Optional[bytes]:
+        return self._get_metadata(f"zstd_dict/{version}")
+
+    def _load_current_dictionary(self) -> None:
+        version = self._get_metadata("zstd_dict_version")
+        if version is not None:
+            self._codec.set_dictionary(int(version), self._load_dictionary(int(version)))  # type: ignore
+
+    def _save_dictionary(self, dictionary: bytes) -> int:
+        """Store a dictionary under the next version id and make it current."""
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT value FROM metadata WHERE key='zstd_dict_version'").fetchone()
+            version = int(row[0]) + 1 if row else 1
+            conn.execute("REPLACE INTO metadata (key, value) VALUES (?, ?)", (f"zstd_dict/{version}", dictionary))
+            conn.execute("REPLACE INTO metadata (key, value) VALUES ('zstd_dict_version', ?)", (str(version).encode(),))
+            conn.commit()
+        return version
+
+    def _train_dictionary(self, samples: List[bytes], dict_size: int) -> Optional[int]:
+        if not isinstance(self._codec, BytesCodecZstdDict):
+            raise ValueError("Dictionary training requires the zstd_dict codec")
+        self._count_writes_since_training = 0
+        dictionary = BytesCodecZstdDict.train(samples, dict_size)
+        if dictionary is None:
+            return None
+        version = self._save_dictionary(dictionary)
+        self._codec.set_dictionary(version, dictionary)
+        logger.info(f"Trained compression dictionary version {version} for {self.collection_name} on {len(samples)} samples")
+        return version
+
+    def train_dictionary(self, sample_count: int = 1000, dict_size: int = 64 * 1024) -> Optional[int]:
+        """Train a new compression dictionary on a sample of the collection.
+
+        Args:
+            sample_count (int): The number of values to train on.
+            dict_size (int): The maximum dictionary size in bytes.
+
+        Returns:
+            Optional[int]: The new dictionary version, None if there was too little data to train on.
+        """
+        return self._train_dictionary(self._sample(sample_count), dict_size)
+
+    async def atrain_dictionary(self, sample_count: int = 1000, dict_size: int = 64 * 1024) -> Optional[int]:
+        """Async version of train_dictionary, sampling through asample."""
+        return await run_in_store_executor(self._train_dictionary, await self.asample(sample_count), dict_size)
+
+    def _schedule_retrain(self) -> None:
+        # the write that crosses the retrain interval does not wait for the training
+        with self._retrain_lock:
+            if self._retrain_future is not None and not self._retrain_future.done():
+                return
+            self._count_writes_since_training = 0
+            self._retrain_future = get_store_executor().submit(self._retrain)
+
+    def _retrain(self) -> None:
+        try:
+            self.train_dictionary()
+        except Exception as e:
+            logger.error(f"Retraining the compression dictionary of {self.collection_name} failed: {e!r}")
 
     def _validate_key(self, key: str) -> None:
         """Validate the key to ensure it has valid characters."""
@@ -65,37 +206,151 @@ class BytesStoreSqlite(BytesStoreBase):
             If a key is not found, the corresponding value will be None.
         """
         values: List[Optional[bytes]] = []
+        now = time.time()
         with self._get_connection() as conn:
             cursor = conn.cursor()
             for key in keys:
                 self._validate_key(key)
-                cursor.execute("SELECT value FROM store WHERE key=?", (key,))
+                cursor.execute(f"SELECT value, chunk_size FROM store WHERE key=? AND {self._LIVE}", (key, now))
                 row = cursor.fetchone()
                 if row:
-                    values.append(self._decompress(row[0]))
+                    values.append(self._read_value(conn, key, row[0], row[1]))
                 else:
                     values.append(None)
         return values
 
-    def mset(self, key_value_pairs: Sequence[Tuple[str, bytes]]) -> None:
+    def _read_value(self, conn: sqlite3.Connection, key: str, value: Optional[bytes], chunk_size: Optional[int]) -> bytes:
+        if chunk_size is None:
+            return self._decompress(value)  # type: ignore
+        rows = conn.execute("SELECT value FROM chunks WHERE key=? ORDER BY chunk_no", (key,)).fetchall()
+        return b"".join(self._decompress(row[0]) for row in rows)
+
+    def _read_chunks(self, key: str, chunk_no_first: int, chunk_no_last: int) -> List[bytes]:
+        with self._get_connection() as conn:
+            rows = conn.execute(
+                "SELECT value FROM chunks WHERE key=? AND chunk_no BETWEEN ? AND ? ORDER BY chunk_no",
+                (key, chunk_no_first, chunk_no_last),
+            ).fetchall()
+        return [self._decompress(row[0]) for row in rows]
+
+    def _get_layout(self, key: str) -> Optional[Tuple[Optional[bytes], Optional[int], Optional[int]]]:
+        """Value (None when chunked), size and chunk size of a live key, None if it does not exist."""
+        self._validate_key(key)
+        with self._get_connection() as conn:
+            row = conn.execute(f"SELECT value, size, chunk_size FROM store WHERE key=? AND {self._LIVE}", (key, time.time())).fetchone()
+        return row
+
+    def open_read(self, key: str) -> Optional[BinaryIO]:
+        """Open a seekable read stream on a value, None if the key does not exist.
+
+        Chunked values are loaded one chunk at a time. Chunks are read lazily, so a concurrent
+        overwrite of the key while the stream is open is not isolated from the reader.
+        """
+        layout = self._get_layout(key)
+        if layout is None:
+            return None
+        value, size, chunk_size = layout
+        if chunk_size is None:
+            return io.BytesIO(self._decompress(value))  # type: ignore
+        return BytesChunkReader(size, chunk_size, lambda chunk_no: self._read_chunks(key, chunk_no, chunk_no)[0])  # type: ignore
+
+    def read_range(self, key: str, start: int, end: Optional[int] = None) -> Optional[bytes]:
+        """Read bytes start up to end (exclusive, None = to the end) of a value, loading only the chunks in range."""
+        layout = self._get_layout(key)
+        if layout is None:
+            return None
+        value, size, chunk_size = layout
+        if chunk_size is None:
+            return self._decompress(value)[start:end]  # type: ignore
+        end = size if end is None else min(end, size)  # type: ignore
+        if start >= end:
+            return b""
+        chunk_no_first = start // chunk_size
+        data = b"".join(self._read_chunks(key, chunk_no_first, (end - 1) // chunk_size))
+        offset = chunk_no_first * chunk_size
+        return data[start - offset : end - offset]
+
+    def open_write(self, key: str, ttl: Optional[float] = None) -> BytesChunkWriter:
+        """Open a write stream that stores the value in chunks of chunk_size, holding one chunk in memory.
+
+        Chunks are written under a temporary key as they fill up, closing the stream replaces the value
+        of the key in one transaction. Use it as a context manager, an exception discards the value.
+        """
+        self._validate_key(key)
+        # the start time in the upload key lets purge_expired find uploads that were never finished
+        key_upload = f"{self._UPLOAD_PREFIX}{int(time.time())}-{uuid.uuid4().hex}/{key}"
+        chunk_size = self.chunk_size or DEFAULT_CHUNK_SIZE
+
+        def write_chunk(chunk_no: int, data: bytes) -> None:
+            with self._get_connection() as conn:
+                conn.execute("INSERT INTO chunks (key, chunk_no, value) VALUES (?, ?, ?)", (key_upload, chunk_no, self._compress(data)))
+                conn.commit()
+
+        def finish(size: int, count_chunks: int) -> None:
+            expires_at = None if ttl is None else time.time() + ttl
+            with self._get_connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                count_stored = conn.execute("SELECT COUNT(*) FROM chunks WHERE key=?", (key_upload,)).fetchone()[0]
+                if count_stored != count_chunks:
+                    raise OSError(f"Upload of {key} has {count_stored} of {count_chunks} chunks, it was purged as stale")
+                conn.execute("DELETE FROM chunks WHERE key=?", (key,))
+                conn.execute("UPDATE chunks SET key=? WHERE key=?", (key, key_upload))
+                conn.execute(
+                    "REPLACE INTO store (key, value, expires_at, size, chunk_size) VALUES (?, NULL, ?, ?, ?)",
+                    (key, expires_at, size, chunk_size),
+                )
+                conn.commit()
+
+        def abort() -> None:
+            with self._get_connection() as conn:
+                conn.execute("DELETE FROM chunks WHERE key=?", (key_upload,))
+                conn.commit()
+
+        return BytesChunkWriter(chunk_size, write_chunk, finish, abort)
+
+    def mset(self, key_value_pairs: Sequence[Tuple[str, bytes]], ttl: Optional[float] = None) -> None:
         """Set the values for the given keys.
 
         Args:
             key_value_pairs: A sequence of key-value pairs.
+            ttl: Optional time to live in seconds, expired values read as missing until purged.
 
         Returns:
             None
         """
+        expires_at = None if ttl is None else time.time() + ttl
         with self._get_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            # only chunked values (or unfinished uploads) have chunks, skip the per key delete without any
+            has_chunks = cursor.execute("SELECT 1 FROM chunks LIMIT 1").fetchone() is not None
             for key, value in key_value_pairs:
                 self._validate_key(key)
+                if has_chunks:
+                    cursor.execute("DELETE FROM chunks WHERE key=?", (key,))
+                if self.chunk_size and len(value) > self.chunk_size:
+                    has_chunks = True
+                    cursor.executemany(
+                        "INSERT INTO chunks (key, chunk_no, value) VALUES (?, ?, ?)",
+                        [
+                            (key, chunk_no, self._compress(value[start : start + self.chunk_size]))
+                            for chunk_no, start in enumerate(range(0, len(value), self.chunk_size))
+                        ],
+                    )
+                    cursor.execute(
+                        "REPLACE INTO store (key, value, expires_at, size, chunk_size) VALUES (?, NULL, ?, ?, ?)",
+                        (key, expires_at, len(value), self.chunk_size),
+                    )
+                    continue
                 compressed_value = self._compress(value)
                 cursor.execute(
-                    "REPLACE INTO store (key, value) VALUES (?, ?)",
-                    (key, compressed_value),
+                    "REPLACE INTO store (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, compressed_value, expires_at),
                 )
             conn.commit()
+        self._count_writes_since_training += len(key_value_pairs)
+        if self.dictionary_retrain_interval and self._count_writes_since_training >= self.dictionary_retrain_interval:
+            self._schedule_retrain()
 
     def mdelete(self, keys: Sequence[str]) -> None:
         """Delete the given keys and their associated values.
@@ -111,6 +366,7 @@ class BytesStoreSqlite(BytesStoreBase):
             for key in keys:
                 self._validate_key(key)
                 cursor.execute("DELETE FROM store WHERE key=?", (key,))
+                cursor.execute("DELETE FROM chunks WHERE key=?", (key,))
             conn.commit()
 
     def yield_keys(self, prefix: Optional[str] = None) -> Iterator[str]:
@@ -126,9 +382,9 @@ class BytesStoreSqlite(BytesStoreBase):
             cursor = conn.cursor()
             if prefix:
                 self._validate_key(prefix)
-                cursor.execute("SELECT key FROM store WHERE key LIKE ?", (f"{prefix}%",))
+                cursor.execute(f"SELECT key FROM store WHERE key LIKE ? AND {self._LIVE}", (f"{prefix}%", time.time()))
             else:
-                cursor.execute("SELECT key FROM store")
+                cursor.execute(f"SELECT key FROM store WHERE {self._LIVE}", (time.time(),))
             for row in cursor:
                 yield row[0]
 
@@ -137,7 +393,53 @@ class BytesStoreSqlite(BytesStoreBase):
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM store")
+            cursor.execute("DELETE FROM chunks")
+            conn.commit()
+
+    def purge_expired(self, batch_size: int = 1000) -> int:
+        """Delete expired values in batches of batch_size, one transaction each, returns the number deleted."""
+        count_deleted = 0
+        while True:
+            with self._get_connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                keys = [row[0] for row in conn.execute("SELECT key FROM store WHERE expires_at <= ? LIMIT ?", (time.time(), batch_size))]
+                if keys:
+                    placeholders = ",".join("?" * len(keys))
+                    conn.execute(f"DELETE FROM store WHERE key IN ({placeholders})", keys)
+                    conn.execute(f"DELETE FROM chunks WHERE key IN ({placeholders})", keys)
+                conn.commit()
+            count_deleted += len(keys)
+            if len(keys) < batch_size:
+                self._purge_stale_uploads()
+                return count_deleted
+
+    def _purge_stale_uploads(self) -> None:
+        """Delete the chunks of open_write uploads older than _UPLOAD_MAX_AGE, left behind by writers that crashed."""
+        upload_started_before = time.time() - self._UPLOAD_MAX_AGE
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # the range on the primary key selects the keys with the upload prefix
+            keys_upload = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT DISTINCT key FROM chunks WHERE key >= ? AND key < ?",
+                    (self._UPLOAD_PREFIX, self._UPLOAD_PREFIX[:-1] + "0"),
+                )
+            ]
+            keys_stale = [key for key in keys_upload if self._upload_started_at(key) < upload_started_before]
+            if keys_stale:
+                placeholders = ",".join("?" * len(keys_stale))
+                conn.execute(f"DELETE FROM chunks WHERE key IN ({placeholders})", keys_stale)
             conn.commit()
+        if keys_stale:
+            logger.info(f"Deleted {len(keys_stale)} unfinished uploads from {self.collection_name}")
+
+    def _upload_started_at(self, key_upload: str) -> float:
+        try:
+            return float(key_upload[len(self._UPLOAD_PREFIX) :].split("-", 1)[0])
+        except ValueError:
+            # uploads without a start time predate it and are old
+            return 0.0
 
     async def asample(self, count: int) -> List[bytes]:
         """Sample a given number of items from the store.
@@ -145,14 +447,26 @@ class BytesStoreSqlite(BytesStoreBase):
         Args:
             count (int): The number of items to sample.
 
+        Large tables are sampled by probing random rowids, so the cost scales with count and not with the table.
+
         Returns:
             List[bytes]: A list of sampled items.
         """
+        return await run_in_store_executor(self._sample, count)
+
+    def _sample(self, count: int) -> List[bytes]:
+        now = time.time()
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT value FROM store ORDER BY RANDOM() LIMIT ?", (count,))
-            rows = cursor.fetchall()
-            return [self._decompress(row[0]) for row in rows]
+            rowids = sample_rowids(conn, self._LIVE, now, count)
+            if rowids is None:
+                cursor.execute(f"SELECT key, value, chunk_size FROM store WHERE {self._LIVE} ORDER BY RANDOM() LIMIT ?", (now, count))
+                rows = cursor.fetchall()
+            else:
+                placeholders = ",".join("?" * len(rowids))
+                rows = cursor.execute(f"SELECT key, value, chunk_size FROM store WHERE rowid IN ({placeholders})", rowids).fetchall()
+                random.shuffle(rows)
+            return [self._read_value(conn, row[0], row[1], row[2]) for row in rows]
 
     def query(
         self,
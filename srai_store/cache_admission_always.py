@@ -0,0 +1,13 @@
+from typing import Any
+
+from srai_store.cache_admission_base import CacheAdmissionBase
+
+
+class CacheAdmissionAlways(CacheAdmissionBase):
+    """Admit every key."""
+
+    def record(self, key: str) -> None:
+        pass
+
+    def admit(self, key: str, value: Any = None) -> bool:
+        return True
@@ -0,0 +1,18 @@
+from abc import ABC, abstractmethod
+from typing import Any
+
+
+class CacheAdmissionBase(ABC):
+    """Decides which keys read from a base store are written to the cache tier.
+
+    Cache wrappers call record for every key they look up and admit, with the value read from a lower
+    tier, for keys that missed the cache, so a policy can keep one-off scans from flushing hot entries.
+    """
+
+    @abstractmethod
+    def record(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def admit(self, key: str, value: Any = None) -> bool:
+        pass
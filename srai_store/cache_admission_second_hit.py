@@ -0,0 +1,29 @@
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from srai_store.cache_admission_base import CacheAdmissionBase
+
+
+class CacheAdmissionSecondHit(CacheAdmissionBase):
+    """Admit a key on its second lookup, so keys read once by a scan never enter the cache.
+
+    Args:
+        max_keys: Number of recently seen keys remembered, the oldest are forgotten first.
+    """
+
+    def __init__(self, max_keys: int = 100000) -> None:
+        self.max_keys = max_keys
+        self._seen: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, key: str) -> None:
+        with self._lock:
+            self._seen[key] = self._seen.get(key, 0) + 1
+            self._seen.move_to_end(key)
+            if len(self._seen) > self.max_keys:
+                self._seen.popitem(last=False)
+
+    def admit(self, key: str, value: Any = None) -> bool:
+        with self._lock:
+            return self._seen.get(key, 0) >= 2
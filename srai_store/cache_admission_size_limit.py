@@ -0,0 +1,25 @@
+import json
+from typing import Any
+
+from pydantic import BaseModel
+
+from srai_store.cache_admission_base import CacheAdmissionBase
+
+
+class CacheAdmissionSizeLimit(CacheAdmissionBase):
+    """Admit values up to max_bytes (measured as JSON length), so a few large values do not push out many small ones."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+
+    def record(self, key: str) -> None:
+        pass
+
+    def admit(self, key: str, value: Any = None) -> bool:
+        if value is None:
+            return True
+        if isinstance(value, BaseModel):
+            return len(value.model_dump_json()) <= self.max_bytes
+        if isinstance(value, bytes):
+            return len(value) <= self.max_bytes
+        return len(json.dumps(value, default=str)) <= self.max_bytes
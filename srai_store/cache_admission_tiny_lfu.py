@@ -0,0 +1,124 @@
+import heapq
+import threading
+from typing import Any, Dict, List, Tuple
+
+from srai_store.cache_admission_base import CacheAdmissionBase
+
+COUNTER_MAX = 15
+DEPTH = 4
+# byte translation table halving every counter, ages the whole sketch in one C-level pass
+_HALVE = bytes(value >> 1 for value in range(256))
+
+
+class CacheAdmissionTinyLfu(CacheAdmissionBase):
+    """Frequency based admission (TinyLFU): admit keys looked up at least min_frequency times recently.
+
+    Frequencies are estimated with a count-min sketch of small counters, halved every sample_size
+    lookups so old popularity fades. A doorkeeper Bloom filter absorbs the first lookup of every key,
+    so keys seen once by a scan never reach the sketch.
+
+    Args:
+        expected_keys: Number of distinct hot keys expected, sizes the sketch and the doorkeeper.
+        min_frequency: Estimated lookups needed for admission.
+        sample_size: Lookups between agings, 10 times expected_keys by default.
+        top_keys_capacity: Number of hottest keys tracked for top_keys.
+    """
+
+    def __init__(
+        self,
+        expected_keys: int = 10000,
+        min_frequency: int = 2,
+        sample_size: int = 0,
+        top_keys_capacity: int = 100,
+    ) -> None:
+        self.width = 1 << max(4, (expected_keys - 1).bit_length())
+        self.min_frequency = min_frequency
+        self.sample_size = sample_size or 10 * expected_keys
+        self.top_keys_capacity = top_keys_capacity
+        self._sketch = bytearray(DEPTH * self.width)
+        self._doorkeeper = bytearray(self.width)
+        self._count_sample = 0
+        self._top: Dict[str, int] = {}
+        # min-heap of (estimate, key) over _top, entries whose estimate is no longer current are skipped lazily
+        self._top_heap: List[Tuple[int, str]] = []
+        self._lock = threading.Lock()
+
+    def _indexes(self, key: str) -> List[int]:
+        hash_1 = hash(key)
+        hash_2 = hash((key, 1)) | 1
+        mask = self.width - 1
+        return [row * self.width + ((hash_1 + row * hash_2) & mask) for row in range(DEPTH)]
+
+    def _doorkeeper_bits(self, key: str) -> Tuple[int, int]:
+        hash_1 = hash((key, 2))
+        bits = self.width * 8
+        return hash_1 % bits, (hash_1 >> 32) % bits
+
+    def _in_doorkeeper(self, key: str) -> bool:
+        return all(self._doorkeeper[bit >> 3] & (1 << (bit & 7)) for bit in self._doorkeeper_bits(key))
+
+    def _estimate(self, key: str) -> int:
+        return min(self._sketch[index] for index in self._indexes(key)) + (1 if self._in_doorkeeper(key) else 0)
+
+    def record(self, key: str) -> None:
+        with self._lock:
+            if not self._in_doorkeeper(key):
+                for bit in self._doorkeeper_bits(key):
+                    self._doorkeeper[bit >> 3] |= 1 << (bit & 7)
+            else:
+                indexes = self._indexes(key)
+                count_min = min(self._sketch[index] for index in indexes)
+                # conservative update: only raise the counters at the minimum
+                if count_min < COUNTER_MAX:
+                    for index in indexes:
+                        if self._sketch[index] == count_min:
+                            self._sketch[index] = count_min + 1
+            self._update_top(key)
+            self._count_sample += 1
+            if self._count_sample >= self.sample_size:
+                self._age()
+
+    def _update_top(self, key: str) -> None:
+        estimate = self._estimate(key)
+        if self._top.get(key) == estimate:
+            return
+        if key not in self._top and len(self._top) >= self.top_keys_capacity:
+            # estimates of tracked keys only grow between agings, so stale heap entries sit below the current one
+            while self._top_heap and self._top.get(self._top_heap[0][1]) != self._top_heap[0][0]:
+                heapq.heappop(self._top_heap)
+            if not self._top_heap or estimate <= self._top_heap[0][0]:
+                return
+            del self._top[heapq.heappop(self._top_heap)[1]]
+        self._top[key] = estimate
+        heapq.heappush(self._top_heap, (estimate, key))
+        if len(self._top_heap) > 4 * self.top_keys_capacity:
+            self._rebuild_top_heap()
+
+    def _rebuild_top_heap(self) -> None:
+        self._top_heap = [(estimate, key) for key, estimate in self._top.items()]
+        heapq.heapify(self._top_heap)
+
+    def _age(self) -> None:
+        self._count_sample = 0
+        self._sketch = self._sketch.translate(_HALVE)
+        self._doorkeeper = bytearray(len(self._doorkeeper))
+        self._top = {key: estimate >> 1 for key, estimate in self._top.items() if estimate >> 1}
+        self._rebuild_top_heap()
+
+    def frequency(self, key: str) -> int:
+        """Estimated number of recent lookups of the key, never underestimated (up to the counter limit)."""
+        with self._lock:
+            return self._estimate(key)
+
+    def admit(self, key: str, value: Any = None) -> bool:
+        return self.frequency(key) >= self.min_frequency
+
+    def admit_over(self, key: str, key_victim: str) -> bool:
+        """Whether key is worth more than key_victim, the entry a full cache would evict for it."""
+        with self._lock:
+            return self._estimate(key) > self._estimate(key_victim)
+
+    def top_keys(self, count: int = 10) -> List[Tuple[str, int]]:
+        """The hottest keys with their estimated frequency, for diagnostics."""
+        with self._lock:
+            return sorted(self._top.items(), key=lambda item: item[1], reverse=True)[:count]
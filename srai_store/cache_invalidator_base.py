@@ -0,0 +1,25 @@
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional, Sequence
+
+# called with the changed keys, or None when everything must be dropped (e.g. messages were missed)
+InvalidationCallback = Callable[[Optional[List[str]]], None]
+
+
+class CacheInvalidatorBase(ABC):
+    """Channel telling the cache tiers of other processes which keys changed in a shared base store.
+
+    Cache wrappers publish the keys they write and subscribe per collection, evicting the keys
+    other processes wrote. A process does not receive its own messages.
+    """
+
+    @abstractmethod
+    def publish(self, collection_name: str, keys: Sequence[str]) -> None:
+        pass
+
+    @abstractmethod
+    def subscribe(self, collection_name: str, callback: InvalidationCallback) -> None:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
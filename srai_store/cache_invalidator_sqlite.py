@@ -0,0 +1,133 @@
+import logging
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from srai_store.cache_invalidator_base import CacheInvalidatorBase, InvalidationCallback
+
+logger = logging.getLogger(__name__)
+
+
+class CacheInvalidatorSqlite(CacheInvalidatorBase):
+    def __init__(
+        self,
+        path_file_database: Path,
+        poll_interval: float = 0.5,
+        max_messages: int = 100000,
+    ) -> None:
+        """Invalidation channel in a SQLite file shared by the processes on one host.
+
+        Changed keys are appended to a table with an increasing sequence number; a background thread
+        polls for messages after the last sequence number it saw. The table is pruned to max_messages,
+        a subscriber that fell behind the pruned range drops its whole cache.
+
+        Args:
+            path_file_database: The shared SQLite file, e.g. next to the shared base store.
+            poll_interval: Seconds between polls, the maximum time another process serves a stale entry.
+            max_messages: Number of messages kept for slow subscribers.
+        """
+        self.path_file_database = path_file_database
+        self.poll_interval = poll_interval
+        self.max_messages = max_messages
+        self.origin = uuid.uuid4().hex
+        self.path_file_database.absolute().parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+        self._callbacks: Dict[str, List[InvalidationCallback]] = {}
+        self._lock = threading.Lock()
+        self._sequence_last = self._get_sequence_last()
+        self._count_published = 0
+        self._closed = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _init_db(self) -> None:
+        with self._get_connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS invalidation (
+                    sequence INTEGER PRIMARY KEY AUTOINCREMENT,
+                    collection_name TEXT,
+                    key TEXT,
+                    origin TEXT
+                )
+            """
+            )
+            conn.commit()
+
+    @contextmanager
+    def _get_connection(self):
+        conn = sqlite3.connect(self.path_file_database, timeout=30)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _get_sequence_last(self) -> int:
+        with self._get_connection() as conn:
+            return conn.execute("SELECT COALESCE(MAX(sequence), 0) FROM invalidation").fetchone()[0]
+
+    def publish(self, collection_name: str, keys: Sequence[str]) -> None:
+        if not keys:
+            return
+        with self._get_connection() as conn:
+            conn.executemany(
+                "INSERT INTO invalidation (collection_name, key, origin) VALUES (?, ?, ?)",
+                [(collection_name, key, self.origin) for key in keys],
+            )
+            self._count_published += len(keys)
+            if self._count_published >= self.max_messages // 10:
+                self._count_published = 0
+                conn.execute(
+                    "DELETE FROM invalidation WHERE sequence <= (SELECT MAX(sequence) FROM invalidation) - ?",
+                    (self.max_messages,),
+                )
+            conn.commit()
+
+    def subscribe(self, collection_name: str, callback: InvalidationCallback) -> None:
+        with self._lock:
+            self._callbacks.setdefault(collection_name, []).append(callback)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="cache-invalidator", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._closed.wait(self.poll_interval):
+            try:
+                self.poll()
+            except sqlite3.Error as e:
+                logger.warning(f"Polling cache invalidations failed: {e}")
+
+    def poll(self) -> None:
+        """Deliver the messages published since the last poll, called by the background thread."""
+        with self._get_connection() as conn:
+            sequence_min = conn.execute("SELECT MIN(sequence) FROM invalidation").fetchone()[0]
+            rows = conn.execute(
+                "SELECT sequence, collection_name, key, origin FROM invalidation WHERE sequence > ? ORDER BY sequence",
+                (self._sequence_last,),
+            ).fetchall()
+        with self._lock:
+            callbacks = {collection_name: list(callbacks) for collection_name, callbacks in self._callbacks.items()}
+        if sequence_min is not None and sequence_min > self._sequence_last + 1:
+            # messages we never saw were pruned
+            logger.warning(f"Missed cache invalidations up to {sequence_min}, dropping all cached entries")
+            for callbacks_collection in callbacks.values():
+                for callback in callbacks_collection:
+                    callback(None)
+        else:
+            keys_by_collection: Dict[str, List[str]] = {}
+            for _, collection_name, key, origin in rows:
+                if origin != self.origin:
+                    keys_by_collection.setdefault(collection_name, []).append(key)
+            for collection_name, keys in keys_by_collection.items():
+                for callback in callbacks.get(collection_name, []):
+                    callback(keys)
+        if rows:
+            self._sequence_last = rows[-1][0]
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,65 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Sequence
+
+
+class CacheNegative:
+    """Bounded set of keys known to be missing from a store, with an optional time to live.
+
+    A Bloom filter would be smaller but cannot forget single keys, which mset needs.
+
+    Args:
+        max_keys: Number of missing keys remembered, the oldest are forgotten first.
+        ttl: Seconds a key is remembered as missing, None to keep it until it is written or evicted.
+    """
+
+    def __init__(self, max_keys: int = 100000, ttl: Optional[float] = None) -> None:
+        self.max_keys = max_keys
+        self.ttl = ttl
+        # key -> expires_at
+        self._keys: "OrderedDict[str, Optional[float]]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.count_hit = 0
+
+    def generation(self) -> int:
+        """Token to pass to add, so misses read before a concurrent write are not remembered."""
+        with self._lock:
+            return self._generation
+
+    def add(self, keys: Sequence[str], generation: Optional[int] = None) -> None:
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            for key in keys:
+                self._keys[key] = expires_at
+                self._keys.move_to_end(key)
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+
+    def discard(self, keys: Sequence[str]) -> None:
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._keys.pop(key, None)
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            if key not in self._keys:
+                return False
+            expires_at = self._keys[key]
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._keys[key]
+                return False
+            self.count_hit += 1
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._keys.clear()
+
+    def __len__(self) -> int:
+        return len(self._keys)
@@ -0,0 +1,68 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class CacheQuery:
+    """Bounded cache of query results, dropped as a whole whenever the collection changes.
+
+    Args:
+        max_entries: Number of results kept, the least recently used are dropped first.
+        ttl: Seconds a result is served, None to keep it until the collection changes.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: Optional[float] = 60) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # key -> (result, expires_at)
+        self._results: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.count_hit = 0
+        self.count_miss = 0
+
+    @staticmethod
+    def get_key(
+        kind: str,
+        query: Dict[str, Any],
+        order_by: Optional[List[Tuple[str, bool]]] = None,
+        limit: int = 0,
+        offset: int = 0,
+    ) -> str:
+        """Normalized key of a query, the order of the fields in the query does not matter."""
+        return json.dumps([kind, query, [list(item) for item in order_by or []], limit, offset], sort_keys=True, default=str)
+
+    def generation(self) -> int:
+        """Token to pass to set, so results read before a concurrent write are not cached."""
+        with self._lock:
+            return self._generation
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return (found, result)."""
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                self._results.move_to_end(key)
+                self.count_hit += 1
+                return True, entry[0]
+            if entry is not None:
+                del self._results[key]
+            self.count_miss += 1
+            return False, None
+
+    def set(self, key: str, result: Any, generation: int) -> None:
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._results[key] = (result, expires_at)
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._results.clear()
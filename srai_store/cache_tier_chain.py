@@ -0,0 +1,138 @@
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from srai_store.cache_admission_base import CacheAdmissionBase
+from srai_store.cache_write_behind import OPERATION_SET, CacheWriteBehind
+
+logger = logging.getLogger(__name__)
+
+WRITE_THROUGH = "through"
+WRITE_BEHIND = "behind"
+WRITE_AROUND = "around"
+WRITE_POLICIES = [WRITE_THROUGH, WRITE_BEHIND, WRITE_AROUND]
+
+
+class CacheTierChain:
+    """Reads, writes and promotion over a chain of stores ordered from fastest to authoritative.
+
+    Shared by DictStoreTiered and ObjectStoreTiered, the tiers only need mset, mget and mdelete.
+
+    Args:
+        collection_name: Name of the collection.
+        tiers: The stores, the last one is the authoritative base tier.
+        promotions: Per tier above the base, the policy deciding which hits from lower tiers are copied
+            into it (None copies every hit, e.g. CacheAdmissionAlways, CacheAdmissionSecondHit, CacheAdmissionSizeLimit).
+        write_policies: Per tier, "through" writes synchronously, "behind" queues writes for a background
+            thread and "around" skips the tier on writes (evicting the key) so only reads fill it.
+            The base tier can not be "around".
+        write_behind_max_pending: Writers block while this many keys are queued for a "behind" tier.
+    """
+
+    def __init__(
+        self,
+        collection_name: str,
+        tiers: Sequence[Any],
+        promotions: Optional[Sequence[Optional[CacheAdmissionBase]]] = None,
+        write_policies: Optional[Sequence[str]] = None,
+        write_behind_max_pending: int = 10000,
+    ) -> None:
+        if len(tiers) < 2:
+            raise ValueError("At least two tiers are required")
+        for tier in tiers:
+            if tier.collection_name != collection_name:
+                raise ValueError("Collection names must match")
+        promotions = list(promotions) if promotions is not None else [None] * (len(tiers) - 1)
+        write_policies = list(write_policies) if write_policies is not None else [WRITE_THROUGH] * len(tiers)
+        if len(promotions) != len(tiers) - 1:
+            raise ValueError("promotions needs one policy per tier above the base tier")
+        if len(write_policies) != len(tiers):
+            raise ValueError("write_policies needs one policy per tier")
+        for write_policy in write_policies:
+            if write_policy not in WRITE_POLICIES:
+                raise ValueError(f"Unknown write policy: {write_policy}. Use one of {WRITE_POLICIES}")
+        if write_policies[-1] == WRITE_AROUND:
+            raise ValueError("The base tier can not be written around")
+        self.collection_name = collection_name
+        self.tiers = list(tiers)
+        self.promotions: List[Optional[CacheAdmissionBase]] = promotions
+        self.write_policies: List[str] = write_policies
+        self.write_behinds: List[Optional[CacheWriteBehind]] = [
+            CacheWriteBehind(f"{collection_name}[{index}]", tier.mset, tier.mdelete, max_pending=write_behind_max_pending)
+            if write_policy == WRITE_BEHIND
+            else None
+            for index, (tier, write_policy) in enumerate(zip(tiers, write_policies))
+        ]
+        self.count_hit = [0] * len(tiers)
+        self.count_miss = 0
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[Any]]:
+        results: Dict[str, Any] = {}
+        # tier index -> keys found there
+        keys_found: List[List[str]] = [[] for _ in self.tiers]
+        keys_missing = list(dict.fromkeys(keys))
+        for index, tier in enumerate(self.tiers):
+            if not keys_missing:
+                break
+            promotion = self.promotions[index] if index < len(self.promotions) else None
+            if promotion is not None:
+                for key in keys_missing:
+                    promotion.record(key)
+            write_behind = self.write_behinds[index]
+            if write_behind is not None:
+                # writes queued for this tier are newer than what it holds
+                for key, (operation, value) in write_behind.lookup(keys_missing).items():
+                    results[key] = value if operation == OPERATION_SET else None
+                keys_missing = [key for key in keys_missing if key not in results]
+            if keys_missing:
+                for key, value in zip(keys_missing, tier.mget(keys_missing)):
+                    if value is not None:
+                        results[key] = value
+                        keys_found[index].append(key)
+            keys_missing = [key for key in keys_missing if key not in results]
+        self.count_miss += len(keys_missing)
+        for index, keys_index in enumerate(keys_found):
+            self.count_hit[index] += len(keys_index)
+        self._promote(results, keys_found)
+        return [results.get(key) for key in keys]
+
+    def _promote(self, results: Dict[str, Any], keys_found: List[List[str]]) -> None:
+        for index in range(len(self.tiers) - 1):
+            key_value_pairs: List[Tuple[str, Any]] = []
+            for index_found in range(index + 1, len(self.tiers)):
+                key_value_pairs.extend((key, results[key]) for key in keys_found[index_found])
+            promotion = self.promotions[index]
+            if promotion is not None:
+                key_value_pairs = [(key, value) for key, value in key_value_pairs if promotion.admit(key, value)]
+            if key_value_pairs:
+                self.tiers[index].mset(key_value_pairs)
+
+    def mset(self, key_value_pairs: Sequence[Tuple[str, Any]]) -> None:
+        # lowest tier first, so a tier never holds a value its lower tiers do not have yet
+        for tier, write_policy, write_behind in reversed(list(zip(self.tiers, self.write_policies, self.write_behinds))):
+            if write_policy == WRITE_AROUND:
+                tier.mdelete([key for key, _ in key_value_pairs])
+            elif write_behind is not None:
+                write_behind.mset(key_value_pairs)
+            else:
+                tier.mset(key_value_pairs)
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        for tier, write_behind in reversed(list(zip(self.tiers, self.write_behinds))):
+            if write_behind is not None:
+                write_behind.mdelete(keys)
+            else:
+                tier.mdelete(keys)
+
+    def flush(self) -> None:
+        """Wait until queued writes reached their tiers, raises WriteBehindError for writes that failed."""
+        for write_behind in self.write_behinds:
+            if write_behind is not None:
+                write_behind.flush()
+
+    def close(self) -> None:
+        for write_behind in self.write_behinds:
+            if write_behind is not None:
+                write_behind.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": list(self.count_hit), "misses": self.count_miss}
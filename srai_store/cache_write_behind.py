@@ -0,0 +1,173 @@
+import atexit
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from srai_store.exceptions import WriteBehindError
+
+logger = logging.getLogger(__name__)
+
+OPERATION_SET = "set"
+OPERATION_DELETE = "delete"
+
+# open queues, flushed by one exit hook instead of an atexit registration per queue
+_QUEUES_OPEN: "weakref.WeakSet[CacheWriteBehind]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_all() -> None:
+    for queue in list(_QUEUES_OPEN):
+        try:
+            queue.close()
+        except WriteBehindError as e:
+            logger.error(f"{e}")
+
+
+class CacheWriteBehind:
+    """Queue of writes to a base store, flushed in batches by a background thread.
+
+    Writes to the same key are coalesced, only the latest value (or delete) is written. Failed batches are
+    retried max_retries times, then dropped and reported by the next flush or close as WriteBehindError.
+
+    Args:
+        collection_name: Name of the collection, for logging and errors.
+        write: Writes a batch of key value pairs to the base store.
+        delete: Deletes a batch of keys from the base store.
+        max_pending: Writers block while this many keys are waiting to be flushed.
+        batch_size: Maximum number of keys per write or delete call.
+        flush_interval: Seconds the worker waits for more writes to coalesce before flushing.
+        max_retries: Attempts per failed batch before it is dropped.
+    """
+
+    def __init__(
+        self,
+        collection_name: str,
+        write: Callable[[List[Tuple[str, Any]]], None],
+        delete: Callable[[List[str]], None],
+        max_pending: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.05,
+        max_retries: int = 3,
+    ) -> None:
+        self.collection_name = collection_name
+        self._write = write
+        self._delete = delete
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        # key -> (operation, value, attempt)
+        self._pending: "OrderedDict[str, Tuple[str, Any, int]]" = OrderedDict()
+        self._in_flight: Dict[str, Tuple[str, Any, int]] = {}
+        self._errors: List[Exception] = []
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=f"write-behind-{collection_name}", daemon=True)
+        self._thread.start()
+        _QUEUES_OPEN.add(self)
+
+    def _put(self, entries: List[Tuple[str, str, Any]]) -> None:
+        with self._condition:
+            if self._closed:
+                raise RuntimeError(f"Write behind queue of {self.collection_name} is closed")
+            for key, operation, value in entries:
+                while key not in self._pending and len(self._pending) >= self.max_pending:
+                    self._condition.wait()
+                self._pending[key] = (operation, value, 0)
+                self._pending.move_to_end(key)
+            self._condition.notify_all()
+
+    def mset(self, key_value_pairs: Sequence[Tuple[str, Any]]) -> None:
+        self._put([(key, OPERATION_SET, value) for key, value in key_value_pairs])
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        self._put([(key, OPERATION_DELETE, None) for key in keys])
+
+    def lookup(self, keys: Sequence[str]) -> Dict[str, Tuple[str, Any]]:
+        """Pending operation and value of the keys that are not written to the base store yet."""
+        result: Dict[str, Tuple[str, Any]] = {}
+        with self._condition:
+            for key in keys:
+                entry = self._pending.get(key) or self._in_flight.get(key)
+                if entry is not None:
+                    result[key] = (entry[0], entry[1])
+        return result
+
+    def pending_count(self) -> int:
+        with self._condition:
+            return len(self._pending) + len(self._in_flight)
+
+    def _take_batch(self) -> Optional[Dict[str, Tuple[str, Any, int]]]:
+        with self._condition:
+            while not self._pending and not self._closed:
+                self._condition.wait()
+            if not self._pending:
+                return None
+            # coalesce more writes for flush_interval, unless a full batch is already waiting
+            self._condition.wait_for(
+                lambda: self._closed or len(self._pending) >= min(self.batch_size, self.max_pending), self.flush_interval
+            )
+            batch: Dict[str, Tuple[str, Any, int]] = {}
+            while self._pending and len(batch) < self.batch_size:
+                key, entry = self._pending.popitem(last=False)
+                batch[key] = entry
+            self._in_flight = batch
+            self._condition.notify_all()
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            key_value_pairs = [(key, value) for key, (operation, value, _) in batch.items() if operation == OPERATION_SET]
+            keys_delete = [key for key, (operation, _, _) in batch.items() if operation == OPERATION_DELETE]
+            try:
+                if key_value_pairs:
+                    self._write(key_value_pairs)
+                if keys_delete:
+                    self._delete(keys_delete)
+            except Exception as e:
+                self._retry(batch, e)
+            with self._condition:
+                self._in_flight = {}
+                self._condition.notify_all()
+
+    def _retry(self, batch: Dict[str, Tuple[str, Any, int]], error: Exception) -> None:
+        with self._condition:
+            if batch and max(attempt for _, _, attempt in batch.values()) + 1 >= self.max_retries:
+                logger.error(f"Dropping {len(batch)} write behind keys of {self.collection_name}: {error!r}")
+                self._errors.append(error)
+                return
+            logger.warning(f"Write behind batch of {self.collection_name} failed, retrying: {error!r}")
+            for key, (operation, value, attempt) in batch.items():
+                # a newer write for the key supersedes the failed one
+                if key not in self._pending:
+                    self._pending[key] = (operation, value, attempt + 1)
+                    self._pending.move_to_end(key, last=False)
+
+    def flush(self) -> None:
+        """Block until every queued write reached the base store, raise WriteBehindError for dropped batches."""
+        with self._condition:
+            self._condition.notify_all()
+            while (self._pending or self._in_flight) and self._thread.is_alive():
+                self._condition.wait(0.1)
+            errors, self._errors = self._errors, []
+        if errors:
+            raise WriteBehindError(self.collection_name, errors)
+
+    def close(self) -> None:
+        """Flush and stop the worker thread."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        _QUEUES_OPEN.discard(self)
+        with self._condition:
+            errors, self._errors = self._errors, []
+        if errors:
+            raise WriteBehindError(self.collection_name, errors)
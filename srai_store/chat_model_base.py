@@ -2,12 +2,13 @@ import hashlib
 from typing import Any, Optional
 
 from langchain.chat_models.base import BaseChatModel
-from langchain_core.callbacks.manager import CallbackManagerForLLMRun
+from langchain_core.callbacks.manager import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
 from langchain_core.messages import BaseMessage
 from langchain_core.outputs import ChatResult
-from pydantic import Field
+from pydantic import Field, PrivateAttr
 
 from srai_store.dict_store_base import DictStoreBase
+from srai_store.single_flight import SingleFlight
 
 
 class ChatModelWrapper(BaseChatModel):
@@ -17,6 +18,8 @@ class ChatModelWrapper(BaseChatModel):
     """The inner chat model to wrap."""
     cache_store: Optional[DictStoreBase] = Field(default=None, exclude=True)
     """Optional cache store for caching responses."""
+    _single_flight: SingleFlight = PrivateAttr(default_factory=SingleFlight)
+    """Concurrent identical requests, sync or async, share one call to the inner model."""
 
     def __init__(
         self,
@@ -51,8 +54,57 @@ class ChatModelWrapper(BaseChatModel):
             cache_dict = self.cache_store.get(cache_key)
             if cache_dict is not None:
                 return ChatResult(**cache_dict["result"])
+            return self._single_flight.do(cache_key, lambda: self._generate_cached(cache_key, messages, stop, run_manager, **kwargs))
+        return self.chat_model_inner._generate(messages, stop, run_manager, **kwargs)  # type: ignore
+
+    def _generate_cached(
+        self,
+        cache_key: str,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # another call may have finished generating between our cache miss and taking the lead
+        cache_dict = self.cache_store.get(cache_key)  # type: ignore
+        if cache_dict is not None:
+            return ChatResult(**cache_dict["result"])
         result = self.chat_model_inner._generate(messages, stop, run_manager, **kwargs)  # type: ignore
+        self.cache_store.set(cache_key, {"result": result.model_dump()})  # type: ignore
+        return result
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        cache_key = ""
         if self.cache_store is not None:
-            cache_dict = {"result": result.model_dump()}
-            self.cache_store.set(cache_key, cache_dict)
+            cache_key = hashlib.sha256(
+                (self.chat_model_name + str(messages)).encode()  # type: ignore
+            ).hexdigest()
+            cache_dict = await self.cache_store.aget(cache_key)
+            if cache_dict is not None:
+                return ChatResult(**cache_dict["result"])
+            return await self._single_flight.ado(
+                cache_key, lambda: self._agenerate_cached(cache_key, messages, stop, run_manager, **kwargs)
+            )
+        return await self.chat_model_inner._agenerate(messages, stop, run_manager, **kwargs)  # type: ignore
+
+    async def _agenerate_cached(
+        self,
+        cache_key: str,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # another call may have finished generating between our cache miss and taking the lead
+        cache_dict = await self.cache_store.aget(cache_key)  # type: ignore
+        if cache_dict is not None:
+            return ChatResult(**cache_dict["result"])
+        result = await self.chat_model_inner._agenerate(messages, stop, run_manager, **kwargs)  # type: ignore
+        await self.cache_store.amset([(cache_key, {"result": result.model_dump()})])  # type: ignore
         return result
@@ -0,0 +1,32 @@
+from abc import ABC, abstractmethod
+from typing import Union
+
+
+class DictSerializerBase(ABC):
+    """Serializer turning documents into bytes and back.
+
+    JSON text serializers write plain JSON, other formats prefix the blob with their serializer_id
+    so stores can hold a mix of formats while a collection migrates.
+    """
+
+    serializer_id: int
+    name: str
+    is_json_text: bool = False
+
+    @abstractmethod
+    def dumps(self, document: dict) -> bytes:
+        pass
+
+    @abstractmethod
+    def loads(self, data: Union[bytes, str]) -> dict:
+        pass
+
+    def encode(self, document: dict) -> bytes:
+        if self.is_json_text:
+            return self.dumps(document)
+        return bytes([self.serializer_id]) + self.dumps(document)
+
+    def decode(self, blob: bytes) -> dict:
+        if self.is_json_text:
+            return self.loads(blob)
+        return self.loads(blob[1:])
@@ -0,0 +1,16 @@
+import json
+from typing import Union
+
+from srai_store.dict_serializer_base import DictSerializerBase
+
+
+class DictSerializerJson(DictSerializerBase):
+    serializer_id = ord("{")
+    name = "json"
+    is_json_text = True
+
+    def dumps(self, document: dict) -> bytes:
+        return json.dumps(document).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> dict:
+        return json.loads(data)
@@ -0,0 +1,20 @@
+from typing import Union
+
+from srai_store.dict_serializer_base import DictSerializerBase
+
+
+class DictSerializerMsgpack(DictSerializerBase):
+    """MessagePack, requires the optional msgpack package. Not usable by stores that query JSON text."""
+
+    serializer_id = 0x01
+    name = "msgpack"
+
+    def dumps(self, document: dict) -> bytes:
+        import msgpack
+
+        return msgpack.packb(document)
+
+    def loads(self, data: Union[bytes, str]) -> dict:
+        import msgpack
+
+        return msgpack.unpackb(data)
@@ -0,0 +1,25 @@
+from typing import Union
+
+from srai_store.dict_serializer_base import DictSerializerBase
+
+
+class DictSerializerOrjson(DictSerializerBase):
+    """JSON through orjson, requires the optional orjson package.
+
+    Writes the same JSON text as the stdlib serializer (compact, non string keys converted), so
+    both can read each other's data and SQL json_extract queries keep working.
+    """
+
+    serializer_id = ord("{")
+    name = "orjson"
+    is_json_text = True
+
+    def dumps(self, document: dict) -> bytes:
+        import orjson
+
+        return orjson.dumps(document, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data: Union[bytes, str]) -> dict:
+        import orjson
+
+        return orjson.loads(data)
@@ -0,0 +1,54 @@
+from typing import Dict, Union
+
+from srai_store.dict_serializer_base import DictSerializerBase
+from srai_store.dict_serializer_json import DictSerializerJson
+from srai_store.dict_serializer_msgpack import DictSerializerMsgpack
+from srai_store.dict_serializer_orjson import DictSerializerOrjson
+
+_serializers_by_name: Dict[str, DictSerializerBase] = {}
+_serializers_by_id: Dict[int, DictSerializerBase] = {}
+
+# first bytes of a serialized JSON document (object, possibly after whitespace)
+_JSON_FIRST_BYTES = frozenset(b"{ \t\r\n")
+
+
+def register_dict_serializer(serializer: DictSerializerBase) -> None:
+    _serializers_by_name[serializer.name] = serializer
+    if not serializer.is_json_text:
+        existing = _serializers_by_id.get(serializer.serializer_id)
+        if existing is not None and existing.name != serializer.name:
+            raise ValueError(f"Serializer id {serializer.serializer_id} is already used by serializer {existing.name}")
+        _serializers_by_id[serializer.serializer_id] = serializer
+
+
+def get_dict_serializer(name: str, json_text: bool = False) -> DictSerializerBase:
+    """Get a serializer by name, json_text requires one that writes JSON text (for SQL json queries)."""
+    if name not in _serializers_by_name:
+        raise ValueError(f"Unknown serializer: {name}. Use one of {list(_serializers_by_name)}")
+    serializer = _serializers_by_name[name]
+    if json_text and not serializer.is_json_text:
+        raise ValueError(f"Serializer {name} does not write JSON text")
+    return serializer
+
+
+def decode_document(blob: bytes, serializer: DictSerializerBase) -> dict:
+    """Decode a blob written by any registered serializer, JSON is read with serializer if it is a JSON one."""
+    if blob[0] in _JSON_FIRST_BYTES:
+        if serializer.is_json_text:
+            return serializer.decode(blob)
+        return _serializers_by_name["json"].decode(blob)
+    if blob[0] not in _serializers_by_id:
+        raise ValueError(f"Unknown serializer header byte: {blob[0]}")
+    return _serializers_by_id[blob[0]].decode(blob)
+
+
+def document_to_json(blob: bytes, serializer: DictSerializerBase) -> Union[str, bytes]:
+    """JSON text of a stored blob, converting blobs written by non JSON serializers."""
+    if blob[0] in _JSON_FIRST_BYTES:
+        return blob
+    return _serializers_by_name["json"].dumps(decode_document(blob, serializer))
+
+
+register_dict_serializer(DictSerializerJson())
+register_dict_serializer(DictSerializerOrjson())
+register_dict_serializer(DictSerializerMsgpack())
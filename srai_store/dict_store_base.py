@@ -1,12 +1,19 @@
 from abc import abstractmethod
-from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 from langchain_core.stores import BaseStore
 
+from srai_store.dict_update import apply_update, validate_update
 from srai_store.exceptions import KeyNotFoundError
+from srai_store.store_executor import aiterate_in_store_executor, run_in_store_executor
 
 
 class DictStoreBase(BaseStore[str, dict]):
+    # stores that keep documents as JSON text can hand it out and take it in without a dict stage
+    supports_json: bool = False
+    # stores that take a ttl (seconds) in mset and expire documents
+    supports_ttl: bool = False
+
     def __init__(self, collection_name: str) -> None:
         self.collection_name = collection_name
 
@@ -14,13 +21,26 @@ class DictStoreBase(BaseStore[str, dict]):
     def mset(self, key_value_pairs: Sequence[tuple[str, dict]]) -> None:
         pass
 
-    def set(self, key: str, value: dict) -> None:
-        self.mset([(key, value)])
+    def set(self, key: str, value: dict, ttl: Optional[float] = None) -> None:
+        if ttl is None:
+            self.mset([(key, value)])
+        elif self.supports_ttl:
+            self.mset([(key, value)], ttl=ttl)  # type: ignore
+        else:
+            raise NotImplementedError(f"{type(self).__name__} does not support ttl")
 
     @abstractmethod
     def mget(self, keys: Sequence[str]) -> List[Optional[dict]]:
         pass
 
+    def mset_json(self, key_json_pairs: Sequence[Tuple[str, Union[str, bytes]]]) -> None:
+        """Set documents given as JSON text, only for stores with supports_json."""
+        raise NotImplementedError("Not implemented")
+
+    def mget_json(self, keys: Sequence[str]) -> List[Optional[Union[str, bytes]]]:
+        """Get documents as JSON text, only for stores with supports_json."""
+        raise NotImplementedError("Not implemented")
+
     def get_raise(self, key: str) -> dict:
         dict = self.mget([key])[0]
         if dict is None:
@@ -37,6 +57,33 @@ class DictStoreBase(BaseStore[str, dict]):
     def mdelete(self, keys: Sequence[str]) -> None:
         pass
 
+    def mupdate(self, keys_or_query: Union[Sequence[str], Dict[str, Any]], update: Dict[str, Dict[str, Any]]) -> int:
+        """Apply MongoDB-style $set, $inc and $unset to the documents with the given keys or matching a query.
+
+        Field paths are dotted like in query, e.g. {"$set": {"user.name": "Alice"}, "$inc": {"visits": 1}}.
+        Missing keys are skipped, documents are never created. Stores with a JSON backend push the update
+        down, this fallback reads, modifies and rewrites whole documents, so it is not atomic and a ttl on
+        the documents is not kept.
+
+        Returns:
+            int: The number of documents updated.
+        """
+        validate_update(update)
+        keys = self.query_keys(keys_or_query) if isinstance(keys_or_query, dict) else list(dict.fromkeys(keys_or_query))
+        documents = self.mget(keys) if keys else []
+        key_value_pairs = [(key, apply_update(document, update)) for key, document in zip(keys, documents) if document is not None]
+        if key_value_pairs:
+            self.mset(key_value_pairs)
+        return len(key_value_pairs)
+
+    def clear(self) -> None:
+        """Delete all documents."""
+        self.mdelete(list(self.yield_keys()))
+
+    def purge_expired(self, batch_size: int = 1000) -> int:
+        """Delete expired documents, returns the number deleted. Stores without ttl have nothing to purge."""
+        return 0
+
     @abstractmethod
     def yield_keys(self, *, prefix: Optional[str] = None) -> Iterator[str]:
         pass
@@ -55,9 +102,67 @@ class DictStoreBase(BaseStore[str, dict]):
     ) -> List[dict]:
         pass
 
+    def query_keys(
+        self,
+        query: Dict[str, Any],
+        order_by: Optional[List[Tuple[str, bool]]] = None,
+        limit: int = 0,
+        offset: int = 0,
+    ) -> List[str]:
+        raise NotImplementedError("Not implemented")
+
     @abstractmethod
     def count_query(
         self,
         query: Dict[str, Any],
     ) -> int:
         pass
+
+    # async API, by default the blocking methods run on the store executor, stores with a native
+    # async client override these
+
+    async def amget(self, keys: Sequence[str]) -> List[Optional[dict]]:
+        return await run_in_store_executor(self.mget, keys)
+
+    async def aget(self, key: str) -> Optional[dict]:
+        return (await self.amget([key]))[0]
+
+    async def amset(self, key_value_pairs: Sequence[tuple[str, dict]], ttl: Optional[float] = None) -> None:
+        if ttl is None:
+            await run_in_store_executor(self.mset, key_value_pairs)
+        else:
+            await run_in_store_executor(self.mset, key_value_pairs, ttl=ttl)
+
+    async def amget_json(self, keys: Sequence[str]) -> List[Optional[Union[str, bytes]]]:
+        return await run_in_store_executor(self.mget_json, keys)
+
+    async def amset_json(self, key_json_pairs: Sequence[Tuple[str, Union[str, bytes]]], ttl: Optional[float] = None) -> None:
+        if ttl is None:
+            await run_in_store_executor(self.mset_json, key_json_pairs)
+        else:
+            await run_in_store_executor(self.mset_json, key_json_pairs, ttl=ttl)
+
+    async def amdelete(self, keys: Sequence[str]) -> None:
+        await run_in_store_executor(self.mdelete, keys)
+
+    async def amupdate(self, keys_or_query: Union[Sequence[str], Dict[str, Any]], update: Dict[str, Dict[str, Any]]) -> int:
+        return await run_in_store_executor(self.mupdate, keys_or_query, update)
+
+    async def ayield_keys(self, *, prefix: Optional[str] = None) -> AsyncIterator[str]:
+        async for key in aiterate_in_store_executor(lambda: self.yield_keys(prefix=prefix)):
+            yield key
+
+    async def acount(self) -> int:
+        return await run_in_store_executor(self.count)
+
+    async def aquery(
+        self,
+        query: Dict[str, Any],
+        order_by: Optional[List[Tuple[str, bool]]] = None,
+        limit: int = 0,
+        offset: int = 0,
+    ) -> List[dict]:
+        return await run_in_store_executor(self.query, query, order_by, limit, offset)
+
+    async def acount_query(self, query: Dict[str, Any]) -> int:
+        return await run_in_store_executor(self.count_query, query)
@@ -0,0 +1,69 @@
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from srai_store.dict_store_base import DictStoreBase
+from srai_store.get_batcher import GetBatcher
+
+
+class DictStoreBatching(DictStoreBase):
+    def __init__(self, store: DictStoreBase, window: float = 0.002, max_batch: int = 100) -> None:
+        """Dict store that collects concurrent get and aget calls into one mget on the wrapped store.
+
+        Args:
+            store: The wrapped store.
+            window: Seconds a get waits for other gets to join its batch.
+            max_batch: Maximum number of keys per mget.
+        """
+        super().__init__(store.collection_name)
+        self.store = store
+        self._batcher = GetBatcher(store.mget, window, max_batch, store.amget)
+
+    def get(self, key: str) -> Optional[dict]:
+        return self._batcher.get(key)
+
+    async def aget(self, key: str) -> Optional[dict]:
+        return await self._batcher.aget(key)
+
+    def mset(self, key_value_pairs: Sequence[tuple[str, dict]]) -> None:
+        self.store.mset(key_value_pairs)
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[dict]]:
+        return self.store.mget(keys)
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        self.store.mdelete(keys)
+
+    def mupdate(self, keys_or_query: Union[Sequence[str], Dict[str, Any]], update: Dict[str, Dict[str, Any]]) -> int:
+        return self.store.mupdate(keys_or_query, update)
+
+    def yield_keys(self, *, prefix: Optional[str] = None) -> Iterator[str]:
+        return self.store.yield_keys(prefix=prefix)
+
+    def count(self) -> int:
+        return self.store.count()
+
+    async def asample(self, count: int) -> List[dict]:
+        return await self.store.asample(count)
+
+    def query(
+        self,
+        query: Dict[str, Any],
+        order_by: Optional[List[Tuple[str, bool]]] = None,
+        limit: int = 0,
+        offset: int = 0,
+    ) -> List[dict]:
+        return self.store.query(query, order_by, limit, offset)
+
+    def query_keys(
+        self,
+        query: Dict[str, Any],
+        order_by: Optional[List[Tuple[str, bool]]] = None,
+        limit: int = 0,
+        offset: int = 0,
+    ) -> List[str]:
+        return self.store.query_keys(query, order_by, limit, offset)
+
+    def count_query(
+        self,
+        query: Dict[str, Any],
+    ) -> int:
+        return self.store.count_query(query)
@@ -1,18 +1,54 @@
 import json
-from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 from srai_store.bytes_store_base import BytesStoreBase
+from srai_store.dict_serializer_registry import decode_document, document_to_json, get_dict_serializer
 from srai_store.dict_store_base import DictStoreBase
 
+logger = logging.getLogger(__name__)
+
 
 class DictStoreBytes(DictStoreBase):
-    def __init__(self, store: BytesStoreBase) -> None:
+    def __init__(
+        self,
+        store: BytesStoreBase,
+        index_store: Optional[DictStoreBase] = None,
+        index_fields: Optional[List[str]] = None,
+        serializer: str = "json",
+    ) -> None:
+        """Dict store on top of a bytes store.
+
+        Args:
+            store: The bytes store holding the serialized documents.
+            index_store: Optional sidecar store (e.g. a local DictStoreSqlite) holding a projection of
+                index_fields for every document. When given, query and count_query are answered by the
+                index and only the matching documents are fetched from the bytes store.
+            index_fields: Field paths (dotted for nested fields) kept in the index.
+            serializer: Serializer for new documents, documents written with other serializers stay readable.
+        """
         super().__init__(store.collection_name)
         self._store: BytesStoreBase = store
+        if (index_store is None) != (index_fields is None):
+            raise ValueError("index_store and index_fields must be given together")
+        self._index_store = index_store
+        self._index_fields: List[str] = list(index_fields or [])
+        self._serializer = get_dict_serializer(serializer)
+        self.supports_json = self._serializer.is_json_text
+        self.supports_ttl = store.supports_ttl
 
-    def mset(self, key_value_pairs: Sequence[tuple[str, dict]]) -> None:
-        key_bytes_pairs: Sequence[tuple[str, bytes]] = [(key, json.dumps(value).encode("utf-8")) for key, value in key_value_pairs]
-        self._store.mset(key_bytes_pairs)
+    def mset(self, key_value_pairs: Sequence[tuple[str, dict]], ttl: Optional[float] = None) -> None:
+        self._check_index_ttl(ttl)
+        ttl_kwargs = {} if ttl is None else {"ttl": ttl}
+        key_bytes_pairs: Sequence[tuple[str, bytes]] = [(key, self._serializer.encode(value)) for key, value in key_value_pairs]
+        self._store.mset(key_bytes_pairs, **ttl_kwargs)  # type: ignore
+        if self._index_store is not None:
+            self._index_store.mset([(key, self._project(value)) for key, value in key_value_pairs], **ttl_kwargs)  # type: ignore
+
+    def _check_index_ttl(self, ttl: Optional[float]) -> None:
+        # index rows expire with their documents, so queries do not count expired documents
+        if ttl is not None and self._index_store is not None and not self._index_store.supports_ttl:
+            raise NotImplementedError(f"Index store {type(self._index_store).__name__} does not support ttl")
 
     def mget(self, keys: Sequence[str]) -> list[Optional[dict]]:
         list_bytes = self._store.mget(keys)
@@ -21,34 +57,125 @@ class DictStoreBytes(DictStoreBase):
             if bytes is None:
                 list_dict.append(None)
             else:
-                list_dict.append(json.loads(bytes))
+                list_dict.append(decode_document(bytes, self._serializer))
         return list_dict
 
+    def mset_json(self, key_json_pairs: Sequence[Tuple[str, Union[str, bytes]]], ttl: Optional[float] = None) -> None:
+        self._check_index_ttl(ttl)
+        ttl_kwargs = {} if ttl is None else {"ttl": ttl}
+        key_bytes_pairs = [
+            (key, document_json.encode("utf-8") if isinstance(document_json, str) else document_json)
+            for key, document_json in key_json_pairs
+        ]
+        self._store.mset(key_bytes_pairs, **ttl_kwargs)  # type: ignore
+        if self._index_store is not None:
+            # the documents are JSON text whatever the serializer of new documents is
+            index_pairs = [(key, self._project(json.loads(document_json))) for key, document_json in key_json_pairs]
+            self._index_store.mset(index_pairs, **ttl_kwargs)  # type: ignore
+
+    def mget_json(self, keys: Sequence[str]) -> List[Optional[Union[str, bytes]]]:
+        return [None if blob is None else document_to_json(blob, self._serializer) for blob in self._store.mget(keys)]
+
+    async def amget(self, keys: Sequence[str]) -> List[Optional[dict]]:
+        # the bytes store fetches natively async where it can (e.g. concurrent S3 downloads)
+        return [None if blob is None else decode_document(blob, self._serializer) for blob in await self._store.amget(keys)]
+
+    async def amget_json(self, keys: Sequence[str]) -> List[Optional[Union[str, bytes]]]:
+        return [None if blob is None else document_to_json(blob, self._serializer) for blob in await self._store.amget(keys)]
+
     def mdelete(self, keys: Sequence[str]) -> None:
-        for key in keys:
-            self._store.mdelete(key)
+        self._store.mdelete(keys)
+        if self._index_store is not None:
+            self._index_store.mdelete(keys)
 
     def yield_keys(self, *, prefix: Optional[str] = None) -> Union[Iterator[str], Iterator[str]]:
-        if prefix is None:
-            return self._store.yield_keys()
-        else:
-            return (key for key in self._store.yield_keys() if key.startswith(prefix))
+        return self._store.yield_keys(prefix=prefix)
+
+    def count(self) -> int:
+        return self._store.count()
+
+    def clear(self) -> None:
+        self._store.clear()
+        if self._index_store is not None:
+            self._index_store.clear()
+
+    def purge_expired(self, batch_size: int = 1000) -> int:
+        if self._index_store is not None:
+            self._index_store.purge_expired(batch_size)
+        return self._store.purge_expired(batch_size)
 
     async def asample(self, count: int) -> List[dict]:
         list_bytes = await self._store.asample(count)
-        return [json.loads(bytes.decode("utf-8")) for bytes in list_bytes]
+        return [decode_document(bytes, self._serializer) for bytes in list_bytes]
+
+    def _project(self, document: dict) -> dict:
+        """Copy the indexed fields of a document, keeping nested fields nested."""
+        projection: dict = {}
+        for field in self._index_fields:
+            value: Any = document
+            for part in field.split("."):
+                if not isinstance(value, dict) or part not in value:
+                    break
+                value = value[part]
+            else:
+                target = projection
+                *parents, leaf = field.split(".")
+                for part in parents:
+                    target = target.setdefault(part, {})
+                target[leaf] = value
+        return projection
+
+    def _get_index_store(self, fields: List[str]) -> DictStoreBase:
+        if self._index_store is None:
+            raise NotImplementedError("Query requires an index_store, none configured")
+        for field in fields:
+            if field not in self._index_fields:
+                raise ValueError(f"Field {field} is not indexed. Use one of {self._index_fields}")
+        return self._index_store
+
+    def rebuild_index(self, batch_size: int = 1000) -> int:
+        """(Re)build the index from the documents in the bytes store, returns the number indexed."""
+        index_store = self._get_index_store([])
+        index_store.mdelete(list(index_store.yield_keys()))
+        count_indexed = 0
+        keys: List[str] = []
+        for key in self._store.yield_keys():
+            keys.append(key)
+            if len(keys) >= batch_size:
+                count_indexed += self._index_batch(index_store, keys)
+                keys = []
+        if keys:
+            count_indexed += self._index_batch(index_store, keys)
+        logger.info(f"Indexed {count_indexed} documents in {self.collection_name}")
+        return count_indexed
+
+    def _index_batch(self, index_store: DictStoreBase, keys: List[str]) -> int:
+        pairs = [(key, self._project(document)) for key, document in zip(keys, self.mget(keys)) if document is not None]
+        index_store.mset(pairs)
+        return len(pairs)
 
     def query(
         self,
-        query: Dict[str, str],
-        order_by: List[Tuple[str, bool]] = [],
+        query: Dict[str, Any],
+        order_by: Optional[List[Tuple[str, bool]]] = None,
         limit: int = 0,
         offset: int = 0,
     ) -> List[dict]:
-        raise NotImplementedError("Not implemented")
+        keys = self.query_keys(query, order_by, limit, offset)
+        return [document for document in self.mget(keys) if document is not None]
+
+    def query_keys(
+        self,
+        query: Dict[str, Any],
+        order_by: Optional[List[Tuple[str, bool]]] = None,
+        limit: int = 0,
+        offset: int = 0,
+    ) -> List[str]:
+        index_store = self._get_index_store([*query.keys(), *(field for field, _ in order_by or [])])
+        return index_store.query_keys(query, order_by, limit, offset)
 
     def count_query(
         self,
-        query: Dict[str, str],
+        query: Dict[str, Any],
     ) -> int:
-        raise NotImplementedError("Not implemented")
+        return self._get_index_store(list(query.keys())).count_query(query)
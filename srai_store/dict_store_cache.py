@@ -1,8 +1,17 @@
-from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+import copy
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar, Union
 
 from pydantic import BaseModel
 
+from srai_store.cache_admission_base import CacheAdmissionBase
+from srai_store.cache_invalidator_base import CacheInvalidatorBase
+from srai_store.cache_negative import CacheNegative
+from srai_store.cache_query import CacheQuery
+from srai_store.cache_write_behind import OPERATION_SET, CacheWriteBehind
 from srai_store.dict_store_base import DictStoreBase
+from srai_store.single_flight import SingleFlight
+from srai_store.store_executor import run_in_store_executor
 
 T = TypeVar("T", bound=BaseModel)
 
@@ -12,49 +21,227 @@ class DictStoreCache(DictStoreBase):
         self,
         dict_store_cache: DictStoreBase,
         dict_store_base: DictStoreBase,
+        read_through: bool = False,
+        admission: Optional[CacheAdmissionBase] = None,
+        negative_cache: Optional[CacheNegative] = None,
+        write_behind: bool = False,
+        write_behind_max_pending: int = 10000,
+        invalidator: Optional[CacheInvalidatorBase] = None,
+        single_flight: bool = False,
+        query_cache: Optional[CacheQuery] = None,
     ) -> None:
+        """Two tier store, reads are served from the cache tier when possible and writes go to both tiers.
+
+        Args:
+            dict_store_cache: The fast tier.
+            dict_store_base: The authoritative tier.
+            read_through: Write documents found in the base tier back to the cache tier, in one batched mset per mget.
+            admission: Decides which read-through keys are written to the cache tier, all of them when None.
+            negative_cache: Remembers keys missing from both tiers, so repeated misses are answered without a base
+                tier round trip. Keys are forgotten when they are set.
+            write_behind: Write to the cache tier at once and queue writes to the base tier for a background thread,
+                call flush or close to wait for them.
+            write_behind_max_pending: Writers block while this many keys are queued for the base tier.
+            invalidator: Channel to other processes sharing the base tier, keys they write are evicted from the cache
+                tier and keys written here are published once they reached the base tier.
+            single_flight: Concurrent mget calls missing the same key in the cache tier share one base tier lookup.
+            query_cache: Caches query and count_query results of the base tier, dropped on every write.
+        """
         if dict_store_cache.collection_name != dict_store_base.collection_name:
             raise ValueError("Collection names must match")
         super().__init__(dict_store_cache.collection_name)
         self.dict_store_cache = dict_store_cache
         self.dict_store_base = dict_store_base
+        self.read_through = read_through
+        self.admission = admission
+        self.negative_cache = negative_cache
+        self.single_flight = SingleFlight() if single_flight else None
+        self.write_behind: Optional[CacheWriteBehind] = None
+        if write_behind:
+            self.write_behind = CacheWriteBehind(
+                self.collection_name, self._mset_base, self._mdelete_base, max_pending=write_behind_max_pending
+            )
+        self.query_cache = query_cache
+        # bumped with every write to the cache tier, read-through skips values read from the base tier before a write
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.invalidator = invalidator
+        if invalidator is not None:
+            invalidator.subscribe(self.collection_name, self._invalidate)
 
     def mset(self, key_value_pairs: Sequence[tuple[str, dict]]) -> None:
-        self.dict_store_cache.mset(key_value_pairs)
+        if self.negative_cache is not None:
+            self.negative_cache.discard([key for key, _ in key_value_pairs])
+        # the base tier (or the write behind queue) first, so a concurrent read-through can not cache an older value
+        if self.write_behind is not None:
+            self.write_behind.mset(key_value_pairs)
+        else:
+            self._mset_base(key_value_pairs)
+        with self._lock:
+            self._generation += 1
+            self.dict_store_cache.mset(key_value_pairs)
+
+    def _mset_base(self, key_value_pairs: Sequence[tuple[str, dict]]) -> None:
         self.dict_store_base.mset(key_value_pairs)
+        if self.query_cache is not None:
+            self.query_cache.invalidate()
+        if self.invalidator is not None:
+            self.invalidator.publish(self.collection_name, [key for key, _ in key_value_pairs])
 
     def mget(self, keys: Sequence[str]) -> List[Optional[dict]]:
-        results_dict: Dict[str, dict] = {}
         # first try to get the results from the cache
+        results_dict, ids_not_found, generation = self._mget_cache(keys)
+
+        # then try to get the results from the base
+        if len(ids_not_found) > 0:
+            if self.single_flight is not None:
+                results_base = self.single_flight.do_many(ids_not_found, self._load_base)
+            else:
+                results_base = self._load_base(ids_not_found)
+            self._add_results_base(results_dict, ids_not_found, results_base, generation)
+
+        # then turn it back into a list with the same order as the keys
+        return [results_dict.get(key) for key in keys]
+
+    async def amget(self, keys: Sequence[str]) -> List[Optional[dict]]:
+        if self.single_flight is None:
+            return await super().amget(keys)
+        results_dict, ids_not_found, generation = await run_in_store_executor(self._mget_cache, keys)
+        if len(ids_not_found) > 0:
+            # coroutines missing the same key share one base tier lookup
+            results_base = await self.single_flight.ado_many(ids_not_found, self._aload_base)
+            self._add_results_base(results_dict, ids_not_found, results_base, generation)
+        return [results_dict.get(key) for key in keys]
+
+    def _mget_cache(self, keys: Sequence[str]) -> Tuple[Dict[str, dict], List[str], Optional[int]]:
+        """Get keys from the cache tier, returns the results, the keys not found and the negative cache generation."""
+        generation = None
+        if self.negative_cache is not None:
+            generation = self.negative_cache.generation()
+            keys = [key for key in keys if not self.negative_cache.contains(key)]
+        results_dict: Dict[str, dict] = {}
         ids_not_found: List[str] = []
-        results_cache = self.dict_store_cache.mget(keys)
+        results_cache = self.dict_store_cache.mget(keys) if keys else []
         for key, result_cache in zip(keys, results_cache):
+            if self.admission is not None:
+                self.admission.record(key)
             if result_cache is not None:
                 results_dict[key] = result_cache
             else:
                 ids_not_found.append(key)
+        return results_dict, ids_not_found, generation
 
-        # then try to get the results from the base
-        if len(ids_not_found) > 0:
-            results_base = self.dict_store_base.mget(ids_not_found)
-            for key, result_base in zip(ids_not_found, results_base):
+    def _add_results_base(
+        self,
+        results_dict: Dict[str, dict],
+        ids_not_found: List[str],
+        results_base: Dict[str, Optional[dict]],
+        generation: Optional[int],
+    ) -> None:
+        results_dict.update({key: value for key, value in results_base.items() if value is not None})
+        if self.negative_cache is not None:
+            self.negative_cache.add([key for key in ids_not_found if key not in results_dict], generation)
+
+    def _load_base(self, keys: List[str]) -> Dict[str, dict]:
+        """Get keys from the base tier and populate the cache tier with them in read-through mode."""
+        generation = self._generation
+        results_base = self._mget_base(keys)
+        if self.read_through:
+            self._populate_cache(list(results_base.items()), generation)
+        return results_base
+
+    async def _aload_base(self, keys: List[str]) -> Dict[str, dict]:
+        return await run_in_store_executor(self._load_base, keys)
+
+    def _mget_base(self, keys: List[str]) -> Dict[str, dict]:
+        results_base: Dict[str, dict] = {}
+        if self.write_behind is not None:
+            # writes still queued for the base tier are newer than what it holds
+            pending = self.write_behind.lookup(keys)
+            results_base = {key: value for key, (operation, value) in pending.items() if operation == OPERATION_SET}
+            keys = [key for key in keys if key not in pending]
+        if keys:
+            for key, result_base in zip(keys, self.dict_store_base.mget(keys)):
                 if result_base is not None:
-                    results_dict[key] = result_base
+                    results_base[key] = result_base
+        return results_base
 
-        # then turn it back into a list with the same order as the keys
-        results_list: List[Optional[dict]] = []
-        for key in keys:
-            if key in results_dict:
-                results_list.append(results_dict[key])
-            else:
-                results_list.append(None)
-        return results_list
+    def _populate_cache(self, key_value_pairs: List[Tuple[str, dict]], generation: int) -> None:
+        if self.admission is not None:
+            key_value_pairs = [(key, value) for key, value in key_value_pairs if self.admission.admit(key, value)]
+        if key_value_pairs:
+            with self._lock:
+                # a write or invalidation since the base tier read, the values may be stale
+                if generation != self._generation:
+                    return
+                self.dict_store_cache.mset(key_value_pairs)
 
     def mdelete(self, keys: Sequence[str]) -> None:
-        self.dict_store_cache.mdelete(keys)
+        generation = self.negative_cache.generation() if self.negative_cache is not None else None
+        if self.write_behind is not None:
+            self.write_behind.mdelete(keys)
+        else:
+            self._mdelete_base(keys)
+        with self._lock:
+            self._generation += 1
+            self.dict_store_cache.mdelete(keys)
+        if self.negative_cache is not None:
+            self.negative_cache.add(keys, generation)
+
+    def _mdelete_base(self, keys: Sequence[str]) -> None:
         self.dict_store_base.mdelete(keys)
+        if self.query_cache is not None:
+            self.query_cache.invalidate()
+        if self.invalidator is not None:
+            self.invalidator.publish(self.collection_name, keys)
+
+    def mupdate(self, keys_or_query: Union[Sequence[str], Dict[str, Any]], update: Dict[str, Dict[str, Any]]) -> int:
+        """Update in the base tier and evict the updated keys from the cache tier.
+
+        A query is passed to the base tier as is, so it is applied in one update there. The matching keys are
+        looked up before the update, only to know which cached entries to evict.
+        """
+        self.flush()
+        if isinstance(keys_or_query, dict):
+            keys = self.dict_store_base.query_keys(keys_or_query)
+        else:
+            keys = list(keys_or_query)
+            if not keys:
+                return 0
+        count_updated = self.dict_store_base.mupdate(keys_or_query, update)
+        self._invalidate(keys)
+        if self.invalidator is not None:
+            self.invalidator.publish(self.collection_name, keys)
+        return count_updated
+
+    def _invalidate(self, keys: Optional[List[str]]) -> None:
+        """Evict keys another process changed, everything when keys is None."""
+        if self.query_cache is not None:
+            self.query_cache.invalidate()
+        with self._lock:
+            self._generation += 1
+            if keys is None:
+                self.dict_store_cache.clear()
+            else:
+                self.dict_store_cache.mdelete(keys)
+        if self.negative_cache is not None:
+            if keys is None:
+                self.negative_cache.clear()
+            else:
+                self.negative_cache.discard(keys)
+
+    def flush(self) -> None:
+        """Wait until queued writes reached the base tier, raises WriteBehindError for writes that failed."""
+        if self.write_behind is not None:
+            self.write_behind.flush()
+
+    def close(self) -> None:
+        """Flush queued writes and stop the write behind thread."""
+        if self.write_behind is not None:
+            self.write_behind.close()
 
     def yield_keys(self, *, prefix: Optional[str] = None) -> Iterator[str]:
+        self.flush()
         return self.dict_store_base.yield_keys(prefix=prefix)
 
     async def asample(self, count: int) -> List[dict]:
@@ -68,7 +255,32 @@ class DictStoreCache(DictStoreBase):
         limit: int = 0,
         offset: int = 0,
     ) -> List[dict]:
-        return self.dict_store_base.query(query, order_by, limit, offset)
+        self.flush()
+        if self.query_cache is None:
+            return self.dict_store_base.query(query, order_by, limit, offset)
+        key = CacheQuery.get_key("query", query, order_by, limit, offset)
+        found, result = self.query_cache.get(key)
+        if not found:
+            generation = self.query_cache.generation()
+            result = self.dict_store_base.query(query, order_by, limit, offset)
+            self.query_cache.set(key, result, generation)
+        # a copy so callers can not change the cached documents
+        return copy.deepcopy(result)
+
+    def count_query(
+        self,
+        query: Dict[str, Any],
+    ) -> int:
+        self.flush()
+        if self.query_cache is None:
+            return self.dict_store_base.count_query(query)
+        key = CacheQuery.get_key("count_query", query)
+        found, result = self.query_cache.get(key)
+        if not found:
+            generation = self.query_cache.generation()
+            result = self.dict_store_base.count_query(query)
+            self.query_cache.set(key, result, generation)
+        return result
 
     def validate_all(self, verbose: bool = False) -> int:
         raise NotImplementedError("Not implemented")
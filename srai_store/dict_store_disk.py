@@ -1,17 +1,19 @@
-import json
-from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 from srai_store.bytes_store_disk import BytesStoreDisk
+from srai_store.dict_serializer_registry import decode_document, document_to_json, get_dict_serializer
 from srai_store.dict_store_base import DictStoreBase
 
 
 class DictStoreDisk(DictStoreBase):
-    def __init__(self, collection_name: str, path_dir_store: str) -> None:
+    def __init__(self, collection_name: str, path_dir_store: str, serializer: str = "json") -> None:
         super().__init__(collection_name)
+        self._serializer = get_dict_serializer(serializer)
         self._bytes_store = BytesStoreDisk(collection_name, path_dir_store)
+        self.supports_json = self._serializer.is_json_text
 
     def mset(self, key_value_pairs: Sequence[tuple[str, dict]]) -> None:
-        key_bytes_pairs = [(key, json.dumps(value).encode("utf-8")) for key, value in key_value_pairs]
+        key_bytes_pairs = [(key, self._serializer.encode(value)) for key, value in key_value_pairs]
         self._bytes_store.mset(key_bytes_pairs)
 
     def mget(self, keys: Sequence[str]) -> list[Optional[dict]]:
@@ -21,9 +23,19 @@ class DictStoreDisk(DictStoreBase):
             if blob is None:
                 list_dict.append(None)
             else:
-                list_dict.append(json.loads(blob.decode("utf-8")))
+                list_dict.append(decode_document(blob, self._serializer))
         return list_dict
 
+    def mset_json(self, key_json_pairs: Sequence[Tuple[str, Union[str, bytes]]]) -> None:
+        key_bytes_pairs = [
+            (key, document_json.encode("utf-8") if isinstance(document_json, str) else document_json)
+            for key, document_json in key_json_pairs
+        ]
+        self._bytes_store.mset(key_bytes_pairs)
+
+    def mget_json(self, keys: Sequence[str]) -> List[Optional[Union[str, bytes]]]:
+        return [None if blob is None else document_to_json(blob, self._serializer) for blob in self._bytes_store.mget(keys)]
+
     def mdelete(self, keys: Sequence[str]) -> None:
         self._bytes_store.mdelete(keys)
 
@@ -32,7 +44,7 @@ class DictStoreDisk(DictStoreBase):
 
     async def asample(self, count: int) -> List[dict]:
         list_blob = await self._bytes_store.asample(count)
-        return [json.loads(blob.decode("utf-8")) for blob in list_blob]
+        return [decode_document(blob, self._serializer) for blob in list_blob]
 
     def query(
         self,
@@ -42,3 +54,9 @@ class DictStoreDisk(DictStoreBase):
         offset: int = 0,
     ) -> List[dict]:
         raise NotImplementedError("Not implemented")
+
+    def count_query(
+        self,
+        query: Dict[str, Any],
+    ) -> int:
+        raise NotImplementedError("Not implemented")
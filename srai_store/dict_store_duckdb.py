@@ -1,17 +1,27 @@
 import json
+import random
 import re
+import time
 from contextlib import contextmanager
 from pathlib import Path
 from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 import duckdb
 
+from srai_store.dict_serializer_registry import get_dict_serializer
 from srai_store.dict_store_base import DictStoreBase
+from srai_store.dict_update import apply_update, validate_update
+from srai_store.store_executor import run_in_store_executor
+from srai_store.store_sampling import allocate_strata
 
 
 class DictStoreDuckdb(DictStoreBase):
-    def __init__(self, collection_name: str, path_file_database: Path) -> None:
+    supports_json = True
+    supports_ttl = True
+
+    def __init__(self, collection_name: str, path_file_database: Path, serializer: str = "json") -> None:
         super().__init__(collection_name)
+        self._serializer = get_dict_serializer(serializer, json_text=True)
         self.path_file_database = path_file_database
         abs_path = self.path_file_database.absolute()
         parent_dir = abs_path.parent
@@ -29,6 +39,10 @@ class DictStoreDuckdb(DictStoreBase):
                 )
                 """
             )
+            columns = [row[0] for row in conn.execute("DESCRIBE store").fetchall()]
+            if "expires_at" not in columns:
+                conn.execute("ALTER TABLE store ADD COLUMN expires_at DOUBLE")
+            conn.execute("CREATE INDEX IF NOT EXISTS store_expires_at ON store (expires_at)")
 
     @contextmanager
     def _get_connection(self):
@@ -49,21 +63,30 @@ class DictStoreDuckdb(DictStoreBase):
 
     _QUERY_OPS = frozenset(("$eq", "$ne", "$lt", "$lte", "$gt", "$gte", "$in"))
 
-    @staticmethod
-    def _document_from_row(document: Any) -> dict:
+    # condition on rows that have not expired, takes the current time as parameter
+    _LIVE = "(expires_at IS NULL OR expires_at > ?)"
+
+    def _document_from_row(self, document: Any) -> dict:
         if isinstance(document, dict):
             return document
         if isinstance(document, str):
-            return json.loads(document)
-        return json.loads(str(document))
+            return self._serializer.loads(document)
+        return self._serializer.loads(str(document))
+
+    def mset(self, key_value_pairs: Sequence[tuple[str, dict]], ttl: Optional[float] = None) -> None:
+        """Set documents, with ttl they expire after that many seconds."""
+        self.mset_json([(key, self._serializer.dumps(document).decode("utf-8")) for key, document in key_value_pairs], ttl)
 
-    def mset(self, key_value_pairs: Sequence[tuple[str, dict]]) -> None:
+    def mset_json(self, key_json_pairs: Sequence[Tuple[str, Union[str, bytes]]], ttl: Optional[float] = None) -> None:
+        expires_at = None if ttl is None else time.time() + ttl
         with self._get_connection() as conn:
-            for key, document in key_value_pairs:
+            for key, document_json in key_json_pairs:
                 self._validate_key(key)
+                if isinstance(document_json, bytes):
+                    document_json = document_json.decode("utf-8")
                 conn.execute(
-                    "INSERT OR REPLACE INTO store (key, document) VALUES (?, ?)",
-                    [key, json.dumps(document)],
+                    "INSERT OR REPLACE INTO store (key, document, expires_at) VALUES (?, ?, ?)",
+                    [key, document_json, expires_at],
                 )
 
     def mget(self, keys: Sequence[str]) -> List[Optional[dict]]:
@@ -74,12 +97,26 @@ class DictStoreDuckdb(DictStoreBase):
         placeholders = ",".join("?" * len(keys))
         with self._get_connection() as conn:
             rows = conn.execute(
-                f"SELECT key, document FROM store WHERE key IN ({placeholders})",
-                list(keys),
+                f"SELECT key, document FROM store WHERE key IN ({placeholders}) AND {self._LIVE}",
+                [*keys, time.time()],
             ).fetchall()
             key_to_doc = {row[0]: self._document_from_row(row[1]) if row[1] is not None else None for row in rows}
         return [key_to_doc.get(k) for k in keys]
 
+    def mget_json(self, keys: Sequence[str]) -> List[Optional[Union[str, bytes]]]:
+        if not keys:
+            return []
+        for key in keys:
+            self._validate_key(key)
+        placeholders = ",".join("?" * len(keys))
+        with self._get_connection() as conn:
+            rows = conn.execute(
+                f"SELECT key, CAST(document AS VARCHAR) FROM store WHERE key IN ({placeholders}) AND {self._LIVE}",
+                [*keys, time.time()],
+            ).fetchall()
+            key_to_json = {row[0]: row[1] for row in rows}
+        return [key_to_json.get(k) for k in keys]
+
     def mdelete(self, keys: Sequence[str]) -> None:
         if not keys:
             return
@@ -89,16 +126,119 @@ class DictStoreDuckdb(DictStoreBase):
         with self._get_connection() as conn:
             conn.execute(f"DELETE FROM store WHERE key IN ({placeholders})", list(keys))
 
+    def mupdate(self, keys_or_query: Union[Sequence[str], Dict[str, Any]], update: Dict[str, Dict[str, Any]]) -> int:
+        """Update documents in place with json_merge_patch, in one transaction that keeps the ttl of the documents.
+
+        A merge patch can not set null, updates that $set null values read, modify and write the documents
+        in the transaction instead. Raises ValueError without updating anything when $inc hits a non-numeric field.
+        """
+        validate_update(update)
+        if isinstance(keys_or_query, dict):
+            where_clause, where_params = self._build_json_query(keys_or_query)
+        else:
+            keys = list(keys_or_query)
+            if not keys:
+                return 0
+            for key in keys:
+                self._validate_key(key)
+            where_clause, where_params = f"key IN ({','.join('?' * len(keys))})", keys
+        now = time.time()
+        with self._get_connection() as conn:
+            conn.execute("BEGIN TRANSACTION")
+            if self._contains_null(list(update.get("$set", {}).values())):
+                count_updated = self._mupdate_read_modify_write(conn, where_clause, [now, *where_params], update)
+            else:
+                for field in update.get("$inc", {}):
+                    path = self._json_path(field)
+                    row = conn.execute(
+                        f"SELECT key FROM store WHERE {self._LIVE} AND {where_clause} "
+                        "AND json_type(document, ?) IS NOT NULL AND json_type(document, ?) NOT IN ('BIGINT', 'UBIGINT', 'DOUBLE') LIMIT 1",
+                        [now, *where_params, path, path],
+                    ).fetchone()
+                    if row:
+                        raise ValueError(f"Can not $inc non-numeric field {field} of {row[0]}")
+                expression, expression_params = self._build_update(update)
+                row = conn.execute(
+                    f"UPDATE store SET document = {expression} WHERE {self._LIVE} AND {where_clause}",
+                    [*expression_params, now, *where_params],
+                ).fetchone()
+                count_updated = row[0] if row else 0
+            conn.execute("COMMIT")
+        return count_updated
+
+    def _mupdate_read_modify_write(self, conn: Any, where_clause: str, params: List[Any], update: Dict[str, Dict[str, Any]]) -> int:
+        rows = conn.execute(f"SELECT key, document FROM store WHERE {self._LIVE} AND {where_clause}", params).fetchall()
+        for key, document in rows:
+            document_updated = apply_update(self._document_from_row(document), update)
+            conn.execute("UPDATE store SET document = ? WHERE key = ?", [self._serializer.dumps(document_updated).decode("utf-8"), key])
+        return len(rows)
+
+    @classmethod
+    def _contains_null(cls, value: Any) -> bool:
+        if value is None:
+            return True
+        if isinstance(value, dict):
+            return cls._contains_null(list(value.values()))
+        if isinstance(value, list):
+            return any(cls._contains_null(item) for item in value)
+        return False
+
+    def _build_update(self, update: Dict[str, Dict[str, Any]]) -> tuple[str, list[Any]]:
+        """Build the expression of the new document as json_merge_patch of the document with one patch per change.
+
+        Patches that remove a field only apply when it exists, so $unset does not create empty parents,
+        and object values of $set first remove the old object so they replace it instead of merging into it.
+        """
+        patches: list[str] = []
+        params: list[Any] = []
+        for field in update.get("$unset", {}):
+            patches.append("CASE WHEN json_exists(document, ?) THEN ?::JSON ELSE '{}'::JSON END")
+            params.extend([self._json_path(field), json.dumps(self._nested_patch(field, None))])
+        for field, value in update.get("$set", {}).items():
+            if isinstance(value, dict):
+                patches.append("?::JSON")
+                params.append(json.dumps(self._nested_patch(field, None)))
+            patches.append("?::JSON")
+            params.append(json.dumps(self._nested_patch(field, value)))
+        for field, value in update.get("$inc", {}).items():
+            path = self._json_path(field)
+            increment_double = "to_json(COALESCE(json_extract(document, ?)::DOUBLE, 0) + ?)"
+            if isinstance(value, int):
+                # integers stay integers unless the field holds a double
+                increment = (
+                    "CASE WHEN json_type(document, ?) = 'DOUBLE' "
+                    f"THEN {increment_double} "
+                    "ELSE to_json(COALESCE(json_extract(document, ?)::BIGINT, 0) + ?) END"
+                )
+                increment_params = [path, path, value, path, value]
+            else:
+                increment = increment_double
+                increment_params = [path, value]
+            names = field.split(".")
+            patch = increment
+            for _ in names:
+                patch = f"json_object(?, {patch})"
+            patches.append(patch)
+            params.extend([*names, *increment_params])
+        return f"json_merge_patch(document, {', '.join(patches)})", params
+
+    @staticmethod
+    def _nested_patch(field: str, value: Any) -> dict:
+        patch = value
+        for name in reversed(field.split(".")):
+            patch = {name: patch}
+        return patch
+
     def yield_keys(self, *, prefix: Optional[str] = None) -> Union[Iterator[str], Iterator[str]]:
         with self._get_connection() as conn:
             if prefix:
                 self._validate_key(prefix)
                 rows = conn.execute(
-                    "SELECT key FROM store WHERE key LIKE ?",
-                    [f"{prefix}%"],
+                    f"SELECT key FROM store WHERE key LIKE ? AND {self._LIVE}",
+                    [f"{prefix}%", time.time()],
                 ).fetchall()
             else:
-                rows = conn.execute("SELECT key FROM store").fetchall()
+                rows = conn.execute(f"SELECT key FROM store WHERE {self._LIVE}", [time.time()]).fetchall()
             for row in rows:
                 yield row[0]
 
@@ -106,13 +246,69 @@ class DictStoreDuckdb(DictStoreBase):
         with self._get_connection() as conn:
             conn.execute("DELETE FROM store")
 
-    async def asample(self, count: int) -> List[dict]:
+    def purge_expired(self, batch_size: int = 1000) -> int:
+        """Delete expired documents in batches of batch_size, returns the number deleted."""
+        count_deleted = 0
+        while True:
+            with self._get_connection() as conn:
+                row = conn.execute(
+                    "DELETE FROM store WHERE key IN (SELECT key FROM store WHERE expires_at <= ? LIMIT ?)",
+                    [time.time(), batch_size],
+                ).fetchone()
+            count_batch = row[0] if row else 0
+            count_deleted += count_batch
+            if count_batch < batch_size:
+                return count_deleted
+
+    async def asample(self, count: int, stratify_by: Optional[str] = None) -> List[dict]:
+        """Sample documents uniformly at random, or equally from every value of the stratify_by field.
+
+        Keys are reservoir sampled from the key column, so the documents of unsampled rows are never read.
+        """
+        return await run_in_store_executor(self._sample, count, stratify_by)
+
+    def _sample(self, count: int, stratify_by: Optional[str] = None) -> List[dict]:
+        if stratify_by is not None:
+            return self._sample_stratified(count, stratify_by)
+        with self._get_connection() as conn:
+            keys = conn.execute(
+                f"SELECT key FROM (SELECT key FROM store WHERE {self._LIVE}) USING SAMPLE reservoir({int(count)} ROWS)",
+                [time.time()],
+            ).fetchall()
+            if not keys:
+                return []
+            placeholders = ",".join("?" * len(keys))
+            rows = conn.execute(f"SELECT document FROM store WHERE key IN ({placeholders})", [row[0] for row in keys]).fetchall()
+        random.shuffle(rows)
+        return [self._document_from_row(row[0]) for row in rows if row[0] is not None]
+
+    def _sample_stratified(self, count: int, stratify_by: str) -> List[dict]:
+        """Sample equally from every value of the stratify_by field, this scans the field twice."""
+        path = self._json_path(stratify_by)
+        now = time.time()
         with self._get_connection() as conn:
             rows = conn.execute(
-                "SELECT document FROM store ORDER BY random() LIMIT ?",
-                [count],
+                f"SELECT json_extract_string(document, ?) AS value, COUNT(*) FROM store WHERE {self._LIVE} GROUP BY value",
+                [path, now],
             ).fetchall()
-            return [self._document_from_row(row[0]) for row in rows if row[0] is not None]
+            quotas = [(value, n) for value, n in allocate_strata(dict(rows), count).items() if n > 0]
+            if not quotas:
+                return []
+            values_clause = ",".join("(CAST(? AS VARCHAR), CAST(? AS BIGINT))" for _ in quotas)
+            rows = conn.execute(
+                f"""
+                WITH quota(value, n) AS (VALUES {values_clause})
+                SELECT ranked.document FROM (
+                    SELECT document, json_extract_string(document, ?) AS value,
+                        ROW_NUMBER() OVER (PARTITION BY json_extract_string(document, ?) ORDER BY random()) AS rn
+                    FROM store WHERE {self._LIVE}
+                ) AS ranked JOIN quota ON ranked.value IS NOT DISTINCT FROM quota.value
+                WHERE ranked.rn <= quota.n
+                """,
+                [*(item for quota in quotas for item in quota), path, path, now],
+            ).fetchall()
+        random.shuffle(rows)
+        return [self._document_from_row(row[0]) for row in rows if row[0] is not None]
 
     def _json_path(self, field: str) -> str:
         return "$." + field
@@ -204,17 +400,34 @@ class DictStoreDuckdb(DictStoreBase):
         limit_clause = f" LIMIT {limit}" if limit > 0 else ""
         offset_clause = f" OFFSET {offset}" if offset > 0 else ""
 
-        sql = f"SELECT document FROM store WHERE {where_clause}{order_clause}{limit_clause}{offset_clause}"
+        sql = f"SELECT document FROM store WHERE {self._LIVE} AND {where_clause}{order_clause}{limit_clause}{offset_clause}"
         with self._get_connection() as conn:
-            rows = conn.execute(sql, params).fetchall()
+            rows = conn.execute(sql, [time.time(), *params]).fetchall()
             return [self._document_from_row(row[0]) for row in rows if row[0] is not None]
 
+    def query_keys(
+        self,
+        query: Dict[str, Any],
+        order_by: Optional[List[Tuple[str, bool]]] = None,
+        limit: int = 0,
+        offset: int = 0,
+    ) -> List[str]:
+        where_clause, params = self._build_json_query(query)
+        order_clause = self._build_order_by(order_by or [])
+        limit_clause = f" LIMIT {limit}" if limit > 0 else ""
+        offset_clause = f" OFFSET {offset}" if offset > 0 else ""
+
+        sql = f"SELECT key FROM store WHERE {self._LIVE} AND {where_clause}{order_clause}{limit_clause}{offset_clause}"
+        with self._get_connection() as conn:
+            rows = conn.execute(sql, [time.time(), *params]).fetchall()
+            return [row[0] for row in rows]
+
     def count_query(
         self,
         query: Dict[str, Any],
     ) -> int:
         where_clause, params = self._build_json_query(query)
-        sql = f"SELECT COUNT(*) FROM store WHERE {where_clause}"
+        sql = f"SELECT COUNT(*) FROM store WHERE {self._LIVE} AND {where_clause}"
         with self._get_connection() as conn:
-            row = conn.execute(sql, params).fetchone()
+            row = conn.execute(sql, [time.time(), *params]).fetchone()
             return row[0] if row else 0
@@ -0,0 +1,182 @@
+import json
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from srai_store.cache_admission_tiny_lfu import CacheAdmissionTinyLfu
+from srai_store.dict_store_base import DictStoreBase
+
+logger = logging.getLogger(__name__)
+
+
+class DictStoreLru(DictStoreBase):
+    supports_ttl = True
+
+    def __init__(
+        self,
+        collection_name: str,
+        max_entries: Optional[int] = 10000,
+        max_bytes: Optional[int] = None,
+        default_ttl: Optional[float] = None,
+        admission: Optional[CacheAdmissionTinyLfu] = None,
+    ) -> None:
+        """Bounded in-process dict store with LRU eviction, meant as the fast tier of DictStoreCache.
+
+        Documents are kept by reference, callers should not mutate documents they set or get.
+
+        Args:
+            collection_name: Name of the collection.
+            max_entries: Maximum number of documents, None for no limit.
+            max_bytes: Maximum total size of the documents (measured as JSON length), None for no limit.
+            default_ttl: Seconds a document stays valid when mset is called without ttl, None to never expire.
+            admission: When full, a new key only replaces the least recently used one if it is looked up more
+                often (W-TinyLFU style), so scans do not flush hot entries. Lookups are recorded by mget.
+        """
+        super().__init__(collection_name)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.admission = admission
+        # key -> (document, expires_at, size), least recently used first
+        self._entries: "OrderedDict[str, Tuple[dict, Optional[float], int]]" = OrderedDict()
+        self._size_total = 0
+        self._lock = threading.Lock()
+        self.count_hit = 0
+        self.count_miss = 0
+        self.count_eviction = 0
+        self.count_expired = 0
+        self.count_rejected = 0
+
+    def _get_size(self, document: dict) -> int:
+        if self.max_bytes is None:
+            return 0
+        return len(json.dumps(document, default=str))
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size_total -= entry[2]
+
+    def _evict(self) -> None:
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self._size_total > self.max_bytes)
+        ):
+            _, (_, _, size) = self._entries.popitem(last=False)
+            self._size_total -= size
+            self.count_eviction += 1
+
+    def _is_full(self, size: int) -> bool:
+        return (self.max_entries is not None and len(self._entries) >= self.max_entries) or (
+            self.max_bytes is not None and self._size_total + size > self.max_bytes
+        )
+
+    def mset(self, key_value_pairs: Sequence[tuple[str, dict]], ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            for key, document in key_value_pairs:
+                size = self._get_size(document)
+                if self.admission is not None and key not in self._entries and self._is_full(size):
+                    key_victim = next(iter(self._entries))
+                    if not self.admission.admit_over(key, key_victim):
+                        self.count_rejected += 1
+                        continue
+                self._remove(key)
+                self._entries[key] = (document, expires_at, size)
+                self._size_total += size
+            self._evict()
+
+    def set(self, key: str, value: dict, ttl: Optional[float] = None) -> None:
+        self.mset([(key, value)], ttl=ttl)
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[dict]]:
+        now = time.monotonic()
+        results: List[Optional[dict]] = []
+        with self._lock:
+            for key in keys:
+                if self.admission is not None:
+                    self.admission.record(key)
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] is not None and entry[1] <= now:
+                    self._remove(key)
+                    self.count_expired += 1
+                    entry = None
+                if entry is None:
+                    self.count_miss += 1
+                    results.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    self.count_hit += 1
+                    results.append(entry[0])
+        return results
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._remove(key)
+
+    def purge_expired(self, batch_size: int = 1000) -> int:
+        now = time.monotonic()
+        with self._lock:
+            keys_expired = [key for key, (_, expires_at, _) in self._entries.items() if expires_at is not None and expires_at <= now]
+            for key in keys_expired:
+                self._remove(key)
+            self.count_expired += len(keys_expired)
+        return len(keys_expired)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size_total = 0
+
+    def _live_items(self) -> List[Tuple[str, dict]]:
+        now = time.monotonic()
+        with self._lock:
+            return [(key, document) for key, (document, expires_at, _) in self._entries.items() if expires_at is None or expires_at > now]
+
+    def yield_keys(self, *, prefix: Optional[str] = None) -> Union[Iterator[str], Iterator[str]]:
+        keys = [key for key, _ in self._live_items()]
+        if prefix is None:
+            return iter(keys)
+        return (key for key in keys if key.startswith(prefix))
+
+    def count(self) -> int:
+        return len(self._live_items())
+
+    async def asample(self, count: int) -> List[dict]:
+        documents = [document for _, document in self._live_items()]
+        return random.sample(documents, min(count, len(documents)))
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss, eviction and expiry counters plus the current size."""
+        with self._lock:
+            count_lookup = self.count_hit + self.count_miss
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size_total if self.max_bytes is not None else None,
+                "hits": self.count_hit,
+                "misses": self.count_miss,
+                "hit_rate": self.count_hit / count_lookup if count_lookup else 0.0,
+                "evictions": self.count_eviction,
+                "rejected": self.count_rejected,
+                "expired": self.count_expired,
+            }
+
+    def query(
+        self,
+        query: Dict[str, Any],
+        order_by: Optional[List[Tuple[str, bool]]] = None,
+        limit: int = 0,
+        offset: int = 0,
+    ) -> List[dict]:
+        raise NotImplementedError("Not implemented")
+
+    def count_query(
+        self,
+        query: Dict[str, Any],
+    ) -> int:
+        raise NotImplementedError("Not implemented")
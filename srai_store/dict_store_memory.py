@@ -1,5 +1,5 @@
 import random
-from typing import Dict, Iterator, List, Optional, Sequence, Union
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 from srai_store.dict_store_base import DictStoreBase
 
@@ -13,11 +13,11 @@ class DictStoreMemory(DictStoreBase):
         self._dict.update(key_value_pairs)
 
     def mget(self, keys: Sequence[str]) -> list[Optional[dict]]:
-        return [self._dict[key] for key in keys]
+        return [self._dict.get(key) for key in keys]
 
     def mdelete(self, keys: Sequence[str]) -> None:
         for key in keys:
-            self._dict.pop(key)
+            self._dict.pop(key, None)
 
     def yield_keys(self, *, prefix: Optional[str] = None) -> Union[Iterator[str], Iterator[str]]:
         if prefix is None:
@@ -26,4 +26,19 @@ class DictStoreMemory(DictStoreBase):
             return (key for key in self._dict.keys() if key.startswith(prefix))
 
     async def asample(self, count: int) -> List[dict]:
-        return random.sample(list(self._dict.values()), count)
+        return random.sample(list(self._dict.values()), min(count, len(self._dict)))
+
+    def query(
+        self,
+        query: Dict[str, Any],
+        order_by: Optional[List[Tuple[str, bool]]] = None,
+        limit: int = 0,
+        offset: int = 0,
+    ) -> List[dict]:
+        raise NotImplementedError("Not implemented")
+
+    def count_query(
+        self,
+        query: Dict[str, Any],
+    ) -> int:
+        raise NotImplementedError("Not implemented")
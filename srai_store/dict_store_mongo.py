@@ -1,29 +1,77 @@
 import logging
 import re
-from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 from pymongo import MongoClient
 from pymongo.command_cursor import CommandCursor as PymongoCommandCursor
 
 from srai_store.dict_store_base import DictStoreBase
+from srai_store.dict_update import validate_update
+from srai_store.store_executor import run_in_store_executor
 
 logger = logging.getLogger(__name__)
 
 
 class DictStoreMongo(DictStoreBase):
-    def __init__(self, collection_name: str, client: MongoClient, database_name: str) -> None:
+    supports_ttl = True
+
+    def __init__(
+        self,
+        collection_name: str,
+        client: MongoClient,
+        database_name: str,
+        get_async_client: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        """
+        Args:
+            get_async_client: Optional, returns a pymongo AsyncMongoClient for the running event loop (an
+                AsyncMongoClient can only be used on the loop it first ran on). The async methods use it
+                instead of running the blocking client on the store executor.
+        """
         super().__init__(collection_name)
         self.client: MongoClient = client
         # self.client.admin.command('ping')
         self.database = self.client[database_name]
         self.collection = self.database[self.collection_name]
+        self.database_name = database_name
+        self._get_async_client = get_async_client
+        self._ttl_index_created = False
+
+    @property
+    def async_collection(self) -> Any:
+        """The collection on the async client of the running event loop, None without an async client."""
+        if self._get_async_client is None:
+            return None
+        async_client = self._get_async_client()
+        return None if async_client is None else async_client[self.database_name][self.collection_name]
 
-    def mset(self, key_value_pairs: Sequence[tuple[str, dict]]) -> None:
+    def _live(self) -> Dict[str, Any]:
+        """Filter on documents that have not expired, Mongo's TTL monitor only deletes them about once a minute."""
+        return {"expires_at": {"$not": {"$lte": datetime.now(timezone.utc)}}}
+
+    def _ensure_ttl_index(self) -> None:
+        if not self._ttl_index_created:
+            self.collection.create_index("expires_at", expireAfterSeconds=0)
+            self._ttl_index_created = True
+
+    def mset(self, key_value_pairs: Sequence[tuple[str, dict]], ttl: Optional[float] = None) -> None:
+        """Set documents, with ttl they expire after that many seconds (through a Mongo TTL index)."""
+        if ttl is not None:
+            self._ensure_ttl_index()
+        operations = self._replace_operations(key_value_pairs, ttl)
+        if operations:
+            self.collection.bulk_write(operations)
+
+    def _replace_operations(self, key_value_pairs: Sequence[tuple[str, dict]], ttl: Optional[float]) -> List[Any]:
         from pymongo import ReplaceOne
 
+        expires_at = None if ttl is None else datetime.now(timezone.utc) + timedelta(seconds=ttl)
         operations = []
         for key, value in key_value_pairs:
             document = {"_id": key, "document": value}
+            if expires_at is not None:
+                document["expires_at"] = expires_at
             operations.append(
                 ReplaceOne(
                     {"_id": key},  # filter
@@ -31,17 +79,15 @@ class DictStoreMongo(DictStoreBase):
                     upsert=True,  # upsert if not found
                 )
             )
-
-        if operations:
-            self.collection.bulk_write(operations)
+        return operations
 
     def count(self) -> int:
         print(f"Counting documents in {self.collection_name}")
-        return self.collection.count_documents({})
+        return self.collection.count_documents(self._live())
 
     def _to_mongo_query(self, query: Dict[str, Any]) -> Dict[str, Any]:
         """Convert our query format to Mongo's (prepend document. to fields)."""
-        mongo_query: Dict[str, Any] = {}
+        mongo_query: Dict[str, Any] = self._live()
         for key, value in query.items():
             mongo_key = "document." + key
             mongo_query[mongo_key] = value
@@ -60,7 +106,7 @@ class DictStoreMongo(DictStoreBase):
 
         # Create a mapping of _id to document for efficient lookup
         id_to_doc = {}
-        query = {"_id": {"$in": list(keys)}}
+        query = {"_id": {"$in": list(keys)}, **self._live()}
         for doc in self.collection.find(query):
             id_to_doc[doc["_id"]] = doc["document"]
 
@@ -76,15 +122,30 @@ class DictStoreMongo(DictStoreBase):
         query = {"_id": {"$in": ids}}
         self.collection.delete_many(query)
 
+    def mupdate(self, keys_or_query: Union[Sequence[str], Dict[str, Any]], update: Dict[str, Dict[str, Any]]) -> int:
+        """Update documents in place with update_many on the document. fields, keeping their ttl."""
+        validate_update(update)
+        result = self.collection.update_many(self._update_filter(keys_or_query), self._to_mongo_update(update))
+        return result.matched_count
+
+    def _update_filter(self, keys_or_query: Union[Sequence[str], Dict[str, Any]]) -> Dict[str, Any]:
+        if isinstance(keys_or_query, dict):
+            return self._to_mongo_query(keys_or_query)
+        return {"_id": {"$in": list(keys_or_query)}, **self._live()}
+
+    @staticmethod
+    def _to_mongo_update(update: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        return {op: {"document." + field: value for field, value in fields.items()} for op, fields in update.items()}
+
     def yield_keys(self, *, prefix: Optional[str] = None) -> Union[Iterator[str], Iterator[str]]:
         if prefix is None:
             # Return all keys
-            for doc in self.collection.find({}, {"_id": 1}):
+            for doc in self.collection.find(self._live(), {"_id": 1}):
                 yield doc["_id"]
         else:
             # Return keys with prefix (escape special regex characters)
             escaped_prefix = re.escape(prefix)
-            query = {"_id": {"$regex": f"^{escaped_prefix}"}}
+            query = {"_id": {"$regex": f"^{escaped_prefix}"}, **self._live()}
             for doc in self.collection.find(query, {"_id": 1}):
                 yield doc["_id"]
 
@@ -92,14 +153,110 @@ class DictStoreMongo(DictStoreBase):
         """Clear all documents from the collection."""
         self.collection.delete_many({})
 
+    def purge_expired(self, batch_size: int = 1000) -> int:
+        """Delete expired documents now instead of waiting for the TTL monitor, returns the number deleted."""
+        count_deleted = 0
+        while True:
+            query = {"expires_at": {"$lte": datetime.now(timezone.utc)}}
+            ids = [doc["_id"] for doc in self.collection.find(query, {"_id": 1}).limit(batch_size)]
+            if ids:
+                count_deleted += self.collection.delete_many({"_id": {"$in": ids}}).deleted_count
+            if len(ids) < batch_size:
+                return count_deleted
+
     async def asample(self, count: int) -> List[dict]:
-        cursor: PymongoCommandCursor = self.collection.aggregate([{"$sample": {"size": count}}])
+        if self.async_collection is None:
+            return await run_in_store_executor(self._sample, count)
+        cursor = await self.async_collection.aggregate(self._sample_pipeline(count))
+        return [entry["document"] for entry in await cursor.to_list(length=count)]
+
+    def _sample_pipeline(self, count: int) -> List[Dict[str, Any]]:
+        return [{"$match": self._live()}, {"$sample": {"size": count}}]
+
+    def _sample(self, count: int) -> List[dict]:
+        cursor: PymongoCommandCursor = self.collection.aggregate(self._sample_pipeline(count))
         list_entry = cursor.to_list(length=count)
         list_doc = []
         for entry in list_entry:
             list_doc.append(entry["document"])
         return list_doc
 
+    # native async API through the AsyncMongoClient, without one the base class runs the blocking methods
+    # on the store executor
+
+    async def amget(self, keys: Sequence[str]) -> List[Optional[dict]]:
+        if self.async_collection is None:
+            return await super().amget(keys)
+        if not keys:
+            return []
+        query = {"_id": {"$in": list(keys)}, **self._live()}
+        id_to_doc = {doc["_id"]: doc["document"] async for doc in self.async_collection.find(query)}
+        return [id_to_doc.get(key) for key in keys]
+
+    async def amset(self, key_value_pairs: Sequence[tuple[str, dict]], ttl: Optional[float] = None) -> None:
+        if self.async_collection is None:
+            return await super().amset(key_value_pairs, ttl)
+        if ttl is not None and not self._ttl_index_created:
+            await self.async_collection.create_index("expires_at", expireAfterSeconds=0)
+            self._ttl_index_created = True
+        operations = self._replace_operations(key_value_pairs, ttl)
+        if operations:
+            await self.async_collection.bulk_write(operations)
+
+    async def amdelete(self, keys: Sequence[str]) -> None:
+        if self.async_collection is None:
+            return await super().amdelete(keys)
+        await self.async_collection.delete_many({"_id": {"$in": list(keys)}})
+
+    async def amupdate(self, keys_or_query: Union[Sequence[str], Dict[str, Any]], update: Dict[str, Dict[str, Any]]) -> int:
+        if self.async_collection is None:
+            return await super().amupdate(keys_or_query, update)
+        validate_update(update)
+        result = await self.async_collection.update_many(self._update_filter(keys_or_query), self._to_mongo_update(update))
+        return result.matched_count
+
+    async def ayield_keys(self, *, prefix: Optional[str] = None) -> AsyncIterator[str]:
+        if self.async_collection is None:
+            async for key in super().ayield_keys(prefix=prefix):
+                yield key
+            return
+        query = self._live() if prefix is None else {"_id": {"$regex": f"^{re.escape(prefix)}"}, **self._live()}
+        async for doc in self.async_collection.find(query, {"_id": 1}):
+            yield doc["_id"]
+
+    async def acount(self) -> int:
+        if self.async_collection is None:
+            return await super().acount()
+        return await self.async_collection.count_documents(self._live())
+
+    async def aquery(
+        self,
+        query: Dict[str, Any],
+        order_by: Optional[List[Tuple[str, bool]]] = None,
+        limit: int = 0,
+        offset: int = 0,
+    ) -> List[dict]:
+        if self.async_collection is None:
+            return await super().aquery(query, order_by, limit, offset)
+        cursor = self.async_collection.find(self._to_mongo_query(query))
+        order_mod = self._to_mongo_sort(order_by)
+        if order_mod:
+            cursor = cursor.sort(order_mod)
+        if limit > 0:
+            cursor = cursor.limit(limit)
+        if offset > 0:
+            cursor = cursor.skip(offset)
+        return [document_result["document"] async for document_result in cursor]
+
+    async def acount_query(self, query: Dict[str, Any]) -> int:
+        if self.async_collection is None:
+            return await super().acount_query(query)
+        return await self.async_collection.count_documents(self._to_mongo_query(query))
+
+    @staticmethod
+    def _to_mongo_sort(order_by: Optional[List[Tuple[str, bool]]]) -> List[Tuple[str, int]]:
+        return [("document." + field, 1 if asc else -1) for field, asc in order_by or []]
+
     def query(
         self,
         query: Dict[str, Any],
@@ -108,9 +265,7 @@ class DictStoreMongo(DictStoreBase):
         offset: int = 0,
     ) -> List[dict]:
         query_mod = self._to_mongo_query(query)
-        order_mod = []
-        for field, asc in order_by or []:
-            order_mod.append(("document." + field, 1 if asc else -1))
+        order_mod = self._to_mongo_sort(order_by)
 
         cursor = self.collection.find(query_mod)
         # check if cursor is empty
@@ -1,16 +1,18 @@
-import json
 import random
 from typing import Iterator, List, Optional, Sequence, Union
 
 from sqlalchemy.engine.base import Engine
 
 from srai_store.bytes_store_postgres import BytesStorePostgres
+from srai_store.dict_serializer_registry import decode_document, get_dict_serializer
 from srai_store.dict_store_base import DictStoreBase
+from srai_store.store_executor import run_in_store_executor
 
 
 class DictStorePostgres(DictStoreBase):
-    def __init__(self, collection_name: str, postgres_engine: Engine, object_store_name: str) -> None:
+    def __init__(self, collection_name: str, postgres_engine: Engine, object_store_name: str, serializer: str = "json") -> None:
         super().__init__(collection_name)
+        self._serializer = get_dict_serializer(serializer)
         self._bytes_store: BytesStorePostgres = BytesStorePostgres(
             collection_name,
             postgres_engine,
@@ -18,7 +20,7 @@ class DictStorePostgres(DictStoreBase):
         )
 
     def mset(self, key_value_pairs: Sequence[tuple[str, dict]]) -> None:
-        key_bytes_pairs = [(key, json.dumps(value).encode("utf-8")) for key, value in key_value_pairs]
+        key_bytes_pairs = [(key, self._serializer.encode(value)) for key, value in key_value_pairs]
         self._bytes_store.mset(key_bytes_pairs)
 
     def mget(self, keys: Sequence[str]) -> list[Optional[dict]]:
@@ -28,7 +30,7 @@ class DictStorePostgres(DictStoreBase):
             if blob is None:
                 list_dict.append(None)
             else:
-                list_dict.append(json.loads(blob.decode("utf-8")))
+                list_dict.append(decode_document(blob, self._serializer))
         return list_dict
 
     def mdelete(self, keys: Sequence[str]) -> None:
@@ -38,5 +40,8 @@ class DictStorePostgres(DictStoreBase):
         return self._bytes_store.yield_keys(prefix=prefix)
 
     async def asample(self, count: int) -> List[dict]:
+        return await run_in_store_executor(self._sample, count)
+
+    def _sample(self, count: int) -> List[dict]:
         list_blob = self._bytes_store.mget(random.sample(list(self._bytes_store.yield_keys()), count))
-        return [json.loads(blob.decode("utf-8")) for blob in list_blob if blob is not None]
+        return [decode_document(blob, self._serializer) for blob in list_blob if blob is not None]
@@ -1,16 +1,30 @@
 import json
+import random
 import re
 import sqlite3
+import time
 from contextlib import contextmanager
 from pathlib import Path
 from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
+from srai_store.dict_serializer_registry import get_dict_serializer
 from srai_store.dict_store_base import DictStoreBase
+from srai_store.dict_update import validate_update
+from srai_store.store_executor import run_in_store_executor
+from srai_store.store_sampling import allocate_strata, sample_rowids
 
 
 class DictStoreSqlite(DictStoreBase):
-    def __init__(self, collection_name: str, path_file_database: Path) -> None:
+    supports_json = True
+    supports_ttl = True
+
+    def __init__(self, collection_name: str, path_file_database: Path, serializer: str = "json") -> None:
+        """
+        Args:
+            serializer: Name of a JSON text serializer ("json" or "orjson"), documents stay JSON text for json_extract.
+        """
         super().__init__(collection_name)
+        self._serializer = get_dict_serializer(serializer, json_text=True)
         self.path_file_database = path_file_database
         # Ensure parent directory exists
         abs_path = self.path_file_database.absolute()
@@ -30,6 +44,10 @@ class DictStoreSqlite(DictStoreBase):
                 )
             """
             )
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(store)").fetchall()]
+            if "expires_at" not in columns:
+                conn.execute("ALTER TABLE store ADD COLUMN expires_at REAL")
+            conn.execute("CREATE INDEX IF NOT EXISTS store_expires_at ON store (expires_at) WHERE expires_at IS NOT NULL")
             conn.commit()
 
     @contextmanager
@@ -55,14 +73,24 @@ class DictStoreSqlite(DictStoreBase):
     # MongoDB-style query operators
     _QUERY_OPS = frozenset(("$eq", "$ne", "$lt", "$lte", "$gt", "$gte", "$in"))
 
-    def mset(self, key_value_pairs: Sequence[tuple[str, dict]]) -> None:
+    # condition on rows that have not expired, takes the current time as parameter
+    _LIVE = "(expires_at IS NULL OR expires_at > ?)"
+
+    def mset(self, key_value_pairs: Sequence[tuple[str, dict]], ttl: Optional[float] = None) -> None:
+        """Set documents, with ttl they expire after that many seconds."""
+        self.mset_json([(key, self._serializer.dumps(document).decode("utf-8")) for key, document in key_value_pairs], ttl)
+
+    def mset_json(self, key_json_pairs: Sequence[Tuple[str, Union[str, bytes]]], ttl: Optional[float] = None) -> None:
+        expires_at = None if ttl is None else time.time() + ttl
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            for key, document in key_value_pairs:
+            for key, document_json in key_json_pairs:
                 self._validate_key(key)
+                if isinstance(document_json, bytes):
+                    document_json = document_json.decode("utf-8")
                 cursor.execute(
-                    "REPLACE INTO store (key, document) VALUES (?, ?)",
-                    (key, json.dumps(document)),
+                    "REPLACE INTO store (key, document, expires_at) VALUES (?, ?, ?)",
+                    (key, document_json, expires_at),
                 )
             conn.commit()
 
@@ -84,12 +112,28 @@ class DictStoreSqlite(DictStoreBase):
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                f"SELECT key, document FROM store WHERE key IN ({placeholders})",
-                list(keys),
+                f"SELECT key, document FROM store WHERE key IN ({placeholders}) AND {self._LIVE}",
+                [*keys, time.time()],
             )
-            key_to_doc = {row[0]: json.loads(row[1]) if row[1] else None for row in cursor.fetchall()}
+            key_to_doc = {row[0]: self._serializer.loads(row[1]) if row[1] else None for row in cursor.fetchall()}
         return [key_to_doc.get(k) for k in keys]
 
+    def mget_json(self, keys: Sequence[str]) -> List[Optional[Union[str, bytes]]]:
+        """Same as mget, but return the stored JSON text without parsing it."""
+        if not keys:
+            return []
+        for key in keys:
+            self._validate_key(key)
+        placeholders = ",".join("?" * len(keys))
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT key, document FROM store WHERE key IN ({placeholders}) AND {self._LIVE}",
+                [*keys, time.time()],
+            )
+            key_to_json = {row[0]: row[1] or None for row in cursor.fetchall()}
+        return [key_to_json.get(k) for k in keys]
+
     def mdelete(self, keys: Sequence[str]) -> None:
         if not keys:
             return
@@ -103,14 +147,69 @@ class DictStoreSqlite(DictStoreBase):
             )
             conn.commit()
 
+    def mupdate(self, keys_or_query: Union[Sequence[str], Dict[str, Any]], update: Dict[str, Dict[str, Any]]) -> int:
+        """Update documents in place with json_set and json_remove, in one UPDATE statement.
+
+        Only the changed fields are sent, the update is atomic and keeps the ttl of the documents.
+        Raises ValueError without updating anything when $inc hits a non-numeric field.
+        """
+        validate_update(update)
+        if isinstance(keys_or_query, dict):
+            where_clause, where_params = self._build_json_query(keys_or_query)
+        else:
+            keys = list(keys_or_query)
+            if not keys:
+                return 0
+            for key in keys:
+                self._validate_key(key)
+            where_clause, where_params = f"key IN ({','.join('?' * len(keys))})", keys
+        expression, expression_params = self._build_update(update)
+        now = time.time()
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for field in update.get("$inc", {}):
+                path = self._json_path(field)
+                row = conn.execute(
+                    f"SELECT key FROM store WHERE {self._LIVE} AND {where_clause} "
+                    "AND json_type(document, ?) IS NOT NULL AND json_type(document, ?) NOT IN ('integer', 'real') LIMIT 1",
+                    [now, *where_params, path, path],
+                ).fetchone()
+                if row:
+                    raise ValueError(f"Can not $inc non-numeric field {field} of {row[0]}")
+            cursor = conn.execute(
+                f"UPDATE store SET document = {expression} WHERE {self._LIVE} AND {where_clause}",
+                [*expression_params, now, *where_params],
+            )
+            conn.commit()
+        return cursor.rowcount
+
+    def _build_update(self, update: Dict[str, Dict[str, Any]]) -> tuple[str, list[Any]]:
+        """Build the expression of the new document, json_set for $set and $inc wrapped in json_remove for $unset."""
+        expression = "document"
+        params: list[Any] = []
+        set_args: list[str] = []
+        for field, value in update.get("$set", {}).items():
+            set_args.append("?, json(?)")
+            params.extend([self._json_path(field), json.dumps(value)])
+        for field, value in update.get("$inc", {}).items():
+            set_args.append("?, COALESCE(json_extract(document, ?), 0) + ?")
+            params.extend([self._json_path(field), self._json_path(field), value])
+        if set_args:
+            expression = f"json_set({expression}, {', '.join(set_args)})"
+        fields_unset = list(update.get("$unset", {}))
+        if fields_unset:
+            expression = f"json_remove({expression}, {','.join('?' * len(fields_unset))})"
+            params.extend(self._json_path(field) for field in fields_unset)
+        return expression, params
+
     def yield_keys(self, *, prefix: Optional[str] = None) -> Union[Iterator[str], Iterator[str]]:
         with self._get_connection() as conn:
             cursor = conn.cursor()
             if prefix:
                 self._validate_key(prefix)
-                cursor.execute("SELECT key FROM store WHERE key LIKE ?", (f"{prefix}%",))
+                cursor.execute(f"SELECT key FROM store WHERE key LIKE ? AND {self._LIVE}", (f"{prefix}%", time.time()))
             else:
-                cursor.execute("SELECT key FROM store")
+                cursor.execute(f"SELECT key FROM store WHERE {self._LIVE}", (time.time(),))
             for row in cursor:
                 yield row[0]
 
@@ -120,15 +219,73 @@ class DictStoreSqlite(DictStoreBase):
             cursor.execute("DELETE FROM store")
             conn.commit()
 
-    async def asample(self, count: int) -> List[dict]:
+    def purge_expired(self, batch_size: int = 1000) -> int:
+        """Delete expired documents in batches of batch_size, one transaction each, returns the number deleted."""
+        count_deleted = 0
+        while True:
+            with self._get_connection() as conn:
+                cursor = conn.execute(
+                    "DELETE FROM store WHERE key IN (SELECT key FROM store WHERE expires_at <= ? LIMIT ?)",
+                    (time.time(), batch_size),
+                )
+                conn.commit()
+            count_deleted += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                return count_deleted
+
+    async def asample(self, count: int, stratify_by: Optional[str] = None) -> List[dict]:
+        """Sample documents uniformly at random, or equally from every value of the stratify_by field.
+
+        Large tables are sampled by probing random rowids, so the cost scales with count and not with the table.
+        """
+        return await run_in_store_executor(self._sample, count, stratify_by)
+
+    def _sample(self, count: int, stratify_by: Optional[str] = None) -> List[dict]:
+        if stratify_by is not None:
+            return self._sample_stratified(count, stratify_by)
+        now = time.time()
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                "SELECT document FROM store ORDER BY RANDOM() LIMIT ?",
-                (count,),
-            )
-            rows = cursor.fetchall()
-            return [json.loads(row[0]) for row in rows if row[0]]
+            rowids = sample_rowids(conn, self._LIVE, now, count)
+            if rowids is None:
+                cursor.execute(
+                    f"SELECT document FROM store WHERE {self._LIVE} ORDER BY RANDOM() LIMIT ?",
+                    (now, count),
+                )
+                rows = cursor.fetchall()
+            else:
+                placeholders = ",".join("?" * len(rowids))
+                rows = cursor.execute(f"SELECT document FROM store WHERE rowid IN ({placeholders})", rowids).fetchall()
+                random.shuffle(rows)
+            return [self._serializer.loads(row[0]) for row in rows if row[0]]
+
+    def _sample_stratified(self, count: int, stratify_by: str) -> List[dict]:
+        """Sample equally from every value of the stratify_by field, this scans the field twice."""
+        path = self._json_path(stratify_by)
+        now = time.time()
+        with self._get_connection() as conn:
+            rows = conn.execute(
+                f"SELECT json_extract(document, ?) AS value, COUNT(*) FROM store WHERE {self._LIVE} GROUP BY value",
+                (path, now),
+            ).fetchall()
+            quotas = [(value, n) for value, n in allocate_strata(dict(rows), count).items() if n > 0]
+            if not quotas:
+                return []
+            values_clause = ",".join("(?, ?)" for _ in quotas)
+            rows = conn.execute(
+                f"""
+                WITH quota(value, n) AS (VALUES {values_clause})
+                SELECT ranked.document FROM (
+                    SELECT document, json_extract(document, ?) AS value,
+                        ROW_NUMBER() OVER (PARTITION BY json_extract(document, ?) ORDER BY RANDOM()) AS rn
+                    FROM store WHERE {self._LIVE}
+                ) AS ranked JOIN quota ON ranked.value IS quota.value
+                WHERE ranked.rn <= quota.n
+                """,
+                [*(item for quota in quotas for item in quota), path, path, now],
+            ).fetchall()
+        random.shuffle(rows)
+        return [self._serializer.loads(row[0]) for row in rows if row[0]]
 
     def _json_path(self, field: str) -> str:
         """Convert field name to SQLite JSON path. Supports nested: 'user.name' -> $.user.name."""
@@ -218,12 +375,31 @@ class DictStoreSqlite(DictStoreBase):
         limit_clause = f" LIMIT {limit}" if limit > 0 else ""
         offset_clause = f" OFFSET {offset}" if offset > 0 else ""
 
-        sql = f"SELECT document FROM store WHERE {where_clause}{order_clause}{limit_clause}{offset_clause}"
+        sql = f"SELECT document FROM store WHERE {self._LIVE} AND {where_clause}{order_clause}{limit_clause}{offset_clause}"
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(sql, params)
+            cursor.execute(sql, [time.time(), *params])
             rows = cursor.fetchall()
-            return [json.loads(row[0]) for row in rows if row[0]]
+            return [self._serializer.loads(row[0]) for row in rows if row[0]]
+
+    def query_keys(
+        self,
+        query: Dict[str, Any],
+        order_by: Optional[List[Tuple[str, bool]]] = None,
+        limit: int = 0,
+        offset: int = 0,
+    ) -> List[str]:
+        """Same as query, but return the keys of the matching documents."""
+        where_clause, params = self._build_json_query(query)
+        order_clause = self._build_order_by(order_by or [])
+        limit_clause = f" LIMIT {limit}" if limit > 0 else ""
+        offset_clause = f" OFFSET {offset}" if offset > 0 else ""
+
+        sql = f"SELECT key FROM store WHERE {self._LIVE} AND {where_clause}{order_clause}{limit_clause}{offset_clause}"
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, [time.time(), *params])
+            return [row[0] for row in cursor.fetchall()]
 
     def count_query(
         self,
@@ -231,9 +407,9 @@ class DictStoreSqlite(DictStoreBase):
     ) -> int:
         """Count documents matching the query."""
         where_clause, params = self._build_json_query(query)
-        sql = f"SELECT COUNT(*) FROM store WHERE {where_clause}"
+        sql = f"SELECT COUNT(*) FROM store WHERE {self._LIVE} AND {where_clause}"
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(sql, params)
+            cursor.execute(sql, [time.time(), *params])
             row = cursor.fetchone()
             return row[0] if row else 0
@@ -0,0 +1,101 @@
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from srai_store.cache_admission_base import CacheAdmissionBase
+from srai_store.cache_tier_chain import CacheTierChain
+from srai_store.dict_store_base import DictStoreBase
+
+
+class DictStoreTiered(DictStoreBase):
+    def __init__(
+        self,
+        tiers: Sequence[DictStoreBase],
+        promotions: Optional[Sequence[Optional[CacheAdmissionBase]]] = None,
+        write_policies: Optional[Sequence[str]] = None,
+        write_behind_max_pending: int = 10000,
+    ) -> None:
+        """Chain of dict stores from fastest to authoritative, e.g. memory -> local SQLite -> S3.
+
+        Reads walk the tiers in order and promote hits to the tiers above; keys, queries and samples
+        come from the last (base) tier. See CacheTierChain for the promotion and write policies.
+        """
+        super().__init__(tiers[-1].collection_name)
+        self.tiers = list(tiers)
+        self.chain = CacheTierChain(self.collection_name, tiers, promotions, write_policies, write_behind_max_pending)
+
+    @property
+    def dict_store_base(self) -> DictStoreBase:
+        return self.tiers[-1]
+
+    def mset(self, key_value_pairs: Sequence[tuple[str, dict]]) -> None:
+        self.chain.mset(key_value_pairs)
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[dict]]:
+        return self.chain.mget(keys)
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        self.chain.mdelete(keys)
+
+    def mupdate(self, keys_or_query: Union[Sequence[str], Dict[str, Any]], update: Dict[str, Dict[str, Any]]) -> int:
+        """Update in the base tier and evict the updated keys from the tiers above.
+
+        A query is passed to the base tier as is, the matching keys are looked up before the update to evict them.
+        """
+        self.flush()
+        if isinstance(keys_or_query, dict):
+            keys = self.dict_store_base.query_keys(keys_or_query)
+        else:
+            keys = list(keys_or_query)
+            if not keys:
+                return 0
+        count_updated = self.dict_store_base.mupdate(keys_or_query, update)
+        for tier in self.tiers[:-1]:
+            tier.mdelete(keys)
+        return count_updated
+
+    def flush(self) -> None:
+        self.chain.flush()
+
+    def close(self) -> None:
+        self.chain.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hits per tier and misses of all tiers."""
+        return self.chain.stats()
+
+    def yield_keys(self, *, prefix: Optional[str] = None) -> Iterator[str]:
+        self.flush()
+        return self.dict_store_base.yield_keys(prefix=prefix)
+
+    def count(self) -> int:
+        self.flush()
+        return self.dict_store_base.count()
+
+    async def asample(self, count: int) -> List[dict]:
+        return await self.dict_store_base.asample(count)
+
+    def query(
+        self,
+        query: Dict[str, Any],
+        order_by: Optional[List[Tuple[str, bool]]] = None,
+        limit: int = 0,
+        offset: int = 0,
+    ) -> List[dict]:
+        self.flush()
+        return self.dict_store_base.query(query, order_by, limit, offset)
+
+    def query_keys(
+        self,
+        query: Dict[str, Any],
+        order_by: Optional[List[Tuple[str, bool]]] = None,
+        limit: int = 0,
+        offset: int = 0,
+    ) -> List[str]:
+        self.flush()
+        return self.dict_store_base.query_keys(query, order_by, limit, offset)
+
+    def count_query(
+        self,
+        query: Dict[str, Any],
+    ) -> int:
+        self.flush()
+        return self.dict_store_base.count_query(query)
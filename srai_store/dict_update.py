@@ -0,0 +1,61 @@
+import copy
+import re
+from typing import Any, Dict, List
+
+# MongoDB-style update operators of mupdate
+UPDATE_OPS = ("$set", "$inc", "$unset")
+
+
+def update_fields(update: Dict[str, Dict[str, Any]]) -> List[str]:
+    """All field paths an update touches."""
+    return [field for fields in update.values() for field in fields]
+
+
+def validate_update(update: Dict[str, Dict[str, Any]]) -> None:
+    """Check operators, field paths and $inc values of an update, raises ValueError.
+
+    Like MongoDB, a field may only be touched once per update and not together with a field inside it,
+    so the operators can be applied in any order.
+    """
+    if not update:
+        raise ValueError("Empty update")
+    for op, fields in update.items():
+        if op not in UPDATE_OPS:
+            raise ValueError(f"Unknown update operator: {op}. Use one of {UPDATE_OPS}")
+        if not isinstance(fields, dict):
+            raise ValueError(f"{op} requires a dict of field paths")
+        for field, value in fields.items():
+            if not re.match(r"^[a-zA-Z0-9_\-/]+(\.[a-zA-Z0-9_\-/]+)*$", field):
+                raise ValueError(f"Invalid characters in update field: {field}")
+            if op == "$inc" and (not isinstance(value, (int, float)) or isinstance(value, bool)):
+                raise ValueError(f"$inc requires a number for {field}")
+    fields_sorted = sorted(update_fields(update))
+    for field, field_next in zip(fields_sorted, fields_sorted[1:]):
+        if field_next == field or field_next.startswith(field + "."):
+            raise ValueError(f"Update of {field_next} conflicts with {field}")
+
+
+def apply_update(document: dict, update: Dict[str, Dict[str, Any]]) -> dict:
+    """Return a copy of the document with the update applied, missing parents of $set and $inc are created."""
+    document = copy.deepcopy(document)
+    for op, fields in update.items():
+        for field, value in fields.items():
+            *parents, name = field.split(".")
+            parent = document
+            for parent_name in parents:
+                if op == "$unset" and not isinstance(parent.get(parent_name), dict):
+                    break
+                parent = parent.setdefault(parent_name, {})
+                if not isinstance(parent, dict):
+                    raise ValueError(f"Can not update {field}, {parent_name} is not an object")
+            else:
+                if op == "$set":
+                    parent[name] = copy.deepcopy(value)
+                elif op == "$inc":
+                    current = parent.get(name, 0)
+                    if not isinstance(current, (int, float)) or isinstance(current, bool):
+                        raise ValueError(f"Can not $inc non-numeric field {field}")
+                    parent[name] = current + value
+                else:
+                    parent.pop(name, None)
+    return document
@@ -1,10 +1,17 @@
 import hashlib
 from abc import abstractmethod
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 
 from langchain_core.embeddings import Embeddings
+from langchain_core.runnables.config import run_in_executor
 
+from srai_store.cache_admission_base import CacheAdmissionBase
 from srai_store.dict_store_base import DictStoreBase
+from srai_store.dict_store_lru import DictStoreLru
+from srai_store.single_flight import SingleFlight
+
+# computed embeddings not (yet) admitted to the cache store are kept here until the key is admitted
+PENDING_MAX_ENTRIES = 1000
 
 
 class EmbeddingModelBase(Embeddings):
@@ -13,10 +20,16 @@ class EmbeddingModelBase(Embeddings):
         embedding_model_name: str,
         embedding_dimension: int,
         cache_store: Optional[DictStoreBase] = None,
+        cache_admission: Optional[CacheAdmissionBase] = None,
     ):
         self.embedding_model_name = embedding_model_name
         self.embedding_dimension = embedding_dimension
         self.cache_store = cache_store
+        # optional policy deciding which computed embeddings are cached, e.g. CacheAdmissionTinyLfu
+        self.cache_admission = cache_admission
+        self._pending_store = None if cache_admission is None else DictStoreLru(f"{embedding_model_name}_pending", PENDING_MAX_ENTRIES)
+        # concurrent embed_query and aembed_query calls for the same text share one model call
+        self._single_flight = SingleFlight()
 
     def embed_documents(self, texts: list[str]) -> list[list[float]]:
         # Efficient bulk implementation using cache mget, batch embedding and cache update
@@ -30,6 +43,9 @@ class EmbeddingModelBase(Embeddings):
 
         # Grab all cache results at once
         cached_dicts = self.cache_store.mget(cache_keys)
+        if self.cache_admission is not None:
+            for cache_key in cache_keys:
+                self.cache_admission.record(cache_key)
 
         # Determine which are missing
         missing_cache_keys = []
@@ -42,13 +58,21 @@ class EmbeddingModelBase(Embeddings):
             else:
                 results_dict[cache_key] = cache_dict["embedding_list"]
 
+        # Reuse embeddings computed before the key was admitted
+        if self._pending_store is not None and len(missing_cache_keys) > 0:
+            pending_entries = []
+            for cache_key, pending_dict in zip(missing_cache_keys, self._pending_store.mget(missing_cache_keys)):
+                if pending_dict is not None:
+                    pending_entries.append((cache_key, pending_dict["embedding_list"]))
+                    results_dict[cache_key] = pending_dict["embedding_list"]
+            self._cache_embeddings(pending_entries)
+            missing_texts = [text for text, cache_key in zip(missing_texts, missing_cache_keys) if cache_key not in results_dict]
+            missing_cache_keys = [cache_key for cache_key in missing_cache_keys if cache_key not in results_dict]
+
         # Embed only missing texts in one batch call
         if len(missing_cache_keys) > 0:
             missing_embeddings = self._embed_documents(missing_texts)
-            missing_entries = [
-                (cache_key, {"embedding_list": embedding}) for cache_key, embedding in zip(missing_cache_keys, missing_embeddings)
-            ]
-            self.cache_store.mset(missing_entries)
+            self._cache_embeddings(list(zip(missing_cache_keys, missing_embeddings)))
             for cache_key, embedding in zip(missing_cache_keys, missing_embeddings):
                 results_dict[cache_key] = embedding
         results = [results_dict[cache_key] for cache_key in cache_keys]
@@ -59,12 +83,48 @@ class EmbeddingModelBase(Embeddings):
             return self._embed_query(text)
         cache_key = hashlib.sha256((self.embedding_model_name + text).encode()).hexdigest()
         cache_dict = self.cache_store.get(cache_key)
+        if self.cache_admission is not None:
+            self.cache_admission.record(cache_key)
+        if cache_dict is not None:
+            return cache_dict["embedding_list"]
+        return self._single_flight.do(cache_key, lambda: self._embed_query_cached(cache_key, text))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        if self.cache_store is None:
+            return await super().aembed_query(text)
+        cache_key = hashlib.sha256((self.embedding_model_name + text).encode()).hexdigest()
+        cache_dict = await self.cache_store.aget(cache_key)
+        if self.cache_admission is not None:
+            self.cache_admission.record(cache_key)
+        if cache_dict is not None:
+            return cache_dict["embedding_list"]
+        return await self._single_flight.ado(cache_key, lambda: run_in_executor(None, self._embed_query_cached, cache_key, text))
+
+    def _embed_query_cached(self, cache_key: str, text: str) -> List[float]:
+        # another call may have finished loading the key between our cache miss and taking the lead
+        cache_dict = self.cache_store.get(cache_key)  # type: ignore
         if cache_dict is not None:
             return cache_dict["embedding_list"]
-        embedding = self._embed_query(text)
-        self.cache_store.set(cache_key, {"embedding_list": embedding})
+        pending_dict = None if self._pending_store is None else self._pending_store.get(cache_key)
+        embedding = self._embed_query(text) if pending_dict is None else pending_dict["embedding_list"]
+        self._cache_embeddings([(cache_key, embedding)])
         return embedding
 
+    def _cache_embeddings(self, entries: Sequence[Tuple[str, List[float]]]) -> None:
+        # without admission every embedding is cached, otherwise rejected ones wait in the pending store
+        admitted, rejected = [], []
+        for cache_key, embedding in entries:
+            if self.cache_admission is None or self.cache_admission.admit(cache_key):
+                admitted.append((cache_key, embedding))
+            else:
+                rejected.append((cache_key, embedding))
+        if admitted:
+            self.cache_store.mset([(cache_key, {"embedding_list": embedding}) for cache_key, embedding in admitted])  # type: ignore
+            if self._pending_store is not None:
+                self._pending_store.mdelete([cache_key for cache_key, _ in admitted])
+        if rejected:
+            self._pending_store.mset([(cache_key, {"embedding_list": embedding}) for cache_key, embedding in rejected])  # type: ignore
+
     @abstractmethod
     def _embed_query(self, string: str) -> List[float]:
         raise NotImplementedError()
@@ -1,3 +1,6 @@
+from typing import List
+
+
 class KeyNotFoundError(Exception):
     def __init__(self, key: str):
         self.key = key
@@ -8,3 +11,10 @@ class KeyValidationError(Exception):
     def __init__(self, key: str, message: str):
         self.key = key
         super().__init__(f"Key {key} is invalid: {message}")
+
+
+class WriteBehindError(Exception):
+    def __init__(self, collection_name: str, errors: List[Exception]):
+        self.collection_name = collection_name
+        self.errors = errors
+        super().__init__(f"{len(errors)} write behind batches to {collection_name} failed, last error: {errors[-1]!r}")
@@ -0,0 +1,57 @@
+import logging
+import threading
+from typing import Any, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class ExpirySweeper:
+    """Background thread deleting expired entries from stores that support ttl.
+
+    Every interval seconds purge_expired is called on each store. Stores delete in batches of batch_size
+    rows, so a sweep never holds a long write lock and the table size stays bounded by the live entries
+    plus what expired since the last sweep. Reads already skip expired entries, the sweeper only reclaims space.
+
+    Args:
+        stores: Dict, bytes or object stores with a purge_expired method.
+        interval: Seconds between sweeps.
+        batch_size: Maximum number of rows deleted per statement.
+    """
+
+    def __init__(self, stores: Sequence[Any], interval: float = 60, batch_size: int = 1000) -> None:
+        self.stores: List[Any] = list(stores)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.count_purged = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sweep(self) -> int:
+        """Purge expired entries from all stores once, returns the number deleted."""
+        count_purged = 0
+        for store in self.stores:
+            try:
+                count_purged += store.purge_expired(self.batch_size)
+            except Exception as e:
+                logger.warning(f"Expiry sweep of {store.collection_name} failed: {e}")
+        self.count_purged += count_purged
+        if count_purged:
+            logger.info(f"Purged {count_purged} expired entries")
+        return count_purged
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sweep()
+
+    def start(self) -> "ExpirySweeper":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="expiry-sweeper", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set
+
+from srai_store.store_executor import run_in_store_executor
+
+
+class _Batch:
+    def __init__(self) -> None:
+        self.keys: Dict[str, None] = {}
+        self.results: Dict[str, Any] = {}
+        self.error: Optional[BaseException] = None
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class GetBatcher:
+    """Collects concurrent single key gets into one mget call.
+
+    The first thread to ask for a key leads the batch: it waits up to window seconds, or until max_batch keys
+    are collected, then calls mget for everyone. Coroutines are batched the same way per event loop, awaiting
+    amget, or running mget on the store executor when there is no amget.
+
+    Args:
+        mget: Gets a batch of keys, returns the values in the same order.
+        amget: Async version of mget, e.g. the amget of the batched store.
+        window: Seconds to wait for more keys.
+        max_batch: Maximum number of keys per mget call.
+    """
+
+    def __init__(
+        self,
+        mget: Callable[[Sequence[str]], List[Any]],
+        window: float = 0.002,
+        max_batch: int = 100,
+        amget: Optional[Callable[[Sequence[str]], Awaitable[List[Any]]]] = None,
+    ) -> None:
+        self._mget = mget
+        self._amget = amget
+        self.window = window
+        self.max_batch = max_batch
+        self._batch: Optional[_Batch] = None
+        self._lock = threading.Lock()
+        # event loop -> (keys, futures) of the batch being collected on that loop
+        self._batches_async: Dict[asyncio.AbstractEventLoop, Dict[str, List[asyncio.Future]]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            batch = self._batch
+            is_leader = batch is None
+            if batch is None:
+                batch = self._batch = _Batch()
+            batch.keys[key] = None
+            if len(batch.keys) >= self.max_batch:
+                # later keys go to a new batch
+                self._batch = None
+                batch.full.set()
+        if is_leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._batch is batch:
+                    self._batch = None
+            self._run(batch)
+        else:
+            batch.done.wait()
+        if batch.error is not None:
+            raise batch.error
+        return batch.results[key]
+
+    def _run(self, batch: _Batch) -> None:
+        keys = list(batch.keys)
+        try:
+            batch.results = dict(zip(keys, self._mget(keys)))
+        except BaseException as e:
+            batch.error = e
+        finally:
+            batch.done.set()
+
+    async def aget(self, key: str) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        futures_by_key = self._batches_async.get(loop)
+        if futures_by_key is None:
+            futures_by_key = self._batches_async[loop] = {}
+            loop.call_later(self.window, self._flush_async, loop, futures_by_key)
+        futures_by_key.setdefault(key, []).append(future)
+        if len(futures_by_key) >= self.max_batch:
+            self._flush_async(loop, futures_by_key)
+        return await future
+
+    def _flush_async(self, loop: asyncio.AbstractEventLoop, futures_by_key: Dict[str, List[asyncio.Future]]) -> None:
+        # the timer of a batch that was already flushed because it was full does nothing
+        if self._batches_async.get(loop) is not futures_by_key:
+            return
+        del self._batches_async[loop]
+        task = loop.create_task(self._run_async(futures_by_key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_async(self, futures_by_key: Dict[str, List[asyncio.Future]]) -> None:
+        keys = list(futures_by_key)
+        try:
+            if self._amget is not None:
+                values = await self._amget(keys)
+            else:
+                values = await run_in_store_executor(self._mget, keys)
+        except BaseException as e:
+            for futures in futures_by_key.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for key, value in zip(keys, values):
+            for future in futures_by_key[key]:
+                if not future.done():
+                    future.set_result(value)
@@ -1,11 +1,12 @@
 import logging
 from abc import abstractmethod
-from typing import Any, Dict, Generic, Iterator, List, Optional, Sequence, Tuple, TypeVar
+from typing import Any, AsyncIterator, Dict, Generic, Iterator, List, Optional, Sequence, Tuple, TypeVar, Union
 
 from langchain_core.stores import BaseStore
 from pydantic import BaseModel
 
 from srai_store.exceptions import KeyNotFoundError
+from srai_store.store_executor import aiterate_in_store_executor, run_in_store_executor
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +14,9 @@ T = TypeVar("T", bound=BaseModel)
 
 
 class ObjectStoreBase(Generic[T], BaseStore[str, T]):
+    # stores that take a ttl (seconds) in mset and expire objects
+    supports_ttl: bool = False
+
     def __init__(self, collection_name: str) -> None:
         self.collection_name = collection_name
 
@@ -20,8 +24,13 @@ class ObjectStoreBase(Generic[T], BaseStore[str, T]):
     def mset(self, key_value_pairs: Sequence[tuple[str, T]]) -> None:
         pass
 
-    def set(self, key: str, value: T) -> None:
-        self.mset([(key, value)])
+    def set(self, key: str, value: T, ttl: Optional[float] = None) -> None:
+        if ttl is None:
+            self.mset([(key, value)])
+        elif self.supports_ttl:
+            self.mset([(key, value)], ttl=ttl)  # type: ignore
+        else:
+            raise NotImplementedError(f"{type(self).__name__} does not support ttl")
 
     @abstractmethod
     def mget(self, keys: Sequence[str]) -> List[Optional[T]]:
@@ -48,10 +57,18 @@ class ObjectStoreBase(Generic[T], BaseStore[str, T]):
     def delete(self, key: str) -> None:
         self.mdelete([key])
 
+    def mupdate(self, keys_or_query: Union[Sequence[str], Dict[str, Any]], update: Dict[str, Dict[str, Any]]) -> int:
+        """Apply $set, $inc and $unset to the stored objects, see DictStoreBase.mupdate."""
+        raise NotImplementedError("Not implemented")
+
     def delete_all(self) -> None:
         logger.info(f"Deleting all keys in {self.collection_name}")
         self.mdelete(list(self.yield_keys()))
 
+    def purge_expired(self, batch_size: int = 1000) -> int:
+        """Delete expired objects, returns the number deleted. Stores without ttl have nothing to purge."""
+        return 0
+
     @abstractmethod
     def yield_keys(self, *, prefix: Optional[str] = None) -> Iterator[str]:
         pass
@@ -70,6 +87,42 @@ class ObjectStoreBase(Generic[T], BaseStore[str, T]):
     ) -> List[T]:
         pass
 
+    # async API, by default the blocking methods run on the store executor
+
+    async def amget(self, keys: Sequence[str]) -> List[Optional[T]]:
+        return await run_in_store_executor(self.mget, keys)
+
+    async def aget(self, key: str) -> Optional[T]:
+        return (await self.amget([key]))[0]
+
+    async def amset(self, key_value_pairs: Sequence[tuple[str, T]], ttl: Optional[float] = None) -> None:
+        if ttl is None:
+            await run_in_store_executor(self.mset, key_value_pairs)
+        else:
+            await run_in_store_executor(self.mset, key_value_pairs, ttl=ttl)
+
+    async def amdelete(self, keys: Sequence[str]) -> None:
+        await run_in_store_executor(self.mdelete, keys)
+
+    async def amupdate(self, keys_or_query: Union[Sequence[str], Dict[str, Any]], update: Dict[str, Dict[str, Any]]) -> int:
+        return await run_in_store_executor(self.mupdate, keys_or_query, update)
+
+    async def ayield_keys(self, *, prefix: Optional[str] = None) -> AsyncIterator[str]:
+        async for key in aiterate_in_store_executor(lambda: self.yield_keys(prefix=prefix)):
+            yield key
+
+    async def acount(self) -> int:
+        return await run_in_store_executor(self.count)
+
+    async def aquery(
+        self,
+        query: Dict[str, Any],
+        order_by: Optional[List[Tuple[str, bool]]] = None,
+        limit: int = 0,
+        offset: int = 0,
+    ) -> List[T]:
+        return await run_in_store_executor(self.query, query, order_by or [], limit, offset)
+
     @abstractmethod
     def validate_all(self, verbose: bool = False) -> int:
         pass
@@ -0,0 +1,64 @@
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from pydantic import BaseModel
+
+from srai_store.get_batcher import GetBatcher
+from srai_store.object_store_base import ObjectStoreBase
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class ObjectStoreBatching(ObjectStoreBase[T]):
+    def __init__(self, store: ObjectStoreBase[T], window: float = 0.002, max_batch: int = 100) -> None:
+        """Object store that collects concurrent get and aget calls into one mget on the wrapped store.
+
+        Args:
+            store: The wrapped store.
+            window: Seconds a get waits for other gets to join its batch.
+            max_batch: Maximum number of keys per mget.
+        """
+        super().__init__(store.collection_name)
+        self.store = store
+        self._batcher = GetBatcher(store.mget, window, max_batch, store.amget)
+
+    def get(self, key: str) -> Optional[T]:
+        return self._batcher.get(key)
+
+    async def aget(self, key: str) -> Optional[T]:
+        return await self._batcher.aget(key)
+
+    def mset(self, key_value_pairs: Sequence[tuple[str, T]]) -> None:
+        self.store.mset(key_value_pairs)
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[T]]:
+        return self.store.mget(keys)
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        self.store.mdelete(keys)
+
+    def yield_keys(self, *, prefix: Optional[str] = None) -> Iterator[str]:
+        return self.store.yield_keys(prefix=prefix)
+
+    def count(self) -> int:
+        return self.store.count()
+
+    async def asample(self, count: int) -> List[T]:
+        return await self.store.asample(count)
+
+    def query(
+        self,
+        query: Dict[str, Any],
+        order_by: Optional[List[Tuple[str, bool]]] = None,
+        limit: int = 0,
+        offset: int = 0,
+    ) -> List[T]:
+        return self.store.query(query, order_by or [], limit, offset)
+
+    def mupdate(self, keys_or_query: Union[Sequence[str], Dict[str, Any]], update: Dict[str, Dict[str, Any]]) -> int:
+        return self.store.mupdate(keys_or_query, update)
+
+    def validate_all(self, verbose: bool = False) -> int:
+        return self.store.validate_all(verbose=verbose)
+
+    def mvalidate(self, keys: List[str]) -> int:
+        return self.store.mvalidate(keys)
@@ -1,7 +1,11 @@
+import threading
 from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
 
 from pydantic import BaseModel
 
+from srai_store.cache_admission_base import CacheAdmissionBase
+from srai_store.cache_invalidator_base import CacheInvalidatorBase
+from srai_store.cache_write_behind import OPERATION_SET, CacheWriteBehind
 from srai_store.object_store_base import ObjectStoreBase
 
 T = TypeVar("T", bound=BaseModel)
@@ -12,16 +16,58 @@ class ObjectStoreCache(ObjectStoreBase[T]):
         self,
         object_store_cache: ObjectStoreBase[T],
         object_store_base: ObjectStoreBase[T],
+        read_through: bool = False,
+        admission: Optional[CacheAdmissionBase] = None,
+        write_behind: bool = False,
+        write_behind_max_pending: int = 10000,
+        invalidator: Optional[CacheInvalidatorBase] = None,
     ) -> None:
+        """Two tier store, reads are served from the cache tier when possible and writes go to both tiers.
+
+        Args:
+            object_store_cache: The fast tier.
+            object_store_base: The authoritative tier.
+            read_through: Write documents found in the base tier back to the cache tier, in one batched mset per mget.
+            admission: Decides which read-through keys are written to the cache tier, all of them when None.
+            write_behind: Write to the cache tier at once and queue writes to the base tier for a background thread,
+                call flush or close to wait for them.
+            write_behind_max_pending: Writers block while this many keys are queued for the base tier.
+            invalidator: Channel to other processes sharing the base tier, keys they write are evicted from the cache
+                tier and keys written here are published once they reached the base tier.
+        """
         if object_store_cache.collection_name != object_store_base.collection_name:
             raise ValueError("Collection names must match")
         super().__init__(object_store_cache.collection_name)
         self.object_store_cache = object_store_cache
         self.object_store_base = object_store_base
+        self.read_through = read_through
+        self.admission = admission
+        self.write_behind: Optional[CacheWriteBehind] = None
+        if write_behind:
+            self.write_behind = CacheWriteBehind(
+                self.collection_name, self._mset_base, self._mdelete_base, max_pending=write_behind_max_pending
+            )
+        # bumped with every write to the cache tier, read-through skips values read from the base tier before a write
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.invalidator = invalidator
+        if invalidator is not None:
+            invalidator.subscribe(self.collection_name, self._invalidate)
 
     def mset(self, key_value_pairs: Sequence[tuple[str, T]]) -> None:
-        self.object_store_cache.mset(key_value_pairs)
+        # the base tier (or the write behind queue) first, so a concurrent read-through can not cache an older value
+        if self.write_behind is not None:
+            self.write_behind.mset(key_value_pairs)
+        else:
+            self._mset_base(key_value_pairs)
+        with self._lock:
+            self._generation += 1
+            self.object_store_cache.mset(key_value_pairs)
+
+    def _mset_base(self, key_value_pairs: Sequence[tuple[str, T]]) -> None:
         self.object_store_base.mset(key_value_pairs)
+        if self.invalidator is not None:
+            self.invalidator.publish(self.collection_name, [key for key, _ in key_value_pairs])
 
     def mget(self, keys: Sequence[str]) -> List[Optional[T]]:
         results_dict: Dict[str, T] = {}
@@ -29,6 +75,8 @@ class ObjectStoreCache(ObjectStoreBase[T]):
         ids_not_found: List[str] = []
         results_cache = self.object_store_cache.mget(keys)
         for key, result_cache in zip(keys, results_cache):
+            if self.admission is not None:
+                self.admission.record(key)
             if result_cache is not None:
                 results_dict[key] = result_cache
             else:
@@ -36,10 +84,11 @@ class ObjectStoreCache(ObjectStoreBase[T]):
 
         # then try to get the results from the base
         if len(ids_not_found) > 0:
-            results_base = self.object_store_base.mget(ids_not_found)
-            for key, result_base in zip(ids_not_found, results_base):
-                if result_base is not None:
-                    results_dict[key] = result_base
+            generation = self._generation
+            results_base = self._mget_base(ids_not_found)
+            results_dict.update(results_base)
+            if self.read_through:
+                self._populate_cache(list(results_base.items()), generation)
 
         # then turn it back into a list with the same order as the keys
         results_list: List[Optional[T]] = []
@@ -50,11 +99,64 @@ class ObjectStoreCache(ObjectStoreBase[T]):
                 results_list.append(None)
         return results_list
 
+    def _mget_base(self, keys: List[str]) -> Dict[str, T]:
+        results_base: Dict[str, T] = {}
+        if self.write_behind is not None:
+            # writes still queued for the base tier are newer than what it holds
+            pending = self.write_behind.lookup(keys)
+            results_base = {key: value for key, (operation, value) in pending.items() if operation == OPERATION_SET}
+            keys = [key for key in keys if key not in pending]
+        if keys:
+            for key, result_base in zip(keys, self.object_store_base.mget(keys)):
+                if result_base is not None:
+                    results_base[key] = result_base
+        return results_base
+
+    def _populate_cache(self, key_value_pairs: List[Tuple[str, T]], generation: int) -> None:
+        if self.admission is not None:
+            key_value_pairs = [(key, value) for key, value in key_value_pairs if self.admission.admit(key, value)]
+        if key_value_pairs:
+            with self._lock:
+                # a write or invalidation since the base tier read, the values may be stale
+                if generation != self._generation:
+                    return
+                self.object_store_cache.mset(key_value_pairs)
+
     def mdelete(self, keys: Sequence[str]) -> None:
-        self.object_store_cache.mdelete(keys)
+        if self.write_behind is not None:
+            self.write_behind.mdelete(keys)
+        else:
+            self._mdelete_base(keys)
+        with self._lock:
+            self._generation += 1
+            self.object_store_cache.mdelete(keys)
+
+    def _mdelete_base(self, keys: Sequence[str]) -> None:
         self.object_store_base.mdelete(keys)
+        if self.invalidator is not None:
+            self.invalidator.publish(self.collection_name, keys)
+
+    def _invalidate(self, keys: Optional[List[str]]) -> None:
+        """Evict keys another process changed, everything when keys is None."""
+        with self._lock:
+            self._generation += 1
+            if keys is None:
+                self.object_store_cache.delete_all()
+            else:
+                self.object_store_cache.mdelete(keys)
+
+    def flush(self) -> None:
+        """Wait until queued writes reached the base tier, raises WriteBehindError for writes that failed."""
+        if self.write_behind is not None:
+            self.write_behind.flush()
+
+    def close(self) -> None:
+        """Flush queued writes and stop the write behind thread."""
+        if self.write_behind is not None:
+            self.write_behind.close()
 
     def yield_keys(self, *, prefix: Optional[str] = None) -> Iterator[str]:
+        self.flush()
         return self.object_store_base.yield_keys(prefix=prefix)
 
     async def asample(self, count: int) -> List[T]:
@@ -68,6 +170,7 @@ class ObjectStoreCache(ObjectStoreBase[T]):
         limit: int = 0,
         offset: int = 0,
     ) -> List[T]:
+        self.flush()
         return self.object_store_base.query(query, order_by, limit, offset)
 
     def validate_all(self, verbose: bool = False) -> int:
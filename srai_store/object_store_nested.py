@@ -1,7 +1,8 @@
+import json
 import logging
-from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Type, TypeVar, Union
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple, Type, TypeVar, Union, get_args, get_origin
 
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 from srai_store.dict_store_base import DictStoreBase
 from srai_store.object_store_base import ObjectStoreBase
@@ -11,44 +12,119 @@ T = TypeVar("T", bound=BaseModel)
 logger = logging.getLogger(__name__)
 
 
+def _construct_value(annotation: Any, value: Any) -> Any:
+    """Rebuild nested models in a value without validation, following the field annotation."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _construct(annotation, value) if isinstance(value, dict) else value
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+    if origin is None or not args:
+        return value
+    if origin in (list, tuple, set, frozenset) and isinstance(value, list):
+        return [_construct_value(args[0], item) for item in value]
+    if origin is dict and isinstance(value, dict):
+        return {key: _construct_value(args[-1], item) for key, item in value.items()}
+    if isinstance(value, dict):
+        # Optional / Union: rebuild with the first model in the union
+        for arg in args:
+            if isinstance(arg, type) and issubclass(arg, BaseModel):
+                return _construct(arg, value)
+    return value
+
+
+def _construct(model_class: Type[T], document: dict) -> T:
+    """model_construct that also rebuilds nested models, which model_construct leaves as dicts."""
+    values = dict(document)
+    for name, field in model_class.model_fields.items():
+        if name in values:
+            values[name] = _construct_value(field.annotation, values[name])
+    return model_class.model_construct(**values)
+
+
 class ObjectStoreNested(ObjectStoreBase[T]):
-    def __init__(self, store: DictStoreBase, model_class: Type[T]) -> None:
+    def __init__(self, store: DictStoreBase, model_class: Type[T], trusted: bool = False) -> None:
+        """Object store on top of a dict store.
+
+        Args:
+            store: The dict store holding the documents.
+            model_class: Pydantic model of the objects.
+            trusted: Build objects with model_construct instead of validating them on mget, query and asample.
+                Only use this for collections written by this store, invalid documents are not detected.
+                mvalidate and validate_all always validate.
+        """
         super().__init__(store.collection_name)
         self.store = store
         self.model_class = model_class
+        self.trusted = trusted
+        self.supports_ttl = store.supports_ttl
+        self._adapter = TypeAdapter(List[model_class])  # type: ignore
 
     def _dict_to_object(self, document: dict) -> T:
         return self.model_class(**document)  # type: ignore
 
-    def mset(self, key_value_pairs: Sequence[tuple[str, T]]) -> None:
+    def _dicts_to_objects(self, documents: List[dict]) -> List[T]:
+        if self.trusted:
+            return [_construct(self.model_class, document) for document in documents]
+        return self._adapter.validate_python(documents)
+
+    def _json_to_objects(self, documents_json: List[Union[str, bytes]]) -> List[T]:
+        if not documents_json:
+            return []
+        # one JSON array validates in a single pass through pydantic-core
+        array_json = b"[" + b",".join(d.encode("utf-8") if isinstance(d, str) else d for d in documents_json) + b"]"
+        if self.trusted:
+            return self._dicts_to_objects(json.loads(array_json))
+        return self._adapter.validate_json(array_json)
+
+    def _fill(self, values: Sequence[Optional[Any]], objects: List[T]) -> List[Optional[T]]:
+        """Put decoded objects back in the positions of the non-None values."""
+        iter_objects = iter(objects)
+        return [None if value is None else next(iter_objects) for value in values]
+
+    def mset(self, key_value_pairs: Sequence[tuple[str, T]], ttl: Optional[float] = None) -> None:
+        """Set objects, with ttl they expire after that many seconds (requires a store that supports ttl)."""
+        kwargs: Dict[str, Any] = {} if ttl is None else {"ttl": ttl}
+        if self.store.supports_json:
+            # pydantic serializes straight to JSON text, skipping the intermediate dict
+            self.store.mset_json([(id, object.model_dump_json()) for id, object in key_value_pairs], **kwargs)
+            return
         key_dict_pairs: Sequence[tuple[str, dict]] = [(id, object.model_dump()) for id, object in key_value_pairs]
-        self.store.mset(key_dict_pairs)
+        self.store.mset(key_dict_pairs, **kwargs)
 
     def mget(self, keys: Sequence[str]) -> list[Optional[T]]:
+        if self.store.supports_json:
+            list_json = self.store.mget_json(keys)
+            return self._fill(list_json, self._json_to_objects([d for d in list_json if d is not None]))
         list_dict = self.store.mget(keys)
-        list_object: list[Optional[T]] = []
-        for dict in list_dict:
-            if dict is None:
-                list_object.append(None)
-            else:
-                list_object.append(self._dict_to_object(dict))
-        return list_object
+        return self._fill(list_dict, self._dicts_to_objects([d for d in list_dict if d is not None]))
 
     def mdelete(self, keys: Sequence[str]) -> None:
         self.store.mdelete(keys)
 
+    def mupdate(self, keys_or_query: Union[Sequence[str], Dict[str, Any]], update: Dict[str, Dict[str, Any]]) -> int:
+        """Update the stored documents without loading the objects, the update is not validated against the model."""
+        return self.store.mupdate(keys_or_query, update)
+
+    def delete_all(self) -> None:
+        logger.info(f"Deleting all keys in {self.collection_name}")
+        self.store.clear()
+
+    def purge_expired(self, batch_size: int = 1000) -> int:
+        return self.store.purge_expired(batch_size)
+
     def yield_keys(self, *, prefix: Optional[str] = None) -> Union[Iterator[str], Iterator[str]]:
         return self.store.yield_keys(prefix=prefix)
 
     def count(self) -> int:
         return self.store.count()
 
-    async def asample(self, count: int) -> List[T]:
-        list_dict = await self.store.asample(count)
-        list_object: List[T] = []
-        for dict in list_dict:
-            list_object.append(self._dict_to_object(dict))
-        return list_object
+    async def asample(self, count: int, stratify_by: Optional[str] = None) -> List[T]:
+        if stratify_by is None:
+            list_dict = await self.store.asample(count)
+        else:
+            # only the SQLite and DuckDB dict stores support stratify_by
+            list_dict = await self.store.asample(count, stratify_by=stratify_by)  # type: ignore
+        return self._dicts_to_objects(list_dict)
 
     def query(
         self,
@@ -58,10 +134,7 @@ class ObjectStoreNested(ObjectStoreBase[T]):
         offset: int = 0,
     ) -> List[T]:
         list_dict = self.store.query(query, order_by, limit, offset)
-        list_object: List[T] = []
-        for dict in list_dict:
-            list_object.append(self._dict_to_object(dict))
-        return list_object
+        return self._dicts_to_objects(list_dict)
 
     def count_query(
         self,
@@ -69,6 +142,46 @@ class ObjectStoreNested(ObjectStoreBase[T]):
     ) -> int:
         return self.store.count_query(query)
 
+    # async API on top of the async API of the dict store, so native async stores are used end to end
+
+    async def amset(self, key_value_pairs: Sequence[tuple[str, T]], ttl: Optional[float] = None) -> None:
+        if self.store.supports_json:
+            await self.store.amset_json([(id, object.model_dump_json()) for id, object in key_value_pairs], ttl)
+            return
+        await self.store.amset([(id, object.model_dump()) for id, object in key_value_pairs], ttl)
+
+    async def amget(self, keys: Sequence[str]) -> List[Optional[T]]:
+        if self.store.supports_json:
+            list_json = await self.store.amget_json(keys)
+            return self._fill(list_json, self._json_to_objects([d for d in list_json if d is not None]))
+        list_dict = await self.store.amget(keys)
+        return self._fill(list_dict, self._dicts_to_objects([d for d in list_dict if d is not None]))
+
+    async def amupdate(self, keys_or_query: Union[Sequence[str], Dict[str, Any]], update: Dict[str, Dict[str, Any]]) -> int:
+        return await self.store.amupdate(keys_or_query, update)
+
+    async def amdelete(self, keys: Sequence[str]) -> None:
+        await self.store.amdelete(keys)
+
+    async def ayield_keys(self, *, prefix: Optional[str] = None) -> AsyncIterator[str]:
+        async for key in self.store.ayield_keys(prefix=prefix):
+            yield key
+
+    async def acount(self) -> int:
+        return await self.store.acount()
+
+    async def aquery(
+        self,
+        query: Dict[str, Any],
+        order_by: Optional[List[Tuple[str, bool]]] = None,
+        limit: int = 0,
+        offset: int = 0,
+    ) -> List[T]:
+        return self._dicts_to_objects(await self.store.aquery(query, order_by, limit, offset))
+
+    async def acount_query(self, query: Dict[str, Any]) -> int:
+        return await self.store.acount_query(query)
+
     def mvalidate(self, keys: List[str]) -> int:
         dict_entries = self.store.mget(keys)
         object_entries_changed = []
@@ -84,7 +197,7 @@ class ObjectStoreNested(ObjectStoreBase[T]):
         self.mset(object_entries_changed)
         return count_reformatted
 
-    def validate_all(self, batch_size: int = 1000) -> int:
+    def validate_all(self, batch_size: int = 1000, verbose: bool = True) -> int:
         logger.info(f"Validating all entries in {self.store.collection_name}...")
         count_reformatted = 0
         logger.info("Retrieving keys...")
@@ -92,7 +205,7 @@ class ObjectStoreNested(ObjectStoreBase[T]):
         logger.info(f"Validating {len(keys)} entries...")
         from tqdm import trange
 
-        for i in trange(0, len(keys), batch_size, desc="Validating batches"):
+        for i in trange(0, len(keys), batch_size, desc="Validating batches", disable=not verbose):
             keys_batch = keys[i : i + batch_size]
             count_reformatted += self.mvalidate(keys_batch)
         logger.info(f"Reformatted {count_reformatted} entries...")
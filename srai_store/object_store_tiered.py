@@ -0,0 +1,73 @@
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from pydantic import BaseModel
+
+from srai_store.cache_admission_base import CacheAdmissionBase
+from srai_store.cache_tier_chain import CacheTierChain
+from srai_store.object_store_base import ObjectStoreBase
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class ObjectStoreTiered(ObjectStoreBase[T]):
+    def __init__(
+        self,
+        tiers: Sequence[ObjectStoreBase[T]],
+        promotions: Optional[Sequence[Optional[CacheAdmissionBase]]] = None,
+        write_policies: Optional[Sequence[str]] = None,
+        write_behind_max_pending: int = 10000,
+    ) -> None:
+        """Chain of object stores from fastest to authoritative, see DictStoreTiered."""
+        super().__init__(tiers[-1].collection_name)
+        self.tiers = list(tiers)
+        self.chain = CacheTierChain(self.collection_name, tiers, promotions, write_policies, write_behind_max_pending)
+
+    @property
+    def object_store_base(self) -> ObjectStoreBase[T]:
+        return self.tiers[-1]
+
+    def mset(self, key_value_pairs: Sequence[tuple[str, T]]) -> None:
+        self.chain.mset(key_value_pairs)
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[T]]:
+        return self.chain.mget(keys)
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        self.chain.mdelete(keys)
+
+    def flush(self) -> None:
+        self.chain.flush()
+
+    def close(self) -> None:
+        self.chain.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hits per tier and misses of all tiers."""
+        return self.chain.stats()
+
+    def yield_keys(self, *, prefix: Optional[str] = None) -> Iterator[str]:
+        self.flush()
+        return self.object_store_base.yield_keys(prefix=prefix)
+
+    def count(self) -> int:
+        self.flush()
+        return self.object_store_base.count()
+
+    async def asample(self, count: int) -> List[T]:
+        return await self.object_store_base.asample(count)
+
+    def query(
+        self,
+        query: Dict[str, Any],
+        order_by: Optional[List[Tuple[str, bool]]] = None,
+        limit: int = 0,
+        offset: int = 0,
+    ) -> List[T]:
+        self.flush()
+        return self.object_store_base.query(query, order_by or [], limit, offset)
+
+    def validate_all(self, verbose: bool = False) -> int:
+        raise NotImplementedError("Not implemented")
+
+    def mvalidate(self, keys: List[str]) -> int:
+        raise NotImplementedError("Not implemented")
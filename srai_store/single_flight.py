@@ -0,0 +1,132 @@
+import asyncio
+import functools
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, TypeVar
+
+R = TypeVar("R")
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Collapses concurrent loads of the same key into one call, the others wait for its result.
+
+    Works for threads (do, do_many) and asyncio (ado, ado_many). Waiting callers get the same result object,
+    or the same exception, as the caller that ran the load.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, _Call] = {}
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, load: Callable[[], R]) -> R:
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+        if not is_leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = load()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def do_many(self, keys: Sequence[str], load_many: Callable[[List[str]], Dict[str, Any]]) -> Dict[str, Any]:
+        """Load the keys no other thread is loading in one load_many call and wait for the rest.
+
+        load_many returns the values of the keys it found, missing keys map to None in the result.
+        """
+        calls_leader: Dict[str, _Call] = {}
+        calls_follower: Dict[str, _Call] = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                call = self._calls.get(key)
+                if call is None:
+                    calls_leader[key] = self._calls[key] = _Call()
+                else:
+                    calls_follower[key] = call
+        results: Dict[str, Any] = {}
+        # load our own keys before waiting on others, so two callers never wait on each other
+        if calls_leader:
+            try:
+                values = load_many(list(calls_leader))
+                for key, call in calls_leader.items():
+                    call.result = results[key] = values.get(key)
+            except BaseException as e:
+                for call in calls_leader.values():
+                    call.error = e
+                raise
+            finally:
+                with self._lock:
+                    for key in calls_leader:
+                        del self._calls[key]
+                for call in calls_leader.values():
+                    call.event.set()
+        for key, call in calls_follower.items():
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            results[key] = call.result
+        return results
+
+    async def ado(self, key: str, load: Callable[[], Awaitable[R]]) -> R:
+        loop = asyncio.get_running_loop()
+        task = self._tasks.get(key)
+        if task is None or task.get_loop() is not loop:
+            # the load runs in its own task, so a cancelled caller (the first one included) does not cancel it
+            # for the others
+            task = asyncio.ensure_future(load())
+            self._tasks[key] = task
+            task.add_done_callback(functools.partial(self._forget_task, key))
+        return await asyncio.shield(task)
+
+    async def ado_many(self, keys: Sequence[str], load_many: Callable[[List[str]], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Load the keys no other coroutine is loading in one load_many call and wait for the rest.
+
+        load_many returns the values of the keys it found, missing keys map to None in the result.
+        """
+        loop = asyncio.get_running_loop()
+        tasks: Dict[str, asyncio.Future] = {}
+        keys_leader: List[str] = []
+        for key in dict.fromkeys(keys):
+            task = self._tasks.get(key)
+            if task is None or task.get_loop() is not loop:
+                keys_leader.append(key)
+            else:
+                tasks[key] = task
+        if keys_leader:
+            # one load for all our keys, each key gets its own task so ado and ado_many callers can join it
+            batch = asyncio.ensure_future(load_many(keys_leader))
+            for key in keys_leader:
+                task = tasks[key] = asyncio.ensure_future(self._batch_value(batch, key))
+                self._tasks[key] = task
+                task.add_done_callback(functools.partial(self._forget_task, key))
+        values = await asyncio.gather(*[asyncio.shield(task) for task in tasks.values()])
+        return dict(zip(tasks, values))
+
+    @staticmethod
+    async def _batch_value(batch: asyncio.Future, key: str) -> Any:
+        return (await batch).get(key)
+
+    def _forget_task(self, key: str, task: asyncio.Future) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            # retrieve the exception so it is not reported as never retrieved when every caller was cancelled
+            task.exception()
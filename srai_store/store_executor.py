@@ -0,0 +1,92 @@
+import asyncio
+import functools
+import itertools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, TypeVar
+
+R = TypeVar("R")
+
+# threads of the store executor, override with the SRAI_STORE_EXECUTOR_WORKERS environment variable
+DEFAULT_MAX_WORKERS = 16
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_store_executor() -> ThreadPoolExecutor:
+    """The executor running blocking store calls (sqlite3, duckdb, boto3, pymongo) for the async API.
+
+    It is separate from the event loop's default executor, so store access can not starve other
+    run_in_executor users and the number of concurrent database connections stays bounded.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            max_workers = int(os.environ.get("SRAI_STORE_EXECUTOR_WORKERS", DEFAULT_MAX_WORKERS))
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="srai-store")
+        return _executor
+
+
+def set_store_executor(executor: ThreadPoolExecutor) -> None:
+    """Replace the store executor, e.g. to size it to the database connection limit."""
+    global _executor
+    with _executor_lock:
+        _executor = executor
+
+
+async def run_in_store_executor(func: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+    """Run a blocking function on the store executor without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_store_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def aiterate_in_store_executor(
+    create_iterator: Callable[[], Iterator[R]],
+    batch_size: int = 1000,
+    max_pending_batches: int = 2,
+) -> AsyncIterator[R]:
+    """Run a blocking iterator on the store executor and yield its items on the event loop.
+
+    The iterator is created and stepped in a single executor task, since the iterators of the stores
+    hold a database connection that must stay on one thread. Items are handed over in batches of
+    batch_size, at most max_pending_batches ahead of the consumer.
+    """
+    loop = asyncio.get_running_loop()
+    queue: "asyncio.Queue[Any]" = asyncio.Queue(max_pending_batches)
+    stop = threading.Event()
+    end = object()
+
+    def produce() -> None:
+        try:
+            iterator = create_iterator()
+            while not stop.is_set():
+                batch = list(itertools.islice(iterator, batch_size))
+                if batch:
+                    asyncio.run_coroutine_threadsafe(queue.put(batch), loop).result()
+                if len(batch) < batch_size:
+                    break
+            if not stop.is_set():
+                asyncio.run_coroutine_threadsafe(queue.put(end), loop).result()
+        except Exception as e:
+            if not stop.is_set():
+                asyncio.run_coroutine_threadsafe(queue.put(e), loop).result()
+
+    task = loop.run_in_executor(get_store_executor(), produce)
+    try:
+        while True:
+            batch = await queue.get()
+            if batch is end:
+                break
+            if isinstance(batch, Exception):
+                raise batch
+            for item in batch:
+                yield item
+    finally:
+        stop.set()
+        # unblock a producer waiting for queue space
+        while not queue.empty():
+            queue.get_nowait()
+        if not task.done():
+            await asyncio.shield(task)
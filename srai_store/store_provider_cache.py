@@ -1,9 +1,13 @@
 import logging
-from typing import Type, TypeVar
+from typing import Callable, Optional, Type, TypeVar
 
 from pydantic import BaseModel
 
 from srai_store.bytes_store_base import BytesStoreBase
+from srai_store.cache_admission_base import CacheAdmissionBase
+from srai_store.cache_invalidator_base import CacheInvalidatorBase
+from srai_store.cache_negative import CacheNegative
+from srai_store.cache_query import CacheQuery
 from srai_store.dict_store_base import DictStoreBase
 from srai_store.dict_store_cache import DictStoreCache
 from srai_store.object_store_base import ObjectStoreBase
@@ -21,10 +25,35 @@ class StoreProviderCache(StoreProviderBase):
         database_name: str,
         store_provider_cache: StoreProviderBase,
         store_provider_base: StoreProviderBase,
+        read_through: bool = False,
+        admission: Optional[Callable[[], CacheAdmissionBase]] = None,
+        negative_cache: Optional[Callable[[], CacheNegative]] = None,
+        write_behind: bool = False,
+        invalidator: Optional[CacheInvalidatorBase] = None,
+        query_cache: Optional[Callable[[], CacheQuery]] = None,
     ) -> None:
+        """Provider of two tier cache stores.
+
+        Args:
+            read_through: Populate the cache tier with documents read from the base tier.
+            admission: Factory of the admission policy, called once per collection (e.g. CacheAdmissionSecondHit).
+            negative_cache: Factory of the negative cache of dict stores, called once per collection (e.g. CacheNegative).
+            write_behind: Queue writes to the base tier for a background thread, see DictStoreCache.
+            invalidator: Cross-process invalidation channel shared by all collections, see DictStoreCache.
+            query_cache: Factory of the query result cache of dict stores, called once per collection (e.g. CacheQuery).
+        """
         super().__init__(database_name)
         self.store_provider_cache = store_provider_cache
         self.store_provider_base = store_provider_base
+        self.read_through = read_through
+        self.admission = admission
+        self.negative_cache = negative_cache
+        self.write_behind = write_behind
+        self.invalidator = invalidator
+        self.query_cache = query_cache
+
+    def _create_admission(self) -> Optional[CacheAdmissionBase]:
+        return None if self.admission is None else self.admission()
 
     def _get_bytes_store(self, collection_name: str) -> BytesStoreBase:
         raise NotImplementedError("Not implemented")
@@ -32,9 +61,26 @@ class StoreProviderCache(StoreProviderBase):
     def _get_dict_store(self, collection_name: str) -> DictStoreBase:
         dict_store_cache = self.store_provider_cache.get_dict_store(collection_name)
         dict_store_base = self.store_provider_base.get_dict_store(collection_name)
-        return DictStoreCache(dict_store_cache, dict_store_base)
+        negative_cache = None if self.negative_cache is None else self.negative_cache()
+        return DictStoreCache(
+            dict_store_cache,
+            dict_store_base,
+            self.read_through,
+            self._create_admission(),
+            negative_cache,
+            self.write_behind,
+            invalidator=self.invalidator,
+            query_cache=None if self.query_cache is None else self.query_cache(),
+        )
 
     def _get_object_store(self, collection_name: str, model_class: Type[T]) -> ObjectStoreBase[T]:
         object_store_cache = self.store_provider_cache.get_object_store(collection_name, model_class)
         object_store_base = self.store_provider_base.get_object_store(collection_name, model_class)
-        return ObjectStoreCache(object_store_cache, object_store_base)
+        return ObjectStoreCache(
+            object_store_cache,
+            object_store_base,
+            self.read_through,
+            self._create_admission(),
+            self.write_behind,
+            invalidator=self.invalidator,
+        )
@@ -1,10 +1,12 @@
 import logging
 import os
-from typing import Type, TypeVar
+from pathlib import Path
+from typing import Dict, Optional, Type, TypeVar
 
 from langchain_core.stores import BaseStore
 from pydantic import BaseModel
 
+from srai_store.bytes_store_bounded import BytesStoreBounded
 from srai_store.bytes_store_disk import BytesStoreDisk
 from srai_store.dict_store_disk import DictStoreDisk
 from srai_store.object_store_nested import ObjectStoreNested
@@ -20,17 +22,32 @@ class StoreProviderDisk(StoreProviderBase):
         self,
         database_name: str,
         path_dir_database: str,
+        dict_serializer: str = "json",
+        bytes_max_bytes: Optional[Dict[str, int]] = None,
     ) -> None:
+        """
+        Args:
+            dict_serializer: Serializer of the dict stores.
+            bytes_max_bytes: Per collection name, the byte budget of its bytes store (default unbounded).
+                Bounded stores evict least recently used values, see BytesStoreBounded.
+        """
         super().__init__(database_name)
         self.path_dir_database = path_dir_database
+        self.dict_serializer = dict_serializer
+        self.bytes_max_bytes = bytes_max_bytes or {}
 
     def _get_bytes_store(self, collection_name: str) -> BaseStore[str, bytes]:
         path_dir_store = os.path.join(self.path_dir_database, self.database_name, collection_name)
-        return BytesStoreDisk(collection_name, path_dir_store)
+        bytes_store = BytesStoreDisk(collection_name, path_dir_store)
+        if collection_name in self.bytes_max_bytes:
+            # the index lives next to the store directory, whose listing are the keys
+            path_file_index = Path(path_dir_store + ".index.db")
+            return BytesStoreBounded(bytes_store, path_file_index, self.bytes_max_bytes[collection_name])
+        return bytes_store
 
     def _get_dict_store(self, collection_name: str) -> BaseStore[str, dict]:
         path_dir_store = os.path.join(self.path_dir_database, self.database_name, collection_name)
-        return DictStoreDisk(collection_name, path_dir_store)
+        return DictStoreDisk(collection_name, path_dir_store, self.dict_serializer)
 
     def _get_object_store(self, collection_name: str, model_class: Type[T]) -> BaseStore[str, T]:
         dict_store = self._get_dict_store(collection_name)
@@ -1,6 +1,6 @@
 import logging
 from pathlib import Path
-from typing import Type, TypeVar
+from typing import Dict, Optional, Type, TypeVar
 
 from langchain_core.stores import BaseStore
 from pydantic import BaseModel
@@ -18,19 +18,41 @@ T = TypeVar("T", bound=BaseModel)
 
 
 class StoreProviderDuckdb(StoreProviderBase):
-    def __init__(self, database_name: str, path_dir_database: Path) -> None:
+    def __init__(
+        self,
+        database_name: str,
+        path_dir_database: Path,
+        bytes_codecs: Optional[Dict[str, str]] = None,
+        dict_serializer: str = "json",
+        dictionary_retrain_intervals: Optional[Dict[str, int]] = None,
+    ) -> None:
+        """
+        Args:
+            bytes_codecs: Per collection name, the compression codec of its bytes store (default zlib).
+            dict_serializer: JSON text serializer of the dict stores ("json" or "orjson").
+            dictionary_retrain_intervals: Per collection name with the "zstd_dict" codec, the number of writes
+                after which its compression dictionary is retrained (default never).
+        """
         super().__init__(database_name)
         self.path_dir_database = path_dir_database
+        self.bytes_codecs = bytes_codecs or {}
+        self.dictionary_retrain_intervals = dictionary_retrain_intervals or {}
+        self.dict_serializer = dict_serializer
 
     def _get_bytes_store(self, collection_name: str) -> BytesStoreBase:
         Path(self.path_dir_database).mkdir(parents=True, exist_ok=True)
         path_file_database = Path(self.path_dir_database) / self.database_name / (collection_name + ".duckdb")
-        return BytesStoreDuckdb(collection_name, path_file_database)
+        return BytesStoreDuckdb(
+            collection_name,
+            path_file_database,
+            self.bytes_codecs.get(collection_name, "zlib"),
+            self.dictionary_retrain_intervals.get(collection_name, 0),
+        )
 
     def _get_dict_store(self, collection_name: str) -> DictStoreBase:
         Path(self.path_dir_database).mkdir(parents=True, exist_ok=True)
         path_file_database = Path(self.path_dir_database) / self.database_name / (collection_name + ".duckdb")
-        return DictStoreDuckdb(collection_name, path_file_database)
+        return DictStoreDuckdb(collection_name, path_file_database, self.dict_serializer)
 
     def _get_object_store(self, collection_name: str, model_class: Type[T]) -> BaseStore[str, T]:
         dict_store = self._get_dict_store(collection_name)
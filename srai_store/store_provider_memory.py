@@ -1,24 +1,42 @@
-from typing import Type, TypeVar
+from typing import Dict, Optional, Type, TypeVar
 
 from pydantic import BaseModel
 
 from srai_store.bytes_store_base import BytesStoreBase
 from srai_store.dict_store_base import DictStoreBase
+from srai_store.dict_store_lru import DictStoreLru
 from srai_store.object_store_base import ObjectStoreBase
+from srai_store.object_store_nested import ObjectStoreNested
 from srai_store.store_provider_base import StoreProviderBase
 
 T = TypeVar("T", bound=BaseModel)
 
 
 class StoreProviderInMemory(StoreProviderBase):
-    def __init__(self, database_name: str) -> None:
+    def __init__(
+        self,
+        database_name: str,
+        max_entries: Optional[int] = 10000,
+        max_bytes: Optional[int] = None,
+        default_ttl: Optional[float] = None,
+    ) -> None:
+        """In-process provider of bounded LRU dict stores, e.g. as the cache provider of StoreProviderCache.
+
+        The limits apply per collection; asking for the same collection twice returns the same store.
+        """
         super().__init__(database_name)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._dict_stores: Dict[str, DictStoreLru] = {}
 
     def _get_bytes_store(self, collection_name: str) -> BytesStoreBase:
         raise NotImplementedError("Not implemented")
 
     def _get_dict_store(self, collection_name: str) -> DictStoreBase:
-        raise NotImplementedError("Not implemented")
+        if collection_name not in self._dict_stores:
+            self._dict_stores[collection_name] = DictStoreLru(collection_name, self.max_entries, self.max_bytes, self.default_ttl)
+        return self._dict_stores[collection_name]
 
     def _get_object_store(self, collection_name: str, model_class: Type[T]) -> ObjectStoreBase[T]:
-        raise NotImplementedError("Not implemented")
+        return ObjectStoreNested(self._get_dict_store(collection_name), model_class)
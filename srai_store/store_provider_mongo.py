@@ -1,5 +1,7 @@
+import asyncio
 import logging
-from typing import Type, TypeVar
+import threading
+from typing import Any, Dict, Tuple, Type, TypeVar
 
 from langchain_core.stores import BaseStore
 from pydantic import BaseModel
@@ -10,6 +12,7 @@ from srai_store.dict_store_base import DictStoreBase
 from srai_store.dict_store_mongo import DictStoreMongo
 from srai_store.object_store_base import ObjectStoreBase
 from srai_store.object_store_nested import ObjectStoreNested
+from srai_store.store_executor import get_store_executor
 from srai_store.store_provider_base import StoreProviderBase
 
 logger = logging.getLogger(__name__)
@@ -22,15 +25,58 @@ class StoreProviderMongo(StoreProviderBase):
         self,
         connection_string: str,
         initialize: bool = True,
+        use_async_client: bool = True,
     ) -> None:
+        """
+        Args:
+            connection_string: "<mongodb uri>;<database name>".
+            initialize: Ping the server on construction.
+            use_async_client: Serve the async methods of the dict and object stores with pymongo's native
+                AsyncMongoClient (pymongo 4.9+), otherwise they run the blocking client on the store executor.
+                An AsyncMongoClient is bound to one event loop, so one is created per running loop.
+        """
         self.is_initialized = False
         database_uri = connection_string.split(";")[0]
         database_name = connection_string.split(";")[1].strip()
         super().__init__(database_name)
         self.client = MongoClient(database_uri)
+        self.database_uri = database_uri
+        self.use_async_client = use_async_client
+        # id of the event loop -> (loop, client), the loop is held so its id is not reused while it is in here
+        self._async_clients: Dict[int, Tuple[asyncio.AbstractEventLoop, Any]] = {}
+        self._async_clients_lock = threading.Lock()
         if initialize:
             self.initialize()
 
+    def get_async_client(self) -> Any:
+        """The AsyncMongoClient of the running event loop, None when disabled or not available."""
+        if not self.use_async_client:
+            return None
+        loop = asyncio.get_running_loop()
+        with self._async_clients_lock:
+            # close and forget clients of loops that were closed, e.g. by a previous asyncio.run
+            for loop_id, (loop_client, client) in list(self._async_clients.items()):
+                if loop_client.is_closed():
+                    get_store_executor().submit(self._close_async_client, client)
+                    del self._async_clients[loop_id]
+            if id(loop) not in self._async_clients:
+                try:
+                    from pymongo import AsyncMongoClient
+                except ImportError:
+                    logger.warning("pymongo has no AsyncMongoClient (requires 4.9+), async methods run on the store executor")
+                    self.use_async_client = False
+                    return None
+                self._async_clients[id(loop)] = (loop, AsyncMongoClient(self.database_uri))
+            return self._async_clients[id(loop)][1]
+
+    @staticmethod
+    def _close_async_client(client: Any) -> None:
+        # the loop of the client is closed, so its connection pools are closed on a loop of their own
+        try:
+            asyncio.run(client.close())
+        except Exception as e:
+            logger.warning(f"Failed to close the async client of a closed event loop: {e}")
+
     def initialize(self) -> None:
         self.client.admin.command("ping")
         self.is_initialized = True
@@ -39,7 +85,7 @@ class StoreProviderMongo(StoreProviderBase):
         return BytesStoreMongo(collection_name, self.client, self.database_name)
 
     def _get_dict_store(self, collection_name: str) -> DictStoreBase:
-        return DictStoreMongo(collection_name, self.client, self.database_name)
+        return DictStoreMongo(collection_name, self.client, self.database_name, self.get_async_client)
 
     def _get_object_store(self, collection_name: str, model_class: Type[T]) -> ObjectStoreBase[T]:
         return ObjectStoreNested(self.get_dict_store(collection_name), model_class)
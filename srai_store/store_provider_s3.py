@@ -1,21 +1,23 @@
 import collections
 import logging
-from typing import Type, TypeVar
+from pathlib import Path
+from typing import Dict, List, Optional, Type, TypeVar
 
 # fix for collections in boto3 because of moves and six._thread and the old pytz version
 collections.Callable = collections.abc.Callable  # type: ignore
 
-import boto3
-from botocore.exceptions import ClientError
-from pydantic import BaseModel
+import boto3  # noqa: E402
+from botocore.exceptions import ClientError  # noqa: E402
+from pydantic import BaseModel  # noqa: E402
 
-from srai_store.bytes_store_base import BytesStoreBase
-from srai_store.bytes_store_s3 import BytesStoreS3
-from srai_store.dict_store_base import DictStoreBase
-from srai_store.dict_store_bytes import DictStoreBytes
-from srai_store.object_store_base import ObjectStoreBase
-from srai_store.object_store_nested import ObjectStoreNested
-from srai_store.store_provider_base import StoreProviderBase
+from srai_store.bytes_store_base import BytesStoreBase  # noqa: E402
+from srai_store.bytes_store_s3 import BytesStoreS3  # noqa: E402
+from srai_store.dict_store_base import DictStoreBase  # noqa: E402
+from srai_store.dict_store_bytes import DictStoreBytes  # noqa: E402
+from srai_store.dict_store_sqlite import DictStoreSqlite  # noqa: E402
+from srai_store.object_store_base import ObjectStoreBase  # noqa: E402
+from srai_store.object_store_nested import ObjectStoreNested  # noqa: E402
+from srai_store.store_provider_base import StoreProviderBase  # noqa: E402
 
 logger = logging.getLogger(__name__)
 
@@ -28,8 +30,23 @@ class StoreProviderS3(StoreProviderBase):
         database_name: str,
         s3_bucket_connection_string: str,
         initialize: bool = True,
+        index_fields: Optional[Dict[str, List[str]]] = None,
+        path_dir_index: Optional[Path] = None,
+        dict_serializer: str = "json",
     ) -> None:
+        """
+        Args:
+            index_fields: Per collection name, the fields kept in a local SQLite sidecar index so
+                that dict and object stores of that collection support query and count_query.
+            path_dir_index: Directory for the sidecar index files, required with index_fields.
+            dict_serializer: Serializer for new documents ("json", "orjson" or "msgpack").
+        """
         super().__init__(database_name)
+        if index_fields and path_dir_index is None:
+            raise ValueError("path_dir_index is required when index_fields is given")
+        self.index_fields = index_fields or {}
+        self.path_dir_index = path_dir_index
+        self.dict_serializer = dict_serializer
         self.is_initialized = False
         aws_access_key_id = s3_bucket_connection_string.split(";")[0]
         aws_secret_access_key = s3_bucket_connection_string.split(";")[1]
@@ -91,7 +108,12 @@ class StoreProviderS3(StoreProviderBase):
     def _get_dict_store(self, collection_name: str) -> DictStoreBase:
         if not self.is_initialized:
             self.initialize()
-        return DictStoreBytes(BytesStoreS3(collection_name, self.client, self.database_name))
+        bytes_store = BytesStoreS3(collection_name, self.client, self.database_name)
+        if collection_name not in self.index_fields:
+            return DictStoreBytes(bytes_store, serializer=self.dict_serializer)
+        path_file_index = Path(self.path_dir_index) / self.database_name / (collection_name + ".index.db")  # type: ignore
+        index_store = DictStoreSqlite(collection_name, path_file_index)
+        return DictStoreBytes(bytes_store, index_store, self.index_fields[collection_name], self.dict_serializer)
 
     def _get_object_store(self, collection_name: str, model_class: Type[T]) -> ObjectStoreBase[T]:
         return ObjectStoreNested(self.get_dict_store(collection_name), model_class)
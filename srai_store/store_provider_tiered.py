@@ -0,0 +1,53 @@
+import logging
+from typing import Callable, List, Optional, Sequence, Type, TypeVar
+
+from pydantic import BaseModel
+
+from srai_store.bytes_store_base import BytesStoreBase
+from srai_store.cache_admission_base import CacheAdmissionBase
+from srai_store.dict_store_base import DictStoreBase
+from srai_store.dict_store_tiered import DictStoreTiered
+from srai_store.object_store_base import ObjectStoreBase
+from srai_store.object_store_tiered import ObjectStoreTiered
+from srai_store.store_provider_base import StoreProviderBase
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class StoreProviderTiered(StoreProviderBase):
+    def __init__(
+        self,
+        database_name: str,
+        store_providers: Sequence[StoreProviderBase],
+        promotions: Optional[Sequence[Optional[Callable[[], CacheAdmissionBase]]]] = None,
+        write_policies: Optional[Sequence[str]] = None,
+    ) -> None:
+        """Provider of tiered stores over the providers, ordered from fastest to authoritative.
+
+        Args:
+            promotions: Per tier above the base, a factory of the promotion policy (called once per collection),
+                or None to promote every hit.
+            write_policies: Per tier, "through", "behind" or "around", see CacheTierChain.
+        """
+        super().__init__(database_name)
+        self.store_providers = list(store_providers)
+        self.promotions = promotions
+        self.write_policies = write_policies
+
+    def _create_promotions(self) -> Optional[List[Optional[CacheAdmissionBase]]]:
+        if self.promotions is None:
+            return None
+        return [None if promotion is None else promotion() for promotion in self.promotions]
+
+    def _get_bytes_store(self, collection_name: str) -> BytesStoreBase:
+        raise NotImplementedError("Not implemented")
+
+    def _get_dict_store(self, collection_name: str) -> DictStoreBase:
+        tiers = [store_provider.get_dict_store(collection_name) for store_provider in self.store_providers]
+        return DictStoreTiered(tiers, self._create_promotions(), self.write_policies)
+
+    def _get_object_store(self, collection_name: str, model_class: Type[T]) -> ObjectStoreBase[T]:
+        tiers = [store_provider.get_object_store(collection_name, model_class) for store_provider in self.store_providers]
+        return ObjectStoreTiered(tiers, self._create_promotions(), self.write_policies)
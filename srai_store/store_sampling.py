@@ -0,0 +1,88 @@
+import random
+from typing import Any, Dict, List, Optional
+
+# tables whose rowid range is smaller than this are sampled with ORDER BY RANDOM(), which is cheap there
+SCAN_THRESHOLD = 10000
+# rowids probed per query
+PROBE_BATCH_SIZE = 500
+
+
+def sample_rowids(conn: Any, live_condition: str, now: float, count: int, table: str = "store") -> Optional[List[int]]:
+    """Uniform sample of rowids of live rows in a SQLite table by probing random rowids.
+
+    Random rowids between the smallest and largest rowid are looked up through the primary key, rowids
+    that do not exist (deleted or replaced rows) or are not live are rejected. The cost depends on the
+    sample size and the fraction of the rowid range in use, not on the table size.
+
+    Args:
+        conn: The SQLite connection.
+        live_condition: Condition on live rows, taking the current time as its only parameter.
+        now: The current time.
+        count: Number of rowids to sample.
+        table: The table to sample.
+
+    Returns:
+        Optional[List[int]]: The sampled rowids in random order, None if the table is small or too sparse
+            for probing, then the caller should fall back to ORDER BY RANDOM().
+    """
+    low, high = conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table}").fetchone()
+    if low is None:
+        return []
+    span = high - low + 1
+    if span < max(SCAN_THRESHOLD, 4 * count):
+        return None
+    max_probes = 20 * count + 2 * PROBE_BATCH_SIZE
+    found: Dict[int, None] = {}
+    count_probes = 0
+    while len(found) < count and count_probes < max_probes:
+        # size the next batch on the acceptance rate so far
+        acceptance = len(found) / count_probes if count_probes else 1.0
+        size = int((count - len(found)) / max(acceptance, 0.05) * 1.2) + 1
+        size = min(size, PROBE_BATCH_SIZE, max_probes - count_probes)
+        candidates = [random.randint(low, high) for _ in range(size)]
+        placeholders = ",".join("?" * len(candidates))
+        rows = conn.execute(
+            f"SELECT rowid FROM {table} WHERE rowid IN ({placeholders}) AND {live_condition}",
+            [*candidates, now],
+        ).fetchall()
+        for (rowid,) in rows:
+            if len(found) < count:
+                found[rowid] = None
+        count_probes += size
+    if len(found) < count:
+        return None
+    rowids = list(found)
+    random.shuffle(rowids)
+    return rowids
+
+
+def allocate_strata(stratum_sizes: Dict[Any, int], count: int) -> Dict[Any, int]:
+    """Split a sample size equally over strata, giving what small strata can not fill to the others.
+
+    Args:
+        stratum_sizes: Number of rows per stratum value.
+        count: Total sample size.
+
+    Returns:
+        Dict[Any, int]: Number of rows to sample per stratum value.
+    """
+    allocation = {value: 0 for value in stratum_sizes}
+    remaining = count
+    open_strata = [value for value, size in stratum_sizes.items() if size > 0]
+    # strata smaller than an equal share are taken whole, until every open stratum can fill its share
+    while open_strata:
+        share = remaining // len(open_strata)
+        full = [value for value in open_strata if stratum_sizes[value] <= share]
+        if not full:
+            break
+        for value in full:
+            allocation[value] = stratum_sizes[value]
+            remaining -= stratum_sizes[value]
+        open_strata = [value for value in open_strata if value not in full]
+    if open_strata:
+        share, extra = divmod(remaining, len(open_strata))
+        for value in open_strata:
+            allocation[value] = share
+        for value in random.sample(open_strata, extra):
+            allocation[value] += 1
+    return allocation
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test the bytes codecs and their use in the SQLite bytes store"""
+
+import asyncio
+import json
+import zlib
+from pathlib import Path
+from typing import Dict, Optional
+
+import pytest
+
+from srai_store.bytes_codec_registry import decode_bytes, get_bytes_codec
+from srai_store.bytes_codec_zstd_dict import BytesCodecZstdDict
+from srai_store.bytes_store_duckdb import BytesStoreDuckdb
+from srai_store.bytes_store_sqlite import BytesStoreSqlite
+from srai_store.store_provider_duckdb import StoreProviderDuckdb
+from srai_store.store_provider_sqlite import StoreProviderSqlite
+
+DOCUMENT = b'{"brand_name": "Invest in Bansko", "size": 100}' * 20
+
+
+@pytest.mark.parametrize("codec_name", ["none", "zlib", "zstd", "lz4", "adaptive"])
+def test_codec_round_trip(codec_name: str):
+    if codec_name in ("zstd", "lz4"):
+        pytest.importorskip("zstandard" if codec_name == "zstd" else "lz4")
+    codec = get_bytes_codec(codec_name)
+    for data in (DOCUMENT, b"", b"\x89PNG" + bytes(range(256)) * 4):
+        blob = codec.encode(data)
+        if decode_bytes(blob) != data:
+            raise RuntimeError(f"Round trip failed for codec {codec_name}")
+
+
+def test_adaptive_skips_incompressible():
+    codec = get_bytes_codec("adaptive")
+    if codec.encode(b"tiny") != b"\x00tiny":
+        raise RuntimeError("Small blobs should be stored uncompressed")
+    if len(codec.encode(DOCUMENT)) >= len(DOCUMENT):
+        raise RuntimeError("Compressible blobs should be compressed")
+
+
+def test_bytes_store_reads_legacy_zlib(tmp_path: Path):
+    path_file_database = tmp_path / "test_store.db"
+    test_store = BytesStoreSqlite("test_store", path_file_database, codec="none")
+    with test_store._get_connection() as conn:
+        conn.execute("REPLACE INTO store (key, value) VALUES (?, ?)", ("legacy", zlib.compress(DOCUMENT)))
+        conn.commit()
+    test_store.mset([("new", DOCUMENT)])
+    if test_store.mget(["legacy", "new"]) != [DOCUMENT, DOCUMENT]:
+        raise RuntimeError("Mixed codec blobs not read back")
+
+
+@pytest.mark.parametrize("store_class", [BytesStoreSqlite, BytesStoreDuckdb])
+def test_bytes_store_zstd_dict(tmp_path: Path, store_class):
+    pytest.importorskip("zstandard")
+    path_file_database = tmp_path / "test_store.db"
+    documents = [json.dumps({"brand_name": f"brand {i}", "brand_url": f"https://example.com/{i}", "size": i}).encode() for i in range(2000)]
+    test_store = store_class("test_store", path_file_database, codec="zstd_dict", dictionary_retrain_interval=1500)
+    test_store.mset([(f"before_{i}", document) for i, document in enumerate(documents[:1000])])
+    if test_store._codec.version is not None:
+        raise RuntimeError("Dictionary trained too early")
+    test_store.mset([(f"after_{i}", document) for i, document in enumerate(documents[1000:])])
+    # the retraining runs on the store executor, not inside mset
+    test_store._retrain_future.result()
+    if test_store._codec.version != 1:
+        raise RuntimeError("Dictionary not trained after retrain interval")
+    test_store.mset([("with_dict", documents[0])])
+    if asyncio.run(test_store.atrain_dictionary(dict_size=4096)) != 2:
+        raise RuntimeError("Dictionary version not incremented")
+
+    # a new instance picks up the current dictionary and reads all versions
+    test_store = store_class("test_store", path_file_database, codec="zstd_dict")
+    if test_store._codec.version != 2:
+        raise RuntimeError("Current dictionary not loaded")
+    if test_store.mget(["before_0", "with_dict", "after_999"]) != [documents[0], documents[0], documents[1999]]:
+        raise RuntimeError("Values not read back")
+
+
+class BytesCodecZstdDictRetraining(BytesCodecZstdDict):
+    """Switches to the next dictionary version every time the current version is read, like a busy background retrain."""
+
+    def __init__(self, dictionaries: Dict[int, bytes]) -> None:
+        self._version = None
+        super().__init__(dictionaries.get)
+        self.dictionaries = dictionaries
+
+    @property
+    def version(self) -> Optional[int]:
+        version = self._version
+        if version is not None and version + 1 in self.dictionaries:
+            self.set_dictionary(version + 1, self.dictionaries[version + 1])
+        return version
+
+    @version.setter
+    def version(self, version: Optional[int]) -> None:
+        self._version = version
+
+
+def test_zstd_dict_retrain_during_encode():
+    pytest.importorskip("zstandard")
+    samples = [json.dumps({"brand_name": f"brand {i}", "size": i, "tags": ["a", str(i % 7)]}).encode() for i in range(2000)]
+    dictionaries = {version: BytesCodecZstdDict.train(samples[version:], 1024 * version) for version in range(1, 5)}
+    codec = BytesCodecZstdDictRetraining(dictionaries)
+    codec.set_dictionary(1, dictionaries[1])
+    blob = codec.encode(samples[0])
+    if BytesCodecZstdDict(dictionaries.get).decode(blob) != samples[0]:
+        raise RuntimeError("Blob not decodable after a concurrent retrain")
+
+
+@pytest.mark.parametrize("store_provider_class", [StoreProviderSqlite, StoreProviderDuckdb])
+def test_store_provider_dictionary_retrain_interval(tmp_path: Path, store_provider_class):
+    pytest.importorskip("zstandard")
+    store_provider = store_provider_class(
+        "test", tmp_path, bytes_codecs={"blobs": "zstd_dict"}, dictionary_retrain_intervals={"blobs": 1500}
+    )
+    if store_provider.get_bytes_store("blobs").dictionary_retrain_interval != 1500:
+        raise RuntimeError("Retrain interval not passed to the bytes store")
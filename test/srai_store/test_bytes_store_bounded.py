@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Test the size-bounded BytesStoreBounded"""
+
+from pathlib import Path
+
+from srai_store.bytes_store_bounded import BytesStoreBounded
+from srai_store.bytes_store_disk import BytesStoreDisk
+from srai_store.bytes_store_sqlite import BytesStoreSqlite
+from srai_store.store_provider_disk import StoreProviderDisk
+
+
+def test_bytes_store_bounded_eviction(tmp_path: Path):
+    bytes_store = BytesStoreSqlite("test_store", tmp_path / "test_store.db")
+    test_store = BytesStoreBounded(bytes_store, tmp_path / "test_store.index.db", max_bytes=100, low_watermark=0.5, evict_batch_size=2)
+    test_store.mset([(f"key{i}", b"x" * 20) for i in range(4)])
+    test_store.mget(["key0"])
+    test_store.mset([("key0", b"y" * 10)])
+    if test_store.usage()["bytes"] != 70:
+        raise RuntimeError("Overwritten value counted twice")
+
+    test_store.mget(["key1"])
+    test_store.mset([("key4", b"x" * 40)])
+    usage = test_store.usage()
+    if usage["bytes"] > 50 or usage["evictions"] == 0:
+        raise RuntimeError(f"Byte budget not enforced {usage}")
+    if test_store.mget(["key2", "key3"]) != [None, None] or test_store.mget(["key4"])[0] is None:
+        raise RuntimeError("Least recently used values not evicted first")
+    if sorted(bytes_store.yield_keys()) != sorted(test_store.yield_keys()):
+        raise RuntimeError("Index out of sync with the store")
+
+    test_store.mdelete(["key4", "missing"])
+    if test_store._bytes != test_store.usage()["bytes"] or test_store.mget(["key4"])[0] is not None:
+        raise RuntimeError(f"Running total {test_store._bytes} out of sync after delete {test_store.usage()}")
+
+
+def test_bytes_store_bounded_disk(tmp_path: Path):
+    store_provider = StoreProviderDisk("test", str(tmp_path), bytes_max_bytes={"test_store": 50})
+    test_store = store_provider.get_bytes_store("test_store")
+    test_store.mset([(f"key{i}", b"x" * 10) for i in range(10)])
+    if test_store.usage()["bytes"] > 50 or test_store.count() != test_store.usage()["entries"]:
+        raise RuntimeError("Byte budget not enforced")
+
+    reopened = BytesStoreBounded(BytesStoreDisk("test_store", str(tmp_path / "test" / "test_store")), tmp_path / "other.index.db", 1000)
+    if reopened.usage()["entries"] != 0 or reopened.rebuild_index() != test_store.count():
+        raise RuntimeError("Index not rebuilt from the store")
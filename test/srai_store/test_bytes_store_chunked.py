@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test chunked storage and streaming in the SQLite and DuckDB bytes stores"""
+
+import io
+import os
+from pathlib import Path
+
+import pytest
+
+from srai_store.bytes_store_duckdb import BytesStoreDuckdb
+from srai_store.bytes_store_sqlite import BytesStoreSqlite
+
+
+@pytest.mark.parametrize("store_class", [BytesStoreSqlite, BytesStoreDuckdb])
+def test_bytes_store_chunked_mset(tmp_path: Path, store_class):
+    test_store = store_class("test_store", tmp_path / "test_store.db", chunk_size=100)
+    value = os.urandom(1050)
+    test_store.mset([("large", value), ("small", b"abc")])
+    if test_store.mget(["large", "small", "missing"]) != [value, b"abc", None]:
+        raise RuntimeError("Incorrect values returned")
+    if test_store.read_range("large", 95, 305) != value[95:305] or test_store.read_range("large", 1000) != value[1000:]:
+        raise RuntimeError("Incorrect range returned")
+    if test_store.read_range("small", 1, 2) != b"b" or test_store.read_range("missing", 0, 1) is not None:
+        raise RuntimeError("Incorrect range of an unchunked value")
+
+    stream = test_store.open_read("large")
+    stream.seek(-50, io.SEEK_END)
+    if stream.read(10) != value[-50:-40] or stream.tell() != 1010:
+        raise RuntimeError("Incorrect seek")
+    stream.seek(0)
+    if stream.read() != value:
+        raise RuntimeError("Incorrect stream content")
+
+    test_store.mset([("large", b"short")])
+    if test_store.mget(["large"]) != [b"short"] or sorted(test_store.yield_keys()) != ["large", "small"]:
+        raise RuntimeError("Chunked value not replaced")
+
+
+@pytest.mark.parametrize("store_class", [BytesStoreSqlite, BytesStoreDuckdb])
+def test_bytes_store_open_write(tmp_path: Path, store_class):
+    test_store = store_class("test_store", tmp_path / "test_store.db", chunk_size=64)
+    test_store.mset([("artifact", b"old")])
+    with test_store.open_write("artifact") as stream:
+        for i in range(10):
+            stream.write(bytes([i]) * 30)
+        if test_store.mget(["artifact"]) != [b"old"]:
+            raise RuntimeError("Partial value visible before close")
+    expected = b"".join(bytes([i]) * 30 for i in range(10))
+    if test_store.mget(["artifact"]) != [expected] or test_store.open_read("artifact").read() != expected:
+        raise RuntimeError("Incorrect streamed value")
+
+    with pytest.raises(ValueError):
+        with test_store.open_write("artifact") as stream:
+            stream.write(b"x" * 200)
+            raise ValueError("failed")
+    if test_store.mget(["artifact"]) != [expected] or list(test_store.yield_keys()) != ["artifact"]:
+        raise RuntimeError("Aborted write changed the value")
+
+    test_store.mdelete(["artifact"])
+    if test_store.open_read("artifact") is not None:
+        raise RuntimeError("Deleted value readable")
+
+
+@pytest.mark.parametrize("store_class", [BytesStoreSqlite, BytesStoreDuckdb])
+def test_bytes_store_stale_uploads(tmp_path: Path, store_class):
+    test_store = store_class("test_store", tmp_path / "test_store.db", chunk_size=64)
+    stream_recent = test_store.open_write("recent")
+    stream_recent.write(b"x" * 200)
+    test_store.purge_expired()
+    stream_recent.close()
+    if test_store.mget(["recent"]) != [b"x" * 200]:
+        raise RuntimeError("Recent upload purged")
+
+    # an upload of a writer that crashed is purged once it is older than the maximum age
+    stream_crashed = test_store.open_write("crashed")
+    stream_crashed.write(b"y" * 200)
+    test_store._UPLOAD_MAX_AGE = -1
+    test_store.purge_expired()
+    with test_store._get_connection() as conn:
+        count_chunks = conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+    if count_chunks != 4:
+        raise RuntimeError(f"Stale upload not purged, {count_chunks} chunks left")
+    with pytest.raises(OSError):
+        stream_crashed.close()
+    if test_store.mget(["crashed"]) != [None]:
+        raise RuntimeError("Purged upload stored")
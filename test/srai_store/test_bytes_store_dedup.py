@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test the content-addressed BytesStoreDedup"""
+
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+from srai_store.bytes_store_dedup import BytesStoreDedup
+from srai_store.bytes_store_disk import BytesStoreDisk
+
+
+def create_store(path_dir: Path, gc_grace_period: float = 0) -> BytesStoreDedup:
+    bytes_store = BytesStoreDisk("test_store", str(path_dir / "test_store"))
+    return BytesStoreDedup(bytes_store, path_dir / "test_store.index.db", gc_grace_period=gc_grace_period)
+
+
+def test_bytes_store_dedup(tmp_path: Path):
+    test_store = create_store(tmp_path)
+    test_store.mset([("key1", b"image"), ("key2", b"image"), ("key3", b"other")])
+    test_store.mset([("key4", b"image")])
+    if test_store.mget(["key1", "key2", "key4", "key5"]) != [b"image", b"image", b"image", None]:
+        raise RuntimeError("Incorrect values returned")
+    stats = test_store.stats()
+    if (stats["keys"], stats["blobs"], stats["uploads_skipped"]) != (4, 2, 1):
+        raise RuntimeError(f"Duplicate values not deduplicated {stats}")
+    if stats["bytes_logical"] != 20 or stats["bytes_stored"] != 10:
+        raise RuntimeError(f"Incorrect sizes {stats}")
+    if sorted(test_store.yield_keys(prefix="key")) != ["key1", "key2", "key3", "key4"]:
+        raise RuntimeError("Incorrect keys listed")
+    if len(asyncio.run(test_store.asample(2))) != 2:
+        raise RuntimeError("Incorrect number of values sampled")
+
+
+def test_bytes_store_dedup_gc(tmp_path: Path):
+    test_store = create_store(tmp_path)
+    test_store.mset([("key1", b"image"), ("key2", b"image"), ("key3", b"other")])
+    test_store.mset([("key3", b"changed")])
+    test_store.mdelete(["key1"])
+    if test_store.gc() != 1:
+        raise RuntimeError("Only the overwritten blob is unreferenced")
+    if test_store.mget(["key2", "key3"]) != [b"image", b"changed"] or test_store.store.count() != 2:
+        raise RuntimeError("Referenced blobs deleted")
+
+    test_store.mdelete(["key2"])
+    test_store.mset([("key5", b"image")])
+    if test_store.gc() != 0 or test_store.mget(["key5"]) != [b"image"]:
+        raise RuntimeError("Re-referenced blob collected")
+
+    test_store = create_store(tmp_path, gc_grace_period=3600)
+    test_store.mdelete(["key5"])
+    if test_store.gc() != 0:
+        raise RuntimeError("Blob collected within the grace period")
+    test_store.clear()
+    if test_store.count() != 0 or test_store.store.count() != 0:
+        raise RuntimeError("Store not cleared")
+
+
+def test_bytes_store_dedup_gc_concurrent_write(tmp_path: Path):
+    test_store = create_store(tmp_path)
+    test_store.mset([("key1", b"image")])
+    test_store.mdelete(["key1"])
+
+    # another process writes the same value while gc deletes its unreferenced blob
+    other_store = create_store(tmp_path)
+    threads = []
+    mdelete = test_store.store.mdelete
+
+    def mdelete_racing(keys):
+        thread = threading.Thread(target=other_store.mset, args=([("key2", b"image")],))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.2)
+        mdelete(keys)
+
+    test_store.store.mdelete = mdelete_racing
+    if test_store.gc() != 1:
+        raise RuntimeError("Unreferenced blob not collected")
+    threads[0].join()
+    if other_store.mget(["key2"]) != [b"image"]:
+        raise RuntimeError("Concurrent write lost its blob to gc")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test the parallel key listing and sampling of BytesStoreS3 against moto"""
+
+import asyncio
+import time
+import uuid
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from srai_store.bytes_store_s3 import BytesStoreS3
+
+BUCKET_NAME = "test-bucket"
+
+
+@pytest.fixture(scope="module")
+def s3_client():
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET_NAME)
+        yield client
+
+
+@pytest.fixture(scope="module")
+def keys(s3_client) -> list:
+    # enough keys for a listing of several pages, with keys of other collections around it
+    keys = sorted(uuid.uuid4().hex for _ in range(3500))
+    for key in keys:
+        s3_client.put_object(Bucket=BUCKET_NAME, Key=f"listing/{key}", Body=key.encode())
+    s3_client.put_object(Bucket=BUCKET_NAME, Key="listing2/other", Body=b"other")
+    s3_client.put_object(Bucket=BUCKET_NAME, Key="lis/other", Body=b"other")
+    return keys
+
+
+def test_bytes_store_s3_yield_keys(s3_client, keys):
+    # splitting at "c" gives a range of more than one page before it and one after it
+    test_store = BytesStoreS3("listing", s3_client, BUCKET_NAME, list_max_workers=4, list_split_chars="c")
+    key_ranges = test_store._split_key_ranges("listing/", f"listing/{keys[999]}")
+    if len(key_ranges) != 2 or sum(1 for key in keys[1000:] if key <= "c") <= 1000:
+        raise RuntimeError(f"Listing does not span several pages and ranges {key_ranges}")
+    if list(test_store.yield_keys()) != keys:
+        raise RuntimeError("Parallel listing has duplicates, gaps or is out of order")
+    test_store_serial = BytesStoreS3("listing", s3_client, BUCKET_NAME, list_max_workers=1)
+    if list(test_store_serial.yield_keys()) != keys:
+        raise RuntimeError("Serial listing differs from the parallel listing")
+
+
+def test_bytes_store_s3_yield_keys_start_after(s3_client, keys):
+    test_store = BytesStoreS3("listing", s3_client, BUCKET_NAME, list_max_workers=4, list_split_chars="c")
+    for index in [0, 999, 2222, len(keys) - 1]:
+        if list(test_store.yield_keys(start_after=keys[index])) != keys[index + 1 :]:
+            raise RuntimeError(f"Listing not resumed after key {index}")
+    # resume from the last key seen by an interrupted scan
+    iterator = test_store.yield_keys()
+    seen = [next(iterator) for _ in range(1500)]
+    if seen + list(test_store.yield_keys(start_after=seen[-1])) != keys:
+        raise RuntimeError("Interrupted scan not resumed")
+
+
+def test_bytes_store_s3_yield_keys_close(s3_client, keys):
+    # one range per hex character, more ranges than workers
+    test_store = BytesStoreS3("listing", s3_client, BUCKET_NAME, list_max_workers=2, list_split_chars="0123456789abcdef")
+    count_list = 0
+
+    def count_list_call(**kwargs) -> None:
+        nonlocal count_list
+        count_list += 1
+
+    s3_client.meta.events.register("before-call.s3.ListObjectsV2", count_list_call)
+    try:
+        iterator = test_store.yield_keys()
+        seen = [next(iterator) for _ in range(1100)]
+        iterator.close()
+        time.sleep(0.5)
+        count_list_closed = count_list
+        time.sleep(0.5)
+    finally:
+        s3_client.meta.events.unregister("before-call.s3.ListObjectsV2", count_list_call)
+    if seen != keys[:1100]:
+        raise RuntimeError("Listing out of order")
+    # the first page, the ranges consumed and at most the ranges of the workers buffered ahead
+    if count_list != count_list_closed or count_list > 16:
+        raise RuntimeError(f"Listing continued after the generator was closed: {count_list} list calls")
+
+
+def test_bytes_store_s3_count(s3_client, keys):
+    test_store = BytesStoreS3("listing", s3_client, BUCKET_NAME, list_max_workers=4, list_split_chars="c")
+    if test_store.count() != len(keys):
+        raise RuntimeError("Wrong count")
+    for prefix in ["a", "0f", "zz"]:
+        if test_store.count(prefix=prefix) != sum(1 for key in keys if key.startswith(prefix)):
+            raise RuntimeError(f"Wrong count for prefix {prefix}")
+
+
+def test_bytes_store_s3_asample(s3_client):
+    for index in range(30):
+        s3_client.put_object(Bucket=BUCKET_NAME, Key=f"sample/key{index}", Body=f"value{index}".encode())
+    s3_client.put_object(Bucket=BUCKET_NAME, Key="sample2/key0", Body=b"other")
+    s3_client.put_object(Bucket=BUCKET_NAME, Key="sampl/key0", Body=b"other")
+    values_stored = {f"value{index}".encode() for index in range(30)}
+    test_store = BytesStoreS3("sample", s3_client, BUCKET_NAME, list_max_workers=4)
+
+    sample = asyncio.run(test_store.asample(10))
+    if len(sample) != 10 or len(set(sample)) != 10:
+        raise RuntimeError(f"Sample size not exact {len(sample)}")
+    if not set(sample) <= values_stored:
+        raise RuntimeError("Sampled values differ from the stored values or come from another prefix")
+    sample_all = asyncio.run(test_store.asample(100))
+    if len(sample_all) != 30 or set(sample_all) != values_stored:
+        raise RuntimeError("Oversized sample does not return every value once")
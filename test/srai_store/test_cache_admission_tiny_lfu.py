@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test TinyLFU frequency based cache admission"""
+
+from typing import List
+
+from srai_store.cache_admission_tiny_lfu import CacheAdmissionTinyLfu
+from srai_store.dict_store_lru import DictStoreLru
+from srai_store.embedding_model_base import EmbeddingModelBase
+
+
+class EmbeddingModelCounting(EmbeddingModelBase):
+    def _embed_query(self, string: str) -> List[float]:
+        return [float(len(string)), 0.0]
+
+    def _embed_documents(self, texts: list[str]) -> List[List[float]]:
+        return [self._embed_query(text) for text in texts]
+
+
+def test_cache_admission_tiny_lfu():
+    admission = CacheAdmissionTinyLfu(expected_keys=1000)
+    for _ in range(5):
+        admission.record("hot")
+    admission.record("cold")
+    for i in range(500):
+        admission.record(f"scan{i}")
+
+    if admission.frequency("hot") < 5 or admission.frequency("cold") > 2:
+        raise RuntimeError("Incorrect frequency estimates")
+    if not admission.admit("hot") or admission.admit("scan1"):
+        raise RuntimeError("Incorrect admission decisions")
+    if admission.top_keys(1)[0][0] != "hot":
+        raise RuntimeError(f"Incorrect top keys: {admission.top_keys(3)}")
+
+    admission = CacheAdmissionTinyLfu(expected_keys=16, sample_size=40)
+    for _ in range(10):
+        admission.record("hot")
+    frequency_before = admission.frequency("hot")
+    for i in range(30):
+        admission.record(f"scan{i}")
+    if admission.frequency("hot") >= frequency_before:
+        raise RuntimeError("Frequencies not aged")
+
+
+def test_cache_admission_tiny_lfu_lru_store():
+    test_store = DictStoreLru("test_store", max_entries=2, admission=CacheAdmissionTinyLfu(expected_keys=100))
+    test_store.mset([("hot1", {"a": 1}), ("hot2", {"a": 2})])
+    for _ in range(3):
+        test_store.mget(["hot1", "hot2"])
+    for i in range(20):
+        test_store.mget([f"scan{i}"])
+        test_store.mset([(f"scan{i}", {"a": i})])
+    if test_store.mget(["hot1", "hot2"]) != [{"a": 1}, {"a": 2}]:
+        raise RuntimeError("Scan flushed hot entries")
+    if test_store.stats()["rejected"] != 20:
+        raise RuntimeError("Scan keys not rejected")
+
+
+def test_cache_admission_tiny_lfu_embedding():
+    cache_store = DictStoreLru("embedding")
+    embedding_model = EmbeddingModelCounting("counting", 2, cache_store, CacheAdmissionTinyLfu(expected_keys=100))
+    embedding_model.embed_documents(["once", "twice"])
+    embedding_model.embed_query("twice")
+    if cache_store.count() != 1:
+        raise RuntimeError("Embedding cache admission not applied")
+
+    # the embedding computed before admission is reused once the key is admitted
+    count_calls = []
+    embedding_model._embed_query = lambda string: count_calls.append(string) or [0.0, 0.0]  # type: ignore
+    embedding_model.embed_query("three")
+    embedding_model.embed_documents(["three"])
+    if count_calls != ["three"] or cache_store.count() != 2:
+        raise RuntimeError("Embedding computed twice before admission")
+
+
+def test_cache_admission_tiny_lfu_top_keys():
+    admission = CacheAdmissionTinyLfu(expected_keys=1000, top_keys_capacity=10)
+    for i in range(50):
+        for _ in range(i % 7 + 1):
+            admission.record(f"key{i}")
+    # 7 keys are looked up 7 times, 7 keys 6 times
+    top_keys = admission.top_keys(10)
+    if len(top_keys) != 10 or [frequency for _, frequency in top_keys] != [7] * 7 + [6] * 3:
+        raise RuntimeError(f"Incorrect top keys: {top_keys}")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test cross-process cache invalidation through a shared SQLite file"""
+
+import time
+from pathlib import Path
+
+from srai_store.cache_invalidator_sqlite import CacheInvalidatorSqlite
+from srai_store.dict_store_cache import DictStoreCache
+from srai_store.dict_store_lru import DictStoreLru
+from srai_store.dict_store_sqlite import DictStoreSqlite
+
+
+def create_store(path_dir: Path, poll_interval: float = 60) -> DictStoreCache:
+    # every store gets its own invalidator, like a separate process would
+    invalidator = CacheInvalidatorSqlite(path_dir / "invalidation.db", poll_interval=poll_interval, max_messages=10)
+    dict_store_base = DictStoreSqlite("test_store", path_dir / "test_store.db")
+    return DictStoreCache(DictStoreLru("test_store"), dict_store_base, read_through=True, invalidator=invalidator)
+
+
+def test_cache_invalidator_sqlite(tmp_path: Path):
+    store_a = create_store(tmp_path)
+    store_b = create_store(tmp_path)
+    store_a.mset([("doc1", {"a": 1}), ("doc2", {"a": 1})])
+    store_b.invalidator.poll()  # type: ignore
+    if store_b.mget(["doc1", "doc2"]) != [{"a": 1}, {"a": 1}]:
+        raise RuntimeError("Incorrect documents returned")
+
+    store_a.mset([("doc1", {"a": 2})])
+    if store_b.get("doc1") != {"a": 1}:
+        raise RuntimeError("Expected the stale entry before polling")
+    store_b.invalidator.poll()  # type: ignore
+    store_a.invalidator.poll()  # type: ignore
+    if store_b.get("doc1") != {"a": 2} or store_b.dict_store_cache.get("doc2") != {"a": 1}:
+        raise RuntimeError("Changed key not evicted, or unchanged key evicted")
+    if store_a.dict_store_cache.get("doc1") != {"a": 2}:
+        raise RuntimeError("Own write evicted")
+
+    # fall behind the pruned messages, which drops the whole cache
+    store_a.mset([(f"doc{i}", {"a": i}) for i in range(3, 30)])
+    store_b.invalidator.poll()  # type: ignore
+    if store_b.dict_store_cache.count() != 0:
+        raise RuntimeError("Cache not dropped after missing messages")
+
+
+def test_cache_invalidator_sqlite_thread(tmp_path: Path):
+    store_a = create_store(tmp_path, poll_interval=0.01)
+    store_b = create_store(tmp_path, poll_interval=0.01)
+    store_a.mset([("doc1", {"a": 1})])
+    store_b.get("doc1")
+    store_a.mdelete(["doc1"])
+    for _ in range(100):
+        if store_b.dict_store_cache.get("doc1") is None:
+            break
+        time.sleep(0.01)
+    if store_b.get("doc1") is not None:
+        raise RuntimeError("Delete not propagated")
+    store_a.invalidator.close()  # type: ignore
+    store_b.invalidator.close()  # type: ignore
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Test the dict serializers and migrating a collection between them"""
+
+from pathlib import Path
+
+import pytest
+
+from srai_store.bytes_store_sqlite import BytesStoreSqlite
+from srai_store.dict_serializer_registry import decode_document, get_dict_serializer
+from srai_store.dict_store_bytes import DictStoreBytes
+from srai_store.dict_store_sqlite import DictStoreSqlite
+
+DOCUMENT = {"brand_name": "Invest in Bansko", "size": 100, "tags": ["a", "b"], "owner": {"name": "a"}}
+
+
+@pytest.mark.parametrize("serializer_name", ["json", "orjson", "msgpack"])
+def test_serializer_round_trip(serializer_name: str):
+    pytest.importorskip(serializer_name)
+    serializer = get_dict_serializer(serializer_name)
+    for other_name in ("json", "orjson"):
+        if decode_document(serializer.encode(DOCUMENT), get_dict_serializer(other_name)) != DOCUMENT:
+            raise RuntimeError(f"{serializer_name} document not readable with {other_name}")
+
+
+def test_dict_store_bytes_migration(tmp_path: Path):
+    pytest.importorskip("msgpack")
+    bytes_store = BytesStoreSqlite("test_store", tmp_path / "test_store.db")
+    DictStoreBytes(bytes_store).mset([("old", DOCUMENT)])
+    test_store = DictStoreBytes(bytes_store, serializer="msgpack")
+    test_store.mset([("new", DOCUMENT)])
+    if bytes_store.mget(["new"])[0][:1] != b"\x01":
+        raise RuntimeError("New documents not written with msgpack")
+    if test_store.mget(["old", "new"]) != [DOCUMENT, DOCUMENT]:
+        raise RuntimeError("Documents not read back")
+
+
+def test_dict_store_sqlite_orjson(tmp_path: Path):
+    pytest.importorskip("orjson")
+    test_store = DictStoreSqlite("test_store", tmp_path / "test_store.db", serializer="orjson")
+    test_store.mset([("doc1", DOCUMENT)])
+    if test_store.query({"owner.name": "a"}) != [DOCUMENT]:
+        raise RuntimeError("json_extract query failed on orjson documents")
+    with pytest.raises(ValueError):
+        DictStoreSqlite("test_store", tmp_path / "test_store.db", serializer="msgpack")
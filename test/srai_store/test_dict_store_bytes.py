@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test the DictStoreBytes sidecar query index"""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from srai_store.bytes_store_sqlite import BytesStoreSqlite
+from srai_store.dict_store_bytes import DictStoreBytes
+from srai_store.dict_store_sqlite import DictStoreSqlite
+
+
+def create_store(path_dir: Path) -> DictStoreBytes:
+    bytes_store = BytesStoreSqlite("test_store", path_dir / "test_store.db")
+    index_store = DictStoreSqlite("test_store", path_dir / "test_store.index.db")
+    return DictStoreBytes(bytes_store, index_store, ["brand_name", "size", "owner.name"])
+
+
+def test_dict_store_bytes_query(tmp_path: Path):
+    test_store = create_store(tmp_path)
+    test_store.mset(
+        [
+            ("doc1", {"brand_name": "Invest in Bansko", "size": 100, "owner": {"name": "a"}, "body": "x"}),
+            ("doc2", {"brand_name": "Invest in Bansko", "size": 200, "owner": {"name": "b"}, "body": "y"}),
+            ("doc3", {"brand_name": "Invest in Bansko2", "size": 300, "body": "z"}),
+        ]
+    )
+
+    query_result = test_store.query({"brand_name": "Invest in Bansko"}, order_by=[("size", False)])
+    if [document["size"] for document in query_result] != [200, 100]:
+        raise RuntimeError("Incorrect documents found")
+    if query_result[0]["body"] != "y":
+        raise RuntimeError("Query did not return the full document")
+    if test_store.count_query({"size": {"$lte": 250}}) != 2:
+        raise RuntimeError("Incorrect number of documents found")
+    if test_store.query_keys({"owner.name": {"$in": ["b", "c"]}}) != ["doc2"]:
+        raise RuntimeError("Nested field query failed")
+
+    test_store.mdelete(["doc1"])
+    if test_store.count_query({"brand_name": "Invest in Bansko"}) != 1:
+        raise RuntimeError("Index not updated on delete")
+
+    with pytest.raises(ValueError):
+        test_store.query({"body": "x"})
+
+
+def test_dict_store_bytes_rebuild_index(tmp_path: Path):
+    bytes_store = BytesStoreSqlite("test_store", tmp_path / "test_store.db")
+    DictStoreBytes(bytes_store).mset([(f"doc{i}", {"brand_name": "b", "size": i}) for i in range(5)])
+
+    test_store = create_store(tmp_path)
+    if test_store.count_query({}) != 0:
+        raise RuntimeError("Index should start empty")
+    if test_store.rebuild_index(batch_size=2) != 5:
+        raise RuntimeError("Incorrect number of documents indexed")
+    if test_store.count_query({"size": {"$gte": 3}}) != 2:
+        raise RuntimeError("Incorrect number of documents found")
+    if len(asyncio.run(test_store.asample(3))) != 3:
+        raise RuntimeError("Incorrect number of documents sampled")
+
+
+def test_dict_store_bytes_index_json_and_ttl(tmp_path: Path):
+    pytest.importorskip("msgpack")
+    bytes_store = BytesStoreSqlite("test_store", tmp_path / "test_store.db")
+    index_store = DictStoreSqlite("test_store", tmp_path / "test_store.index.db")
+    test_store = DictStoreBytes(bytes_store, index_store, ["brand_name"], serializer="msgpack")
+    # JSON input is indexed as JSON, not with the msgpack serializer of new documents
+    test_store.mset_json([("doc1", '{"brand_name": "a"}'), ("doc2", b'{"brand_name": "a"}')])
+    test_store.mset([("doc3", {"brand_name": "a"})], ttl=-1)
+    if test_store.count_query({"brand_name": "a"}) != 2 or test_store.query_keys({"brand_name": "a"}) != ["doc1", "doc2"]:
+        raise RuntimeError("Index counts expired or misparsed documents")
+    test_store.purge_expired()
+    with index_store._get_connection() as conn:
+        count_rows = conn.execute("SELECT COUNT(*) FROM store").fetchone()[0]
+    if count_rows != 2:
+        raise RuntimeError("Expired index rows not purged")
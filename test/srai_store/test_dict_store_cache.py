@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Test the DictStoreCache read-through, negative cache, write behind and query cache modes"""
+
+import time
+from pathlib import Path
+
+import pytest
+from pydantic import BaseModel
+
+from srai_store import cache_write_behind
+from srai_store.cache_admission_second_hit import CacheAdmissionSecondHit
+from srai_store.cache_negative import CacheNegative
+from srai_store.cache_query import CacheQuery
+from srai_store.cache_write_behind import CacheWriteBehind
+from srai_store.dict_store_cache import DictStoreCache
+from srai_store.dict_store_lru import DictStoreLru
+from srai_store.dict_store_sqlite import DictStoreSqlite
+from srai_store.exceptions import WriteBehindError
+from srai_store.store_provider_cache import StoreProviderCache
+from srai_store.store_provider_memory import StoreProviderInMemory
+from srai_store.store_provider_sqlite import StoreProviderSqlite
+
+
+class Listing(BaseModel):
+    brand_name: str
+
+
+def test_dict_store_cache_read_through(tmp_path: Path):
+    dict_store_base = DictStoreSqlite("test_store", tmp_path / "test_store.db")
+    dict_store_base.mset([("doc1", {"a": 1}), ("doc2", {"a": 2})])
+
+    dict_store_cache = DictStoreLru("test_store")
+    DictStoreCache(dict_store_cache, dict_store_base).mget(["doc1"])
+    if dict_store_cache.count() != 0:
+        raise RuntimeError("Cache populated without read_through")
+
+    test_store = DictStoreCache(dict_store_cache, dict_store_base, read_through=True)
+    if test_store.mget(["doc1", "doc2", "doc3"]) != [{"a": 1}, {"a": 2}, None]:
+        raise RuntimeError("Incorrect documents returned")
+    if dict_store_cache.mget(["doc1", "doc2", "doc3"]) != [{"a": 1}, {"a": 2}, None]:
+        raise RuntimeError("Cache not populated")
+
+
+class RacingSqliteStore(DictStoreSqlite):
+    """Runs on_read after reading, like a concurrent writer between the base read and the read-through."""
+
+    on_read = None
+
+    def mget(self, keys):
+        documents = super().mget(keys)
+        on_read, self.on_read = self.on_read, None
+        if on_read is not None:
+            on_read()
+        return documents
+
+
+def test_dict_store_cache_read_through_concurrent_write(tmp_path: Path):
+    dict_store_base = RacingSqliteStore("test_store", tmp_path / "test_store.db")
+    dict_store_base.mset([("doc1", {"a": 1}), ("doc2", {"a": 1})])
+    dict_store_cache = DictStoreLru("test_store")
+    test_store = DictStoreCache(dict_store_cache, dict_store_base, read_through=True)
+
+    dict_store_base.on_read = lambda: test_store.mset([("doc1", {"a": 2})])
+    test_store.mget(["doc1"])
+    if test_store.mget(["doc1"]) != [{"a": 2}]:
+        raise RuntimeError("Read-through cached a value read before a write")
+
+    # another process writes the base tier and its invalidation arrives after our read
+    def write_other_process():
+        DictStoreSqlite.mset(dict_store_base, [("doc2", {"a": 2})])
+        test_store._invalidate(["doc2"])
+
+    dict_store_base.on_read = write_other_process
+    test_store.mget(["doc2"])
+    if test_store.mget(["doc2"]) != [{"a": 2}]:
+        raise RuntimeError("Read-through cached a value read before an invalidation")
+
+
+def test_dict_store_cache_admission(tmp_path: Path):
+    dict_store_base = DictStoreSqlite("test_store", tmp_path / "test_store.db")
+    dict_store_base.mset([("doc1", {"a": 1})])
+    dict_store_cache = DictStoreLru("test_store")
+    test_store = DictStoreCache(dict_store_cache, dict_store_base, read_through=True, admission=CacheAdmissionSecondHit())
+
+    test_store.mget(["doc1"])
+    if dict_store_cache.get("doc1") is not None:
+        raise RuntimeError("Key admitted on first lookup")
+    test_store.mget(["doc1"])
+    if dict_store_cache.get("doc1") != {"a": 1}:
+        raise RuntimeError("Key not admitted on second lookup")
+
+
+def test_store_provider_cache_read_through(tmp_path: Path):
+    StoreProviderSqlite("test", tmp_path).get_object_store("test_store", Listing).mset([("doc1", Listing(brand_name="b"))])
+    store_provider_memory = StoreProviderInMemory("test")
+    store_provider = StoreProviderCache("test", store_provider_memory, StoreProviderSqlite("test", tmp_path), read_through=True)
+    test_store = store_provider.get_object_store("test_store", Listing)
+    if test_store.get("doc1") != Listing(brand_name="b"):
+        raise RuntimeError("Incorrect object returned")
+    if store_provider_memory.get_dict_store("test_store").get("doc1") != {"brand_name": "b"}:
+        raise RuntimeError("Cache not populated")
+
+
+class CountingStore(DictStoreLru):
+    def __init__(self, collection_name: str) -> None:
+        super().__init__(collection_name)
+        self.count_mget = 0
+
+    def mget(self, keys):
+        self.count_mget += 1
+        return super().mget(keys)
+
+
+def test_dict_store_cache_negative():
+    dict_store_base = CountingStore("test_store")
+    test_store = DictStoreCache(DictStoreLru("test_store"), dict_store_base, negative_cache=CacheNegative(ttl=60))
+
+    for _ in range(3):
+        if test_store.mget(["doc1"]) != [None]:
+            raise RuntimeError("Incorrect document returned")
+    if dict_store_base.count_mget != 1:
+        raise RuntimeError("Repeated miss reached the base store")
+
+    test_store.mset([("doc1", {"a": 1})])
+    if test_store.mget(["doc1"]) != [{"a": 1}]:
+        raise RuntimeError("Negative cache not invalidated on mset")
+
+    test_store.mdelete(["doc1"])
+    count_mget = dict_store_base.count_mget
+    if test_store.get("doc1") is not None or dict_store_base.count_mget != count_mget:
+        raise RuntimeError("Deleted key not answered by the negative cache")
+
+    negative_cache = CacheNegative(ttl=0)
+    negative_cache.add(["doc2"])
+    if negative_cache.contains("doc2"):
+        raise RuntimeError("Expired key still known missing")
+    generation = negative_cache.generation()
+    negative_cache.discard(["doc3"])
+    negative_cache.add(["doc3"], generation)
+    if negative_cache.contains("doc3"):
+        raise RuntimeError("Miss read before a write was remembered")
+
+
+class SlowStore(DictStoreLru):
+    def __init__(self, collection_name: str, fail: bool = False) -> None:
+        super().__init__(collection_name)
+        self.fail = fail
+        self.count_mset = 0
+
+    def mset(self, key_value_pairs, ttl=None):
+        self.count_mset += 1
+        if self.fail:
+            raise ConnectionError("base store unavailable")
+        time.sleep(0.01)
+        super().mset(key_value_pairs, ttl)
+
+
+def test_dict_store_cache_write_behind():
+    dict_store_base = SlowStore("test_store")
+    test_store = DictStoreCache(DictStoreLru("test_store", max_entries=1), dict_store_base, write_behind=True)
+    for i in range(100):
+        test_store.mset([("doc1", {"a": i}), (f"doc{i + 2}", {"a": i})])
+    test_store.mdelete(["doc2"])
+    if test_store.mget(["doc1", "doc2"]) != [{"a": 99}, None]:
+        raise RuntimeError("Pending writes not visible to reads")
+
+    test_store.flush()
+    if dict_store_base.get("doc1") != {"a": 99} or dict_store_base.get("doc2") is not None:
+        raise RuntimeError("Writes not flushed to the base store")
+    if dict_store_base.count_mset >= 100:
+        raise RuntimeError("Writes not coalesced into batches")
+    test_store.close()
+
+    test_store = DictStoreCache(DictStoreLru("test_store"), SlowStore("test_store", fail=True), write_behind=True)
+    test_store.mset([("doc1", {"a": 1})])
+    with pytest.raises(WriteBehindError):
+        test_store.flush()
+    test_store.close()
+
+
+def test_cache_write_behind_full_batch():
+    written = []
+    write_behind = CacheWriteBehind("test_store", written.extend, lambda keys: None, batch_size=10, flush_interval=30)
+    if write_behind not in cache_write_behind._QUEUES_OPEN:
+        raise RuntimeError("Queue not registered for the exit flush")
+    time_start = time.time()
+    write_behind.mset([(f"doc{i}", i) for i in range(10)])
+    write_behind.flush()
+    # a full batch is written without waiting for the flush interval
+    if len(written) != 10 or time.time() - time_start > 5:
+        raise RuntimeError("Full batch waited for the flush interval")
+    write_behind.close()
+    if write_behind in cache_write_behind._QUEUES_OPEN:
+        raise RuntimeError("Closed queue still registered")
+
+
+class CountingSqliteStore(DictStoreSqlite):
+    count_query_calls = 0
+
+    def query(self, query, order_by=None, limit=0, offset=0):
+        self.count_query_calls += 1
+        return super().query(query, order_by, limit, offset)
+
+    def count_query(self, query):
+        self.count_query_calls += 1
+        return super().count_query(query)
+
+
+def test_dict_store_cache_query_cache(tmp_path: Path):
+    dict_store_base = CountingSqliteStore("test_store", tmp_path / "test_store.db")
+    test_store = DictStoreCache(DictStoreLru("test_store"), dict_store_base, query_cache=CacheQuery(ttl=60))
+    test_store.mset([("doc1", {"brand_name": "b", "size": 1}), ("doc2", {"brand_name": "b", "size": 2})])
+
+    for _ in range(3):
+        if [d["size"] for d in test_store.query({"size": {"$gte": 1}, "brand_name": "b"}, [("size", False)])] != [2, 1]:
+            raise RuntimeError("Incorrect documents found")
+        if test_store.count_query({"brand_name": "b"}) != 2:
+            raise RuntimeError("Incorrect number of documents found")
+    # same query with the fields in another order hits the cache too
+    test_store.query({"brand_name": "b", "size": {"$gte": 1}}, [("size", False)])
+    if dict_store_base.count_query_calls != 2:
+        raise RuntimeError(f"Queries not cached: {dict_store_base.count_query_calls} base calls")
+    # changing a returned document does not change the cached result
+    test_store.query({"brand_name": "b"})[0]["size"] = 100
+    if 100 in [d["size"] for d in test_store.query({"brand_name": "b"})]:
+        raise RuntimeError("Cached query result mutated by a caller")
+
+    test_store.mdelete(["doc1"])
+    if test_store.count_query({"brand_name": "b"}) != 1:
+        raise RuntimeError("Query cache not invalidated on mdelete")
+    test_store.mset([("doc3", {"brand_name": "b", "size": 3})])
+    if test_store.count_query({"brand_name": "b"}) != 2:
+        raise RuntimeError("Query cache not invalidated on mset")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test the bounded in-memory DictStoreLru"""
+
+import time
+from pathlib import Path
+
+from srai_store.dict_store_cache import DictStoreCache
+from srai_store.dict_store_lru import DictStoreLru
+from srai_store.dict_store_sqlite import DictStoreSqlite
+from srai_store.store_provider_cache import StoreProviderCache
+from srai_store.store_provider_memory import StoreProviderInMemory
+from srai_store.store_provider_sqlite import StoreProviderSqlite
+
+
+def test_dict_store_lru_eviction():
+    test_store = DictStoreLru("test_store", max_entries=2)
+    test_store.mset([("doc1", {"a": 1}), ("doc2", {"a": 2})])
+    test_store.mget(["doc1"])
+    test_store.set("doc3", {"a": 3})
+
+    if test_store.mget(["doc1", "doc2", "doc3"]) != [{"a": 1}, None, {"a": 3}]:
+        raise RuntimeError("Least recently used document not evicted")
+    stats = test_store.stats()
+    if (stats["hits"], stats["misses"], stats["evictions"]) != (3, 1, 1):
+        raise RuntimeError(f"Incorrect stats {stats}")
+
+    test_store = DictStoreLru("test_store", max_entries=None, max_bytes=30)
+    test_store.mset([(f"doc{i}", {"value": "x" * 5}) for i in range(5)])
+    if test_store.count() != 1 or test_store.stats()["bytes"] > 30:
+        raise RuntimeError("Byte budget not enforced")
+
+
+def test_dict_store_lru_ttl():
+    test_store = DictStoreLru("test_store", default_ttl=0.05)
+    test_store.mset([("doc1", {"a": 1})])
+    test_store.set("doc2", {"a": 2}, ttl=60)
+    time.sleep(0.1)
+    if test_store.mget(["doc1", "doc2"]) != [None, {"a": 2}]:
+        raise RuntimeError("Expired document returned")
+    if list(test_store.yield_keys()) != ["doc2"] or test_store.stats()["expired"] != 1:
+        raise RuntimeError("Expiry not tracked")
+
+
+def test_dict_store_lru_cache_tier(tmp_path: Path):
+    dict_store_base = DictStoreSqlite("test_store", tmp_path / "test_store.db")
+    test_store = DictStoreCache(DictStoreLru("test_store"), dict_store_base)
+    test_store.mset([("doc1", {"brand_name": "b"})])
+    dict_store_base.mset([("doc2", {"brand_name": "b"})])
+    if test_store.mget(["doc1", "doc2", "doc3"]) != [{"brand_name": "b"}, {"brand_name": "b"}, None]:
+        raise RuntimeError("Incorrect documents returned")
+    if test_store.count_query({"brand_name": "b"}) != 2:
+        raise RuntimeError("count_query not passed to the base store")
+
+    store_provider = StoreProviderCache("test", StoreProviderInMemory("test"), StoreProviderSqlite("test", tmp_path))
+    dict_store = store_provider.get_dict_store("test_store")
+    dict_store.mset([("doc1", {"a": 1})])
+    if store_provider.store_provider_cache.get_dict_store("test_store").get("doc1") != {"a": 1}:
+        raise RuntimeError("Cache tier store not shared per collection")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test the N-tier DictStoreTiered"""
+
+from pathlib import Path
+
+import pytest
+from pydantic import BaseModel
+
+from srai_store.cache_admission_second_hit import CacheAdmissionSecondHit
+from srai_store.cache_admission_size_limit import CacheAdmissionSizeLimit
+from srai_store.dict_store_lru import DictStoreLru
+from srai_store.dict_store_sqlite import DictStoreSqlite
+from srai_store.dict_store_tiered import DictStoreTiered
+from srai_store.store_provider_memory import StoreProviderInMemory
+from srai_store.store_provider_sqlite import StoreProviderSqlite
+from srai_store.store_provider_tiered import StoreProviderTiered
+
+
+class Listing(BaseModel):
+    size: int
+
+
+def test_dict_store_tiered_promotion(tmp_path: Path):
+    tier_memory = DictStoreLru("test_store")
+    tier_local = DictStoreSqlite("test_store", tmp_path / "local.db")
+    tier_base = DictStoreSqlite("test_store", tmp_path / "base.db")
+    tier_base.mset([("small", {"a": 1}), ("large", {"a": "x" * 100})])
+    test_store = DictStoreTiered(
+        [tier_memory, tier_local, tier_base],
+        promotions=[CacheAdmissionSizeLimit(50), CacheAdmissionSecondHit()],
+    )
+
+    if test_store.mget(["small", "large", "missing"]) != [{"a": 1}, {"a": "x" * 100}, None]:
+        raise RuntimeError("Incorrect documents returned")
+    if tier_memory.mget(["small", "large"]) != [{"a": 1}, None]:
+        raise RuntimeError("Size limited promotion not applied")
+    if tier_local.get("small") is not None:
+        raise RuntimeError("Key promoted to the second tier on first lookup")
+
+    test_store.mget(["large"])
+    if tier_local.get("large") is None or test_store.stats()["hits"] != [0, 0, 3]:
+        raise RuntimeError(f"Promotion on second hit failed: {test_store.stats()}")
+    test_store.mget(["small", "large"])
+    if test_store.stats()["hits"] != [1, 1, 3]:
+        raise RuntimeError(f"Hits not served by upper tiers: {test_store.stats()}")
+
+
+def test_dict_store_tiered_write_policies(tmp_path: Path):
+    tier_memory = DictStoreLru("test_store")
+    tier_local = DictStoreSqlite("test_store", tmp_path / "local.db")
+    tier_base = DictStoreSqlite("test_store", tmp_path / "base.db")
+    tier_local.mset([("doc1", {"a": 0})])
+    test_store = DictStoreTiered([tier_memory, tier_local, tier_base], write_policies=["through", "around", "behind"])
+
+    test_store.mset([("doc1", {"a": 1})])
+    if tier_memory.get("doc1") != {"a": 1} or tier_local.get("doc1") is not None:
+        raise RuntimeError("Write through / around not applied")
+    tier_memory.clear()
+    if test_store.get("doc1") != {"a": 1}:
+        raise RuntimeError("Queued write behind not visible to reads")
+    test_store.flush()
+    if tier_base.get("doc1") != {"a": 1}:
+        raise RuntimeError("Write behind not flushed")
+    test_store.close()
+
+    with pytest.raises(ValueError):
+        DictStoreTiered([tier_memory, tier_base], write_policies=["through", "around"])
+
+
+def test_store_provider_tiered(tmp_path: Path):
+    store_provider_memory = StoreProviderInMemory("test")
+    store_provider = StoreProviderTiered(
+        "test",
+        [store_provider_memory, StoreProviderSqlite("test", tmp_path / "local"), StoreProviderSqlite("test", tmp_path / "base")],
+    )
+    test_store = store_provider.get_object_store("test_store", Listing)
+    test_store.mset([("doc1", Listing(size=1))])
+    store_provider_memory.get_dict_store("test_store").clear()
+    if test_store.get("doc1") != Listing(size=1):
+        raise RuntimeError("Incorrect object returned")
+    if store_provider_memory.get_dict_store("test_store").get("doc1") != {"size": 1}:
+        raise RuntimeError("Object not promoted to the memory tier")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test partial updates with mupdate"""
+
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from srai_store.dict_store_cache import DictStoreCache
+from srai_store.dict_store_duckdb import DictStoreDuckdb
+from srai_store.dict_store_lru import DictStoreLru
+from srai_store.dict_store_memory import DictStoreMemory
+from srai_store.dict_store_sqlite import DictStoreSqlite
+from srai_store.dict_update import apply_update, validate_update
+
+
+def create_store(store_class, tmp_path: Path):
+    if store_class is DictStoreMemory:
+        return DictStoreMemory("test_store")
+    return store_class("test_store", tmp_path / "test_store.db")
+
+
+@pytest.mark.parametrize("store_class", [DictStoreSqlite, DictStoreDuckdb, DictStoreMemory])
+def test_dict_store_mupdate(tmp_path: Path, store_class):
+    test_store = create_store(store_class, tmp_path)
+    test_store.mset(
+        [
+            ("doc1", {"brand": "a", "visits": 1, "score": 0.5, "meta": {"old": 1}, "tags": ["x"]}),
+            ("doc2", {"brand": "b", "visits": 5}),
+            ("doc3", {"brand": "a"}),
+        ]
+    )
+    count_updated = test_store.mupdate(
+        ["doc1", "doc4"],
+        {
+            "$set": {"brand": "c", "meta": {"new": 2}, "user.name": "Alice", "tags": ["y", "z"]},
+            "$inc": {"visits": 2, "score": 1},
+            "$unset": {"missing.field": ""},
+        },
+    )
+    if count_updated != 1:
+        raise RuntimeError(f"Wrong number of updated documents {count_updated}")
+    document = test_store.get("doc1")
+    expected = {"brand": "c", "visits": 3, "score": 1.5, "meta": {"new": 2}, "tags": ["y", "z"], "user": {"name": "Alice"}}
+    if document != expected or not isinstance(document["visits"], int):
+        raise RuntimeError(f"Update not applied {document}")
+    if test_store.get("doc4") is not None:
+        raise RuntimeError("Update created a document")
+
+    # the memory store has no query, it updates by key through the DictStoreBase fallback
+    keys_or_query = ["doc3"] if store_class is DictStoreMemory else {"brand": "a"}
+    if test_store.mupdate(keys_or_query, {"$inc": {"visits": 1}, "$unset": {"brand": ""}}) != 1:
+        raise RuntimeError("Query update matched the wrong documents")
+    if test_store.get("doc3") != {"visits": 1}:
+        raise RuntimeError(f"Query update not applied {test_store.get('doc3')}")
+
+    if test_store.mupdate(["doc2"], {"$set": {"brand": None, "meta": {"a": None}}}) != 1:
+        raise RuntimeError("Null update not applied")
+    if test_store.get("doc2") != {"brand": None, "visits": 5, "meta": {"a": None}}:
+        raise RuntimeError(f"Null values not set {test_store.get('doc2')}")
+
+    with pytest.raises(ValueError):
+        test_store.mupdate(["doc1", "doc2"], {"$inc": {"visits": 1, "brand": 1}})
+    if test_store.get("doc2")["visits"] != 5:
+        raise RuntimeError("Failed update was partially applied")
+
+
+@pytest.mark.parametrize("store_class", [DictStoreSqlite, DictStoreDuckdb])
+def test_dict_store_mupdate_ttl(tmp_path: Path, store_class):
+    test_store = store_class("test_store", tmp_path / "test_store.db")
+    test_store.mset([("doc1", {"visits": 1})], ttl=0.5)
+    test_store.mset([("doc2", {"visits": 1})], ttl=-1)
+    if test_store.mupdate(["doc1", "doc2"], {"$inc": {"visits": 1}}) != 1:
+        raise RuntimeError("Expired document updated")
+    if asyncio.run(test_store.amget(["doc1"])) != [{"visits": 2}]:
+        raise RuntimeError("Update not applied")
+    time.sleep(0.6)
+    if test_store.get("doc1") is not None:
+        raise RuntimeError("Update dropped the ttl")
+
+
+class RecordingSqliteStore(DictStoreSqlite):
+    def __init__(self, collection_name: str, path_file_database: Path) -> None:
+        super().__init__(collection_name, path_file_database)
+        self.updates = []
+
+    def mupdate(self, keys_or_query, update):
+        self.updates.append(keys_or_query)
+        return super().mupdate(keys_or_query, update)
+
+
+def test_dict_store_cache_mupdate(tmp_path: Path):
+    dict_store_base = RecordingSqliteStore("test_store", tmp_path / "test_store.db")
+    test_store = DictStoreCache(DictStoreLru("test_store", max_entries=100), dict_store_base, read_through=True)
+    test_store.mset([("doc1", {"brand": "a", "visits": 1}), ("doc2", {"brand": "b", "visits": 1})])
+    test_store.mget(["doc1", "doc2"])
+    asyncio.run(test_store.amupdate({"brand": "a"}, {"$inc": {"visits": 1}}))
+    if test_store.mget(["doc1", "doc2"]) != [{"brand": "a", "visits": 2}, {"brand": "b", "visits": 1}]:
+        raise RuntimeError("Cache tier not invalidated")
+    if dict_store_base.updates != [{"brand": "a"}]:
+        raise RuntimeError(f"Query not passed to the base tier {dict_store_base.updates}")
+
+
+def test_validate_update():
+    for update in [{}, {"$push": {"a": 1}}, {"$inc": {"a": "1"}}, {"$set": {"a": 1}, "$unset": {"a.b": ""}}, {"$set": {"a..b": 1}}]:
+        with pytest.raises(ValueError):
+            validate_update(update)
+    if apply_update({"a": {"b": 1}}, {"$unset": {"a.b": "", "c.d": ""}}) != {"a": {}}:
+        raise RuntimeError("Unset created or kept fields")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test micro-batching of single key gets"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from pydantic import BaseModel
+
+from srai_store.dict_store_batching import DictStoreBatching
+from srai_store.dict_store_lru import DictStoreLru
+from srai_store.object_store_batching import ObjectStoreBatching
+from srai_store.object_store_nested import ObjectStoreNested
+
+
+class Listing(BaseModel):
+    size: int
+
+
+class CountingStore(DictStoreLru):
+    def __init__(self, collection_name: str) -> None:
+        super().__init__(collection_name)
+        self.batches = []
+
+    def mget(self, keys):
+        self.batches.append(list(keys))
+        return super().mget(keys)
+
+
+def test_get_batcher_threads():
+    dict_store = CountingStore("test_store")
+    dict_store.mset([(f"doc{i}", {"size": i}) for i in range(20)])
+    test_store = DictStoreBatching(dict_store, window=0.05, max_batch=8)
+
+    with ThreadPoolExecutor(16) as executor:
+        results = list(executor.map(test_store.get, [f"doc{i}" for i in range(16)] + ["missing"]))
+    if results != [{"size": i} for i in range(16)] + [None]:
+        raise RuntimeError("Incorrect documents returned")
+    if len(dict_store.batches) >= 17 or max(len(batch) for batch in dict_store.batches) > 8:
+        raise RuntimeError(f"Gets not batched: {dict_store.batches}")
+
+
+def test_get_batcher_async():
+    dict_store = CountingStore("test_store")
+    dict_store.mset([(f"doc{i}", {"size": i}) for i in range(20)])
+    test_store = ObjectStoreBatching(ObjectStoreNested(dict_store, Listing), window=0.01, max_batch=8)
+
+    async def run():
+        return await asyncio.gather(*[test_store.aget(f"doc{i % 10}") for i in range(20)])
+
+    results = asyncio.run(run())
+    if [listing.size for listing in results] != [i % 10 for i in range(20)]:
+        raise RuntimeError("Incorrect objects returned")
+    if len(dict_store.batches) != 3 or max(len(batch) for batch in dict_store.batches) > 8:
+        raise RuntimeError(f"Gets not batched: {dict_store.batches}")
+
+    if test_store.mupdate(["doc1", "missing"], {"$inc": {"size": 10}}) != 1 or test_store.get("doc1").size != 11:
+        raise RuntimeError("mupdate not forwarded to the wrapped store")
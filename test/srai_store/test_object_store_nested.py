@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test the ObjectStoreNested JSON fast path"""
+
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel
+
+from srai_store.bytes_store_sqlite import BytesStoreSqlite
+from srai_store.dict_store_bytes import DictStoreBytes
+from srai_store.dict_store_duckdb import DictStoreDuckdb
+from srai_store.dict_store_sqlite import DictStoreSqlite
+from srai_store.object_store_nested import ObjectStoreNested
+
+
+class Owner(BaseModel):
+    name: str
+
+
+class Listing(BaseModel):
+    brand_name: str
+    size: int
+    owner: Optional[Owner] = None
+    tags: List[str] = []
+    created_at: datetime
+
+
+class Summary(BaseModel):
+    brand_name: str
+    size: int
+
+
+def create_dict_store(kind: str, path_dir: Path, serializer: str = "json"):
+    if kind == "sqlite":
+        return DictStoreSqlite("test_store", path_dir / "test_store.db", serializer=serializer)
+    if kind == "duckdb":
+        return DictStoreDuckdb("test_store", path_dir / "test_store.duckdb", serializer=serializer)
+    return DictStoreBytes(BytesStoreSqlite("test_store", path_dir / "test_store.db"), serializer=serializer)
+
+
+@pytest.mark.parametrize("kind", ["sqlite", "duckdb", "bytes"])
+def test_object_store_nested_json(tmp_path: Path, kind: str):
+    dict_store = create_dict_store(kind, tmp_path)
+    if not dict_store.supports_json:
+        raise RuntimeError("Store should support the JSON fast path")
+    test_store = ObjectStoreNested(dict_store, Listing)
+    listing = Listing(brand_name="b", size=1, owner=Owner(name="a"), tags=["x"], created_at=datetime(2024, 1, 2, 3, 4, 5))
+    test_store.mset([("doc1", listing)])
+
+    if test_store.mget(["doc1", "missing"]) != [listing, None]:
+        raise RuntimeError("Incorrect objects returned")
+    if dict_store.mget(["doc1"])[0]["owner"] != {"name": "a"}:
+        raise RuntimeError("Document not readable as dict")
+
+
+def test_object_store_nested_msgpack(tmp_path: Path):
+    pytest.importorskip("msgpack")
+    bytes_store = BytesStoreSqlite("test_store", tmp_path / "test_store.db")
+    DictStoreBytes(bytes_store).mset([("doc1", {"brand_name": "b", "size": 1})])
+
+    dict_store = DictStoreBytes(bytes_store, serializer="msgpack")
+    if dict_store.supports_json:
+        raise RuntimeError("msgpack store should not support the JSON fast path")
+    test_store = ObjectStoreNested(dict_store, Summary)
+    test_store.mset([("doc2", Summary(brand_name="c", size=2))])
+    if [listing.size for listing in test_store.mget(["doc1", "doc2"])] != [1, 2]:
+        raise RuntimeError("Incorrect objects returned")
+    if dict_store.mget_json(["doc2"])[0] is None:
+        raise RuntimeError("msgpack document not converted to JSON")
+
+
+@pytest.mark.parametrize("kind", ["sqlite", "bytes"])
+def test_object_store_nested_trusted(tmp_path: Path, kind: str):
+    dict_store = create_dict_store(kind, tmp_path)
+    dict_store.mset([("doc1", {"brand_name": "b", "size": "1", "owner": {"name": "a"}, "created_at": "2024-01-02T03:04:05"})])
+
+    test_store = ObjectStoreNested(dict_store, Listing)
+    listing = test_store.mget(["missing", "doc1"])[1]
+    if listing is None or listing.size != 1 or listing.created_at != datetime(2024, 1, 2, 3, 4, 5):
+        raise RuntimeError("Batch validation did not coerce the document")
+
+    trusted_store = ObjectStoreNested(dict_store, Listing, trusted=True)
+    listing = trusted_store.mget(["missing", "doc1"])[1]
+    if listing is None or listing.size != "1":
+        raise RuntimeError("Trusted mode should not validate")
+    if listing.owner is None or listing.owner.name != "a":
+        raise RuntimeError("Trusted mode did not construct nested models")
+
+    if trusted_store.mvalidate(["doc1"]) != 1:
+        raise RuntimeError("mvalidate should validate in trusted mode")
+    if trusted_store.mget(["doc1"])[0].size != 1:  # type: ignore
+        raise RuntimeError("mvalidate did not rewrite the document")
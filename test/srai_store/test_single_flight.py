@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Test request coalescing with SingleFlight"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import pytest
+
+from srai_store.dict_store_cache import DictStoreCache
+from srai_store.dict_store_lru import DictStoreLru
+from srai_store.embedding_model_base import EmbeddingModelBase
+from srai_store.single_flight import SingleFlight
+
+
+class SlowStore(DictStoreLru):
+    def __init__(self, collection_name: str) -> None:
+        super().__init__(collection_name)
+        self.count_mget = 0
+
+    def mget(self, keys):
+        self.count_mget += 1
+        time.sleep(0.05)
+        return super().mget(keys)
+
+
+class EmbeddingModelCounting(EmbeddingModelBase):
+    def __init__(self) -> None:
+        super().__init__("counting", 2, DictStoreLru("embedding"))
+        self.count_call = 0
+        self._lock = threading.Lock()
+
+    def _embed_query(self, string: str) -> List[float]:
+        with self._lock:
+            self.count_call += 1
+        time.sleep(0.05)
+        return [float(len(string)), 0.0]
+
+    def _embed_documents(self, texts: list[str]) -> List[List[float]]:
+        return [self._embed_query(text) for text in texts]
+
+
+def test_single_flight_threads():
+    single_flight = SingleFlight()
+    count_load = 0
+
+    def load() -> int:
+        nonlocal count_load
+        count_load += 1
+        time.sleep(0.05)
+        return 42
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda _: single_flight.do("key", load), range(8)))
+    if results != [42] * 8 or count_load != 1:
+        raise RuntimeError(f"Loads not coalesced: {count_load} loads")
+
+    with pytest.raises(ValueError):
+        single_flight.do("key", lambda: int("x"))
+    if single_flight.do("key", lambda: 1) != 1:
+        raise RuntimeError("Failed load not forgotten")
+
+
+def test_single_flight_async():
+    single_flight = SingleFlight()
+    count_load = 0
+
+    async def load() -> int:
+        nonlocal count_load
+        count_load += 1
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def run() -> List[int]:
+        return await asyncio.gather(*[single_flight.ado("key", load) for _ in range(8)])
+
+    if asyncio.run(run()) != [42] * 8 or count_load != 1:
+        raise RuntimeError(f"Loads not coalesced: {count_load} loads")
+
+    async def run_cancel_leader() -> List[int]:
+        leader = asyncio.ensure_future(single_flight.ado("key", load))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(single_flight.ado("key", load)) for _ in range(3)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await asyncio.gather(*followers)
+
+    # cancelling the caller that started the load does not cancel it for the others
+    if asyncio.run(run_cancel_leader()) != [42] * 3 or count_load != 2:
+        raise RuntimeError(f"Followers cancelled with the leader: {count_load} loads")
+
+
+def test_single_flight_dict_store_cache():
+    dict_store_base = SlowStore("test_store")
+    dict_store_base.mset([("doc1", {"a": 1})])
+    test_store = DictStoreCache(DictStoreLru("test_store"), dict_store_base, single_flight=True)
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda _: test_store.mget(["doc1", "doc2"]), range(8)))
+    if results != [[{"a": 1}, None]] * 8:
+        raise RuntimeError("Incorrect documents returned")
+    if dict_store_base.count_mget >= 8:
+        raise RuntimeError("Base lookups not coalesced")
+
+
+def test_single_flight_embedding():
+    embedding_model = EmbeddingModelCounting()
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda _: embedding_model.embed_query("abc"), range(8)))
+    if results != [[3.0, 0.0]] * 8 or embedding_model.count_call != 1:
+        raise RuntimeError(f"Embedding calls not coalesced: {embedding_model.count_call} calls")
+
+
+def test_single_flight_async_many():
+    single_flight = SingleFlight()
+    keys_loaded: List[List[str]] = []
+
+    async def load_many(keys: List[str]) -> dict:
+        keys_loaded.append(keys)
+        await asyncio.sleep(0.05)
+        return {key: key.upper() for key in keys if key != "missing"}
+
+    async def run() -> List[dict]:
+        return await asyncio.gather(
+            single_flight.ado_many(["a", "b"], load_many),
+            single_flight.ado_many(["b", "c", "missing"], load_many),
+            single_flight.ado("a", lambda: load_many(["a"])),
+        )
+
+    results = asyncio.run(run())
+    if results != [{"a": "A", "b": "B"}, {"b": "B", "c": "C", "missing": None}, "A"]:
+        raise RuntimeError(f"Incorrect results: {results}")
+    # b is only loaded by the first call, the ado call for a joins it
+    if keys_loaded != [["a", "b"], ["c", "missing"]]:
+        raise RuntimeError(f"Loads not coalesced: {keys_loaded}")
+
+
+def test_single_flight_dict_store_cache_async():
+    dict_store_base = SlowStore("test_store")
+    dict_store_base.mset([("doc1", {"a": 1})])
+    test_store = DictStoreCache(DictStoreLru("test_store"), dict_store_base, single_flight=True)
+
+    async def run() -> List[list]:
+        return await asyncio.gather(*[test_store.amget(["doc1", "doc2"]) for _ in range(8)])
+
+    if asyncio.run(run()) != [[{"a": 1}, None]] * 8:
+        raise RuntimeError("Incorrect documents returned")
+    if dict_store_base.count_mget != 1:
+        raise RuntimeError(f"Base lookups not coalesced: {dict_store_base.count_mget} lookups")
+
+
+def test_single_flight_embedding_async():
+    embedding_model = EmbeddingModelCounting()
+
+    async def run() -> List[List[float]]:
+        return await asyncio.gather(*[embedding_model.aembed_query("abc") for _ in range(8)])
+
+    if asyncio.run(run()) != [[3.0, 0.0]] * 8 or embedding_model.count_call != 1:
+        raise RuntimeError(f"Embedding calls not coalesced: {embedding_model.count_call} calls")
+
+
+def test_single_flight_chat_async():
+    pytest.importorskip("langchain")
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+    from langchain_core.messages import HumanMessage
+
+    from srai_store.chat_model_base import ChatModelWrapper
+
+    class ChatModelCounting(FakeListChatModel):
+        count_call: int = 0
+
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+            self.count_call += 1
+            await asyncio.sleep(0.05)
+            return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+    chat_model_inner = ChatModelCounting(responses=["answer"])
+    chat_model = ChatModelWrapper("counting", chat_model_inner, DictStoreLru("chat"))
+
+    async def run() -> list:
+        return await asyncio.gather(*[chat_model.ainvoke([HumanMessage(content="question")]) for _ in range(8)])
+
+    contents = [message.content for message in asyncio.run(run())]
+    if contents != ["answer"] * 8 or chat_model_inner.count_call != 1:
+        raise RuntimeError(f"Chat calls not coalesced: {chat_model_inner.count_call} calls")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test the async store API"""
+
+import asyncio
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+from pydantic import BaseModel
+
+from srai_store.bytes_store_sqlite import BytesStoreSqlite
+from srai_store.dict_store_bytes import DictStoreBytes
+from srai_store.dict_store_sqlite import DictStoreSqlite
+from srai_store.object_store_nested import ObjectStoreNested
+from srai_store.store_executor import aiterate_in_store_executor, run_in_store_executor
+from srai_store.store_provider_mongo import StoreProviderMongo
+
+
+class Summary(BaseModel):
+    text: str
+    size: int
+
+
+def test_dict_store_async(tmp_path: Path):
+    test_store = DictStoreSqlite("test_store", tmp_path / "test_store.db")
+
+    async def run():
+        await test_store.amset([(f"doc{i}", {"brand_name": "b", "size": i}) for i in range(5)])
+        await test_store.amset([("doc5", {"brand_name": "c", "size": 5})], ttl=60)
+        if await test_store.amget(["doc1", "doc9"]) != [{"brand_name": "b", "size": 1}, None]:
+            raise RuntimeError("Incorrect documents returned")
+        documents = await test_store.aquery({"brand_name": "b"}, order_by=[("size", False)], limit=2)
+        if [document["size"] for document in documents] != [4, 3]:
+            raise RuntimeError("Incorrect documents found")
+        if await test_store.acount_query({"size": {"$gte": 3}}) != 3 or await test_store.acount() != 6:
+            raise RuntimeError("Incorrect count")
+        await test_store.amdelete(["doc0"])
+        if sorted([key async for key in test_store.ayield_keys(prefix="doc")]) != [f"doc{i}" for i in range(1, 6)]:
+            raise RuntimeError("Incorrect keys listed")
+        if len(await test_store.asample(3)) != 3:
+            raise RuntimeError("Incorrect number of documents sampled")
+
+    asyncio.run(run())
+
+
+def test_object_store_async(tmp_path: Path):
+    bytes_store = BytesStoreSqlite("test_store", tmp_path / "test_store.db")
+    object_store = ObjectStoreNested(DictStoreBytes(bytes_store), Summary)
+
+    async def run():
+        await object_store.amset([("doc1", Summary(text="a", size=1)), ("doc2", Summary(text="b", size=2))])
+        if await object_store.amget(["doc2", "doc3"]) != [Summary(text="b", size=2), None]:
+            raise RuntimeError("Incorrect objects returned")
+        if await object_store.aget("doc1") != Summary(text="a", size=1):
+            raise RuntimeError("Incorrect object returned")
+        await object_store.amdelete(["doc1"])
+        if [key async for key in object_store.ayield_keys()] != ["doc2"]:
+            raise RuntimeError("Incorrect keys listed")
+
+    asyncio.run(run())
+
+
+def test_store_executor_iterate():
+    threads: List[str] = []
+
+    def create_iterator():
+        for i in range(10):
+            threads.append(threading.current_thread().name)
+            yield i
+
+    async def run():
+        if [item async for item in aiterate_in_store_executor(create_iterator, batch_size=3)] != list(range(10)):
+            raise RuntimeError("Incorrect items")
+        if await run_in_store_executor(lambda: threading.current_thread().name) == threading.current_thread().name:
+            raise RuntimeError("Blocking call ran on the event loop thread")
+        async for item in aiterate_in_store_executor(create_iterator, batch_size=1, max_pending_batches=1):
+            if item == 2:
+                break
+
+    asyncio.run(run())
+    if len(set(threads[:10])) != 1 or not threads[0].startswith("srai-store"):
+        raise RuntimeError("Iterator not stepped on a single store executor thread")
+
+
+def test_store_provider_mongo_async_client_per_loop():
+    # the clients connect lazily, no server is needed
+    store_provider = StoreProviderMongo("mongodb://localhost:27017;test", initialize=False)
+    test_store = store_provider.get_dict_store("test_store")
+
+    async def get_clients():
+        return store_provider.get_async_client(), store_provider.get_async_client(), test_store.async_collection
+
+    client_first, client_same, collection = asyncio.run(get_clients())
+    client_second, _, _ = asyncio.run(get_clients())
+    if client_first is not client_same or client_first is client_second:
+        raise RuntimeError("Async client not created per event loop")
+    if collection.name != "test_store" or len(store_provider._async_clients) != 1:
+        raise RuntimeError("Clients of closed event loops kept")
+    # the client of the closed loop is closed on the store executor
+    time_end = time.monotonic() + 5
+    while not client_first._closed and time.monotonic() < time_end:
+        time.sleep(0.01)
+    if not client_first._closed or client_second._closed:
+        raise RuntimeError("Client of closed event loop not closed")
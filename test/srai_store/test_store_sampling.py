@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test random and stratified sampling of the SQLite and DuckDB stores"""
+
+import asyncio
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from srai_store import store_sampling
+from srai_store.bytes_store_duckdb import BytesStoreDuckdb
+from srai_store.bytes_store_sqlite import BytesStoreSqlite
+from srai_store.dict_store_duckdb import DictStoreDuckdb
+from srai_store.dict_store_sqlite import DictStoreSqlite
+from srai_store.store_sampling import allocate_strata
+
+
+@pytest.mark.parametrize("scan_threshold", [10000, 100])
+@pytest.mark.parametrize("store_class", [DictStoreSqlite, DictStoreDuckdb])
+def test_dict_store_sample(tmp_path: Path, monkeypatch, store_class, scan_threshold):
+    # a low threshold makes the SQLite store probe rowids instead of sorting
+    monkeypatch.setattr(store_sampling, "SCAN_THRESHOLD", scan_threshold)
+    test_store = store_class("test_store", tmp_path / "test_store.db")
+    test_store.mset([(f"doc{i}", {"index": i}) for i in range(1000)])
+    test_store.mdelete([f"doc{i}" for i in range(0, 1000, 3)])
+    test_store.mset([(f"old{i}", {"index": -1}) for i in range(500)], ttl=-1)
+
+    sample = asyncio.run(test_store.asample(50))
+    indexes = [document["index"] for document in sample]
+    if len(indexes) != 50 or len(set(indexes)) != 50:
+        raise RuntimeError(f"Sample of wrong size or with duplicates {indexes}")
+    if any(index < 0 or index % 3 == 0 for index in indexes):
+        raise RuntimeError("Sample contains deleted or expired documents")
+    if len(asyncio.run(test_store.asample(5000))) != 666:
+        raise RuntimeError("Oversized sample does not return all live documents")
+
+
+@pytest.mark.parametrize("store_class", [DictStoreSqlite, DictStoreDuckdb])
+def test_dict_store_sample_stratified(tmp_path: Path, store_class):
+    test_store = store_class("test_store", tmp_path / "test_store.db")
+    brands = ["a"] * 500 + ["b"] * 100 + ["c"] * 3
+    test_store.mset([(f"doc{i}", {"brand": brand}) for i, brand in enumerate(brands)])
+    test_store.mset([("doc_none", {"other": 1})])
+
+    counts = Counter(document.get("brand") for document in asyncio.run(test_store.asample(40, stratify_by="brand")))
+    if counts != {"a": 18, "b": 18, "c": 3, None: 1}:
+        raise RuntimeError(f"Strata not sampled equally {counts}")
+
+
+@pytest.mark.parametrize("store_class", [BytesStoreSqlite, BytesStoreDuckdb])
+def test_bytes_store_sample(tmp_path: Path, monkeypatch, store_class):
+    monkeypatch.setattr(store_sampling, "SCAN_THRESHOLD", 100)
+    test_store = store_class("test_store", tmp_path / "test_store.db")
+    test_store.mset([(f"key{i}", f"value{i}".encode()) for i in range(400)])
+    test_store.mset([(f"old{i}", b"old") for i in range(400)], ttl=-1)
+
+    sample = asyncio.run(test_store.asample(30))
+    if len(set(sample)) != 30 or b"old" in sample:
+        raise RuntimeError("Sample of wrong size or with expired values")
+
+
+def test_allocate_strata():
+    allocation = allocate_strata({"a": 100, "b": 2, "c": 10}, 20)
+    if allocation != {"a": 9, "b": 2, "c": 9}:
+        raise RuntimeError(f"Wrong allocation {allocation}")
+    if allocate_strata({"a": 3, "b": 2}, 10) != {"a": 3, "b": 2}:
+        raise RuntimeError("Allocation exceeds the strata")
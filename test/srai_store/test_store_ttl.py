@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test per-key ttl and the expiry sweeper"""
+
+import time
+from pathlib import Path
+
+import pytest
+from pydantic import BaseModel
+
+from srai_store.bytes_store_duckdb import BytesStoreDuckdb
+from srai_store.bytes_store_sqlite import BytesStoreSqlite
+from srai_store.dict_store_bytes import DictStoreBytes
+from srai_store.dict_store_duckdb import DictStoreDuckdb
+from srai_store.dict_store_memory import DictStoreMemory
+from srai_store.dict_store_sqlite import DictStoreSqlite
+from srai_store.expiry_sweeper import ExpirySweeper
+from srai_store.object_store_nested import ObjectStoreNested
+
+
+class Summary(BaseModel):
+    text: str
+
+
+@pytest.mark.parametrize("store_class", [DictStoreSqlite, DictStoreDuckdb])
+def test_dict_store_ttl(tmp_path: Path, store_class):
+    test_store = store_class("test_store", tmp_path / "test_store.db")
+    test_store.mset([("doc1", {"brand_name": "b"}), ("doc2", {"brand_name": "b"})], ttl=0.5)
+    test_store.set("doc3", {"brand_name": "b"}, ttl=60)
+    test_store.set("doc4", {"brand_name": "b"})
+    if test_store.count_query({"brand_name": "b"}) != 4:
+        raise RuntimeError("Incorrect number of documents found")
+    time.sleep(0.6)
+
+    if test_store.mget(["doc1", "doc3", "doc4"]) != [None, {"brand_name": "b"}, {"brand_name": "b"}]:
+        raise RuntimeError("Expired document returned")
+    if sorted(test_store.yield_keys()) != ["doc3", "doc4"] or test_store.count_query({"brand_name": "b"}) != 2:
+        raise RuntimeError("Expired document listed")
+    if test_store.purge_expired(batch_size=1) != 2 or test_store.purge_expired() != 0:
+        raise RuntimeError("Incorrect number of documents purged")
+
+    test_store.set("doc3", {"brand_name": "b"})
+    time.sleep(0.6)
+    if test_store.get("doc3") is None:
+        raise RuntimeError("Overwrite without ttl should not expire")
+
+
+@pytest.mark.parametrize("store_class", [BytesStoreSqlite, BytesStoreDuckdb])
+def test_bytes_store_ttl(tmp_path: Path, store_class):
+    test_store = store_class("test_store", tmp_path / "test_store.db")
+    test_store.mset([("key1", b"a")], ttl=0.5)
+    test_store.set("key2", b"b")
+    time.sleep(0.6)
+    if test_store.mget(["key1", "key2"]) != [None, b"b"] or list(test_store.yield_keys()) != ["key2"]:
+        raise RuntimeError("Expired value returned")
+    if test_store.purge_expired() != 1:
+        raise RuntimeError("Incorrect number of values purged")
+
+    dict_store = DictStoreBytes(test_store)
+    dict_store.set("doc1", {"a": 1}, ttl=0.5)
+    time.sleep(0.6)
+    if dict_store.get("doc1") is not None:
+        raise RuntimeError("Expired document returned")
+
+
+def test_object_store_ttl(tmp_path: Path):
+    object_store = ObjectStoreNested(DictStoreSqlite("test_store", tmp_path / "test_store.db"), Summary)
+    object_store.set("doc1", Summary(text="a"), ttl=0.5)
+    object_store.mset([("doc2", Summary(text="b"))])
+    time.sleep(0.6)
+    if object_store.mget(["doc1", "doc2"]) != [None, Summary(text="b")]:
+        raise RuntimeError("Expired object returned")
+    object_store.delete_all()
+    if object_store.count() != 0:
+        raise RuntimeError("Objects not deleted")
+
+    with pytest.raises(NotImplementedError):
+        ObjectStoreNested(DictStoreMemory("test_store"), Summary).set("doc1", Summary(text="a"), ttl=1)
+
+
+def test_expiry_sweeper(tmp_path: Path):
+    dict_store = DictStoreSqlite("test_store", tmp_path / "test_store.db")
+    bytes_store = BytesStoreSqlite("test_store", tmp_path / "test_store_bytes.db")
+    dict_store.mset([(f"doc{i}", {"a": i}) for i in range(5)], ttl=0.01)
+    bytes_store.mset([("key1", b"a")], ttl=0.01)
+
+    sweeper = ExpirySweeper([dict_store, bytes_store], interval=0.05, batch_size=2).start()
+    try:
+        deadline = time.monotonic() + 5
+        while sweeper.count_purged < 6 and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        sweeper.stop()
+    if sweeper.count_purged != 6:
+        raise RuntimeError(f"Incorrect number of entries purged {sweeper.count_purged}")